@@ -0,0 +1,9 @@
+"""
+Offline benchmarks for SyncBazar (run with python -m benchmarks.<name>)
+
+They run on the fake SQLite driver (database/fake_odbc.py) unless
+SYNCBAZAR_DB_BACKEND is set.
+"""
+import os
+
+os.environ.setdefault('SYNCBAZAR_DB_BACKEND', 'fake')
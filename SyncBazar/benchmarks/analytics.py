@@ -0,0 +1,55 @@
+"""
+Benchmark: streamed pure-Python inventory analysis vs the NumPy engine
+
+Usage: python -m benchmarks.analytics [--items 1000000] [--repeat 3]
+
+Times analyze_rows() over row batches (what the Analysis window did
+before) against InventoryAnalytics over an ItemStore of the same rows.
+The store is built once up front, as the window loads it from the server.
+"""
+import argparse
+import time
+from database.analytics import InventoryAnalytics, analyze_rows
+from database.item_store import ItemStore
+from benchmarks.item_store_memory import generate_batches
+
+
+def best_of(repeat, func):
+    """Return (result, fastest seconds) over repeat runs"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def run(count, repeat=3):
+    batches = list(generate_batches(count))
+    store = ItemStore.from_batches(batches)
+    
+    python_result, python_time = best_of(repeat, lambda: analyze_rows(batches))
+    load_result, load_time = best_of(repeat, lambda: InventoryAnalytics(store))
+    numpy_result, numpy_time = best_of(repeat, lambda: load_result.analyze())
+    
+    print(f"Items:               {count:,}")
+    print(f"Pure Python:         {python_time * 1000:9.1f} ms")
+    print(f"NumPy load columns:  {load_time * 1000:9.1f} ms")
+    print(f"NumPy analyze:       {numpy_time * 1000:9.1f} ms")
+    print(f"Speedup (analyze):   {python_time / numpy_time:9.1f}x")
+    print(f"Speedup (total):     {python_time / (load_time + numpy_time):9.1f}x")
+    return {'items': count, 'python': python_time, 'load': load_time,
+            'analyze': numpy_time, 'same_top': python_result.top_items == numpy_result.top_items}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.items, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
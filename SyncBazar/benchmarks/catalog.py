@@ -0,0 +1,168 @@
+"""
+Deterministic synthetic catalog for the benchmarks
+
+generate_shops(), generate_items() and generate_activity() return the same
+rows for the same arguments and seed, so two benchmark runs time exactly
+the same data. The shape follows a real chain rather than uniform noise:
+a few categories, suppliers and shops hold most of the items (Zipf-like
+weights), prices are log-normal, and some items are low or out of stock.
+
+populate() writes a catalog into a SQLite database built by the 'sqlite'
+dialect of database/schema.py, the offline stand-in for SQL Server. Run
+as a script it seeds the database used by the fake driver:
+
+    python -m benchmarks.catalog --items 20000
+"""
+import argparse
+import math
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from config import FAKE_DB_SETTINGS
+from database import schema
+from database.queries import ADD_ITEM, ADD_SHOP
+
+
+CATEGORIES = ['Grocery', 'Electronics', 'Stationery', 'Household', 'Clothing', 'Beverages',
+              'Personal Care', 'Hardware', 'Toys', 'Kitchen', 'Furniture', 'Garden',
+              'Health', 'Sports', 'Automotive', 'Pet Supplies', 'Books', 'Baby',
+              'Office', 'Lighting', 'Music', 'Luggage', 'Crafts', 'Jewelry']
+NOUNS = ['Rice', 'Cable', 'Notebook', 'Soap', 'Shirt', 'Juice', 'Shampoo', 'Hammer',
+         'Puzzle', 'Pan', 'Chair', 'Hose', 'Vitamins', 'Ball', 'Wiper', 'Leash',
+         'Novel', 'Diaper', 'Stapler', 'Bulb', 'Speaker', 'Bag', 'Paint', 'Ring',
+         'Charger', 'Towel', 'Lamp', 'Mug', 'Pen', 'Blanket', 'Battery', 'Bottle']
+ADJECTIVES = ['Classic', 'Premium', 'Basic', 'Deluxe', 'Compact', 'Family', 'Mini',
+              'Pro', 'Eco', 'Smart', 'Travel', 'Heavy Duty', 'Organic', 'Wireless']
+ACTIVITY_TYPES = ['ITEM_UPDATED', 'ITEM_ADDED', 'ITEM_DELETED', 'BULK_UPDATED']
+ACTIVITY_WEIGHTS = [80, 15, 4, 1]
+
+START = datetime(2024, 1, 1)
+
+INSERT_ACTIVITY = """
+INSERT INTO activity_log (activity_type, description, item_id, quantity_changed, user_id,
+                          created_at)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def zipf_weights(count, skew=1.1):
+    """Cumulative weights where rank r is picked in proportion to 1 / r ** skew"""
+    total, cumulative = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** skew
+        cumulative.append(total)
+    return cumulative
+
+
+def shop_names(count):
+    """'Main Store' followed by numbered branches"""
+    return ['Main Store'] + [f'Branch {n}' for n in range(1, count)]
+
+
+def generate_shops(count, seed=1):
+    """Return ADD_SHOP rows for count shops"""
+    rng = random.Random(seed)
+    return [(name, f'{rng.randint(1, 999)} Market Road, City {n % 12 + 1}',
+             f'Manager {n + 1}', f'0300-{rng.randint(1000000, 9999999)}',
+             f"shop{n + 1}@syncbazar.com", 'Active' if rng.random() < 0.95 else 'Inactive')
+            for n, name in enumerate(shop_names(count))]
+
+
+def generate_items(count, shops=20, suppliers=200, seed=1, batch_size=5000):
+    """
+    Yield batches of ADD_ITEM rows for count items
+    
+    About 6% are out of stock and 14% below their reorder level. Items are
+    stocked at one of the shops (items.location), weighted to the bigger
+    ones.
+    """
+    rng = random.Random(seed)
+    locations = shop_names(shops)
+    supplier_names = [f'Supplier {n:03d}' for n in range(1, suppliers + 1)]
+    category_weights = zipf_weights(len(CATEGORIES))
+    supplier_weights = zipf_weights(len(supplier_names), 1.2)
+    location_weights = zipf_weights(len(locations), 0.8)
+    
+    batch = []
+    for number in range(1, count + 1):
+        category = rng.choices(CATEGORIES, cum_weights=category_weights)[0]
+        reorder_level = rng.choice((5, 10, 10, 20, 50))
+        roll = rng.random()
+        if roll < 0.06:
+            quantity = 0
+        elif roll < 0.20:
+            quantity = rng.randint(1, reorder_level - 1)
+        else:
+            quantity = rng.randint(reorder_level, reorder_level * 40)
+        price = round(min(max(math.exp(rng.gauss(3.0, 1.2)), 0.5), 20000.0), 2)
+        batch.append((
+            f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {number}',
+            category,
+            f'{category[:4].upper()}-{number:07d}',
+            quantity,
+            reorder_level,
+            price,
+            rng.choices(locations, cum_weights=location_weights)[0],
+            rng.choices(supplier_names, cum_weights=supplier_weights)[0],
+        ))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_activity(count, items, seed=1, batch_size=5000):
+    """Yield batches of activity_log rows spread over a year, mostly updates"""
+    rng = random.Random(seed)
+    batch = []
+    for _ in range(count):
+        activity_type = rng.choices(ACTIVITY_TYPES, ACTIVITY_WEIGHTS)[0]
+        item_id = rng.randint(1, max(items, 1))
+        change = rng.randint(-20, 50)
+        batch.append((activity_type, f"{activity_type.title().replace('_', ' ')} #{item_id}",
+                      item_id, change, 1,
+                      (START + timedelta(seconds=rng.randint(0, 365 * 86400))).isoformat(' ')))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def populate(conn, items, shops=20, activity=0, seed=1):
+    """Migrate conn (SQLite) and fill it with a synthetic catalog"""
+    schema.migrate(conn, 'sqlite')
+    conn.executemany(ADD_SHOP, generate_shops(shops, seed))
+    for batch in generate_items(items, shops, seed=seed):
+        conn.executemany(ADD_ITEM, batch)
+    for batch in generate_activity(activity, items, seed=seed):
+        conn.executemany(INSERT_ACTIVITY, batch)
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+
+def open_catalog(items, shops=20, activity=0, seed=1, path=":memory:"):
+    """Return a new SQLite connection holding a synthetic catalog"""
+    return populate(sqlite3.connect(path), items, shops, activity, seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed an offline SQLite catalog")
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--shops', type=int, default=20)
+    parser.add_argument('--activity', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--path', default=FAKE_DB_SETTINGS['database'],
+                        help="database file (default: FAKE_DB_SETTINGS['database'])")
+    args = parser.parse_args(argv)
+    
+    conn = open_catalog(args.items, args.shops, args.activity, args.seed, args.path)
+    conn.close()
+    print(f"✅ {args.items:,} items written to {args.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    main()
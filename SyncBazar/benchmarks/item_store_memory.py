@@ -0,0 +1,84 @@
+"""
+Memory benchmark: an item snapshot as a list of rows vs an ItemStore
+
+Usage: python -m benchmarks.item_store_memory [--items 500000]
+
+Rows are synthetic but shaped like GET_ALL_ITEMS results (Decimal prices,
+datetimes, a few dozen categories, locations and suppliers). Memory is
+measured with tracemalloc, so it counts Python objects only.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from database.item_store import ItemStore
+
+
+CATEGORIES = ['Stationery', 'Furniture', 'Electronics', 'Grocery', 'Hardware',
+              'Toys', 'Clothing', 'Kitchen', 'Garden', 'Health']
+LOCATIONS = ['Main Store'] + [f'Branch {n}' for n in range(1, 20)]
+SUPPLIERS = [None] + [f'Supplier {n}' for n in range(1, 60)]
+
+
+def generate_batches(count, batch_size=500, seed=1):
+    """Yield batches of synthetic GET_ALL_ITEMS rows"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    batch = []
+    for item_id in range(1, count + 1):
+        batch.append((
+            item_id,
+            f'{rng.choice(CATEGORIES)} item {item_id:07d}',
+            rng.choice(CATEGORIES),
+            f'SKU-{item_id:08d}',
+            rng.randint(0, 500),
+            rng.choice([5, 10, 20]),
+            Decimal(rng.randint(100, 100000)) / 100,
+            rng.choice(LOCATIONS),
+            rng.choice(SUPPLIERS),
+            start + timedelta(seconds=rng.randint(0, 10 ** 8)),
+        ))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def measure(build):
+    """Return (result, peak bytes still held, seconds) for build()"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held, elapsed
+
+
+def run(count):
+    rows, rows_bytes, rows_time = measure(
+        lambda: [row for batch in generate_batches(count) for row in batch])
+    del rows
+    store, store_bytes, store_time = measure(
+        lambda: ItemStore.from_batches(generate_batches(count)))
+    
+    mb = 1024 * 1024
+    print(f"Items:          {count:,}")
+    print(f"List of rows:   {rows_bytes / mb:8.1f} MB  ({rows_time:.2f}s)")
+    print(f"ItemStore:      {store_bytes / mb:8.1f} MB  ({store_time:.2f}s)")
+    print(f"Reduction:      {rows_bytes / max(store_bytes, 1):8.1f}x")
+    return {'items': count, 'rows_bytes': rows_bytes, 'store_bytes': store_bytes,
+            'store_nbytes': store.nbytes()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=500000)
+    run(parser.parse_args().items)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""
+Benchmark suite: time the hot paths against a synthetic offline catalog
+
+Usage:
+    python -m benchmarks.suite --items 100000 --output bench.json
+    python -m benchmarks.suite --items 100000 --baseline bench.json
+    python -m benchmarks.suite --compare old.json new.json
+
+The catalog from benchmarks.catalog is written to a temporary SQLite file
+and every scenario goes through the application's own code on the fake
+driver (database/fake_odbc.py): the controllers, DatabaseConnection and its
+pool, query cache, fetch_iter and execute_many, so no SQL Server is needed.
+The cache is cleared before each timed run. Results are written as JSON;
+against a baseline from an earlier run, any scenario slower by more than
+--tolerance is reported and the exit code is 1, so a regression can fail a
+build.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import DB_CONFIG, FAKE_DB_SETTINGS, QUERY_SETTINGS
+from database.connection import db
+from database.analytics import InventoryAnalytics, analyze_rows, load_numpy
+from database.item_store import ItemStore
+from database.search_index import TrigramIndex
+from database.queries import GET_ALL_ITEMS, GET_SEARCH_SNAPSHOT, ADD_ITEM
+from controllers.inventory_controller import InventoryController
+from controllers.search_controller import SearchController
+from controllers.dashboard_controller import DashboardController
+from controllers.analysis_controller import AnalysisController
+from benchmarks.catalog import open_catalog, generate_items
+
+
+# Search terms: a common word, a category, a supplier, one exact SKU, no match
+SEARCH_TERMS = ['Premium', 'Grocery', 'Supplier 007', 'ELEC-0000042', 'zzzz']
+
+# SKU prefix of the rows bulk_insert adds (and removes again)
+BULK_SKU = 'BENCH-'
+
+
+class Context:
+    """The catalog and anything a scenario needs prepared up front"""
+    
+    def __init__(self, items, bulk):
+        self.items = items
+        self.bulk = bulk
+        self.batches = list(db.fetch_iter(GET_ALL_ITEMS, raise_errors=True))
+        self.store = ItemStore.from_batches(self.batches)
+        self.index = build_index()
+        self.new_items = [row for batch in generate_items(bulk, seed=2) for row in batch]
+        # Unique SKUs that cannot collide with the catalog's
+        self.new_items = [row[:2] + (f'{BULK_SKU}{n}',) + row[3:]
+                          for n, row in enumerate(self.new_items)]
+
+
+def build_index():
+    """A trigram index streamed from the search snapshot, as SearchController builds it"""
+    index = TrigramIndex()
+    for batch in db.fetch_iter(GET_SEARCH_SNAPSHOT, raise_errors=True):
+        index.add_rows(batch)
+    return index
+
+
+def load_items_page(ctx):
+    """First keyset page of the item list"""
+    return len(InventoryController.get_items_page(None, QUERY_SETTINGS['page_size']))
+
+
+def load_items(ctx):
+    """Stream every item into an ItemStore, as the Analysis window loads them"""
+    return len(InventoryController.load_item_store())
+
+
+def search_items(ctx):
+    """SEARCH_ITEMS (four LIKE '%term%' columns) for each search term"""
+    return sum(len(SearchController.search_server(term)) for term in SEARCH_TERMS)
+
+
+def search_index_build(ctx):
+    """Build the trigram search index from the search snapshot"""
+    return len(build_index())
+
+
+def search_index(ctx):
+    """The same searches answered by the trigram index"""
+    return sum(len(ctx.index.search(term)) for term in SEARCH_TERMS)
+
+
+def dashboard_stats(ctx):
+    """GET_DASHBOARD_STATS, the dashboard's full recompute"""
+    return 1 if DashboardController.recompute() else 0
+
+
+def analysis_pushdown(ctx):
+    """Server-side analysis: summary, three group-bys and the top items"""
+    analysis = AnalysisController.analyze_on_server(5)
+    return analysis.total_items
+
+
+def analysis_cached(ctx):
+    """The same analysis again, answered by the query cache"""
+    return analysis_pushdown(ctx)
+
+
+def analysis_python(ctx):
+    """analyze_rows() over rows already loaded"""
+    return analyze_rows(ctx.batches).total_items
+
+
+def analysis_numpy(ctx):
+    """InventoryAnalytics over an ItemStore already loaded"""
+    return InventoryAnalytics(ctx.store).analyze().total_items
+
+
+def bulk_insert(ctx):
+    """db.execute_many(ADD_ITEM) in bulk_chunk_size chunks, each committed"""
+    written, errors = db.execute_many(ADD_ITEM, ctx.new_items)
+    if errors:
+        raise RuntimeError(f"bulk_insert failed for {len(errors)} rows: {errors[0][1]}")
+    return written
+
+
+def remove_bulk_items(ctx):
+    """Delete what bulk_insert added, so every run starts from the same catalog"""
+    db.execute_query("DELETE FROM items WHERE sku LIKE ?", (f'{BULK_SKU}%',))
+    db.execute_query("DELETE FROM item_tombstones")
+
+
+# name -> scenario; run in this order
+SCENARIOS = {
+    'load_items_page': load_items_page,
+    'load_items': load_items,
+    'search_items': search_items,
+    'search_index_build': search_index_build,
+    'search_index': search_index,
+    'dashboard_stats': dashboard_stats,
+    'analysis_pushdown': analysis_pushdown,
+    'analysis_cached': analysis_cached,
+    'analysis_python': analysis_python,
+    'analysis_numpy': analysis_numpy,
+    'bulk_insert': bulk_insert,
+}
+
+# Untimed steps around each run of a scenario
+PREPARE = {'analysis_cached': analysis_pushdown}
+CLEANUP = {'bulk_insert': remove_bulk_items}
+
+
+@contextmanager
+def catalog_database(path):
+    """Connect the application's db to the catalog file through the fake driver"""
+    if DB_CONFIG['backend'] != 'fake':
+        raise RuntimeError("The benchmark suite needs the offline driver "
+                           "(SYNCBAZAR_DB_BACKEND=fake)")
+    if db.conn is not None or db.pool is not None:
+        raise RuntimeError("The database is already connected")
+    previous = FAKE_DB_SETTINGS['database']
+    FAKE_DB_SETTINGS['database'] = path
+    try:
+        if not db.connect():
+            raise RuntimeError(f"Could not open the benchmark catalog {path}")
+        try:
+            yield db
+        finally:
+            db.close()
+            if db.cache is not None:
+                db.cache.clear()
+    finally:
+        FAKE_DB_SETTINGS['database'] = previous
+
+
+def time_scenario(name, func, ctx, repeat):
+    """Return {'seconds': best, 'median': ..., 'rows': ...} over repeat runs"""
+    runs, rows = [], None
+    for _ in range(repeat):
+        if db.cache is not None:
+            db.cache.clear()
+        if name in PREPARE:
+            PREPARE[name](ctx)
+        started = time.perf_counter()
+        try:
+            rows = func(ctx)
+            runs.append(time.perf_counter() - started)
+        finally:
+            if name in CLEANUP:
+                CLEANUP[name](ctx)
+    return {'seconds': min(runs), 'median': statistics.median(runs), 'rows': rows}
+
+
+def run(items=100000, shops=20, activity=50000, bulk=10000, seed=1, repeat=3, only=None,
+        echo=print):
+    """Build the catalog, time every scenario and return the results dict"""
+    started = time.perf_counter()
+    folder = tempfile.mkdtemp(prefix='syncbazar-bench-')
+    path = os.path.join(folder, 'catalog.db')
+    try:
+        open_catalog(items, shops, activity, seed, path=path).close()
+        with catalog_database(path):
+            ctx = Context(items, bulk)
+            echo(f"Catalog: {items:,} items, {shops} shops, {activity:,} activity rows "
+                 f"({time.perf_counter() - started:.1f}s to build)")
+            
+            scenarios = {}
+            for name, func in SCENARIOS.items():
+                if only and name not in only:
+                    continue
+                if name == 'analysis_numpy' and load_numpy() is None:
+                    echo(f"  {name:<20} skipped (numpy is not installed)")
+                    continue
+                result = time_scenario(name, func, ctx, repeat)
+                scenarios[name] = result
+                echo(f"  {name:<20} {result['seconds'] * 1000:10.2f} ms  "
+                     f"({result['rows']:,} rows)")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    
+    return {
+        'meta': {
+            'items': items, 'shops': shops, 'activity': activity, 'bulk': bulk, 'seed': seed,
+            'repeat': repeat, 'latency_ms': FAKE_DB_SETTINGS['latency_ms'],
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+        },
+        'scenarios': scenarios,
+    }
+
+
+def compare(baseline, current, tolerance=0.3, min_seconds=0.002):
+    """
+    Compare two result dicts; returns [(name, before, after, ratio, status)]
+    
+    status is 'regression' when a scenario got more than tolerance slower
+    (and by at least min_seconds, to ignore timer noise on tiny scenarios),
+    'improved' when it got that much faster, 'new' or 'missing' when it is
+    only in one of the two, and 'ok' otherwise.
+    """
+    before, after = baseline['scenarios'], current['scenarios']
+    rows = []
+    for name in list(before) + [name for name in after if name not in before]:
+        if name not in after:
+            rows.append((name, before[name]['seconds'], None, None, 'missing'))
+            continue
+        if name not in before:
+            rows.append((name, None, after[name]['seconds'], None, 'new'))
+            continue
+        old, new = before[name]['seconds'], after[name]['seconds']
+        ratio = new / old if old else float('inf')
+        if new - old > min_seconds and ratio > 1 + tolerance:
+            status = 'regression'
+        elif old - new > min_seconds and ratio < 1 / (1 + tolerance):
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append((name, old, new, ratio, status))
+    return rows
+
+
+def format_comparison(rows, baseline, current):
+    """Return the comparison as a text table"""
+    lines = []
+    catalog = ('items', 'shops', 'activity', 'bulk', 'seed')
+    if any(baseline['meta'].get(key) != current['meta'].get(key) for key in catalog):
+        lines.append("⚠️ Catalogs differ; timings are not directly comparable")
+    lines.append(f"{'Scenario':<20} {'Baseline':>11} {'Current':>11} {'Change':>8}")
+    for name, old, new, ratio, status in rows:
+        old_text = f"{old * 1000:9.2f}ms" if old is not None else f"{'-':>11}"
+        new_text = f"{new * 1000:9.2f}ms" if new is not None else f"{'-':>11}"
+        change = f"{(ratio - 1) * 100:+7.1f}%" if ratio is not None else f"{'':>8}"
+        flag = {'regression': '  ❌ slower', 'improved': '  ✅ faster'}.get(status, '')
+        if status in ('new', 'missing'):
+            flag = f"  ({status})"
+        lines.append(f"{name:<20} {old_text} {new_text} {change}{flag}")
+    return "\n".join(lines)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--shops', type=int, default=20)
+    parser.add_argument('--activity', type=int, default=50000)
+    parser.add_argument('--bulk', type=int, default=10000, help="rows per bulk_insert run")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=sorted(SCENARIOS), help="scenarios to run")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare the results with this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help="allowed slowdown before a regression (default 0.3 = 30%%)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="compare two saved result files and exit")
+    args = parser.parse_args(argv)
+    
+    if args.compare:
+        baseline, current = load(args.compare[0]), load(args.compare[1])
+    else:
+        try:
+            current = run(args.items, args.shops, args.activity, args.bulk, args.seed,
+                          args.repeat, args.only)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 2
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=2)
+            print(f"✅ Results written to {args.output}")
+        if not args.baseline:
+            return 0
+        baseline = load(args.baseline)
+    
+    rows = compare(baseline, current, args.tolerance)
+    print(format_comparison(rows, baseline, current))
+    return 1 if any(row[4] == 'regression' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,7 @@
 """
 Configuration file for SyncBazar Inventory System
 """
+import os
 
 # Database Configuration
 
@@ -11,7 +12,106 @@ DB_CONFIG = {
     'username': '',    # Windows Authentication
     'password': '',
     'trusted_connection': 'yes',
-    'driver': 'ODBC Driver 17 for SQL Server'
+    'driver': 'ODBC Driver 17 for SQL Server',
+    # 'pyodbc' talks to SQL Server; 'fake' runs offline on SQLite (database/fake_odbc.py)
+    'backend': os.environ.get('SYNCBAZAR_DB_BACKEND', 'pyodbc')
+}
+
+# Offline Database (DB_CONFIG['backend'] = 'fake')
+# Every round trip waits latency_ms plus up to jitter_ms, to mimic a slow link.
+FAKE_DB_SETTINGS = {
+    'database': os.environ.get('SYNCBAZAR_FAKE_DB', 'syncbazar_offline.db'),
+    'latency_ms': 0,           # delay per round trip to the "server"
+    'jitter_ms': 0,            # extra random delay, 0..jitter_ms per round trip
+    'rows_per_trip': 100,      # rows per network packet when fetching results
+    'connect_trips': 3,        # round trips to open a connection (login handshake)
+    'seed': None               # seed the jitter for repeatable runs
+}
+
+# Connection Pool
+# When enabled every query borrows a connection from a bounded pool, so
+# several windows and background refreshes can query at the same time.
+POOL_SETTINGS = {
+    'enabled': False,
+    'size': 5,                 # maximum open connections
+    'idle_timeout': 300,       # seconds before an idle connection is closed
+    'checkout_timeout': 30,    # seconds to wait for a free connection
+    'ping_after_idle': 10      # re-check liveness if idle longer than this
+}
+
+# Query Settings
+QUERY_SETTINGS = {
+    'fetch_batch_size': 500,   # rows per fetchmany() round trip in fetch_iter
+    'bulk_chunk_size': 1000,   # rows per executemany() call and commit
+    'page_size': 200,          # rows per keyset page in the inventory list
+    'change_overlap': 5,       # seconds re-read behind each change-tracking mark
+    'tombstone_retention': 86400  # seconds tombstones are kept; older marks reload
+}
+
+# Query Result Cache
+CACHE_SETTINGS = {
+    'enabled': True,
+    'max_rows': 50000,         # LRU budget across all cached results
+    'default_ttl': 30          # seconds; per-query TTLs live in database/cache.py
+}
+
+# Item Search
+SEARCH_SETTINGS = {
+    'use_index': True,         # answer searches from the in-memory trigram index
+    'index_max_age': 300,      # seconds before the index is rebuilt in the background
+    'debounce_ms': 250,        # quiet time after a keystroke before searching
+    'refine_max_age': 30       # seconds a result set may be narrowed locally
+}
+
+# Dashboard Aggregates
+DASHBOARD_SETTINGS = {
+    'recompute_interval': 300  # seconds between full GET_DASHBOARD_STATS recomputes
+}
+
+# Inventory Analysis
+ANALYSIS_SETTINGS = {
+    'pushdown': True,          # aggregate on the server; False loads items and uses NumPy
+    'top_items': 5,            # most valuable items listed in the Analysis window
+    'live': True,              # poll for changes and update the open Analysis window
+    'refresh_interval': 10     # seconds between change-marker polls
+}
+
+# Stock Alerts
+ALERT_SETTINGS = {
+    'enabled': True,           # watch for items crossing their reorder level
+    'poll_interval': 3,        # seconds between checks for rows changed elsewhere
+    'max_shown': 5,            # open alerts listed on the dashboard
+    'stop_timeout': 10         # seconds logout waits for a pass in progress
+}
+
+# Report Export
+REPORT_SETTINGS = {
+    'batch_size': 2000,        # rows per fetchmany() round trip while exporting
+    'output_dir': 'reports'    # default folder for headless (reports.py) exports
+}
+
+# Schema Migrations
+SCHEMA_SETTINGS = {
+    'auto_migrate': True       # apply pending migrations (database/schema.py) at startup
+}
+
+# Start-up
+STARTUP_SETTINGS = {
+    'warm_connections': 2,     # pooled connections opened while the login form is shown
+    'report_timing': False,    # print start-up milestones (see utils/startup.py)
+    'timing_log': None         # file to append start-up timings to, e.g. 'startup.log'
+}
+
+# Profiling
+# Profile each UI action and background task with cProfile (utils/profiling.py);
+# also enabled by SYNCBAZAR_PROFILE=1 in the environment.
+PROFILE_SETTINGS = {
+    'enabled': False,
+    'output_dir': 'profiles',  # one .prof file per profiled action
+    'log': None,               # top-N summaries; default <output_dir>/profile.log
+    'top': 25,                 # functions listed per action in the log
+    'sort': 'cumulative',      # pstats sort key for the log
+    'min_ms': 50               # skip saving actions faster than this
 }
 
 # Application Settings
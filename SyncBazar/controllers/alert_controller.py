@@ -0,0 +1,254 @@
+"""
+Stock alert controller
+"""
+import datetime
+import threading
+from config import ALERT_SETTINGS, QUERY_SETTINGS
+from database.connection import db
+from database.queries import (GET_SERVER_TIME, GET_LOW_STOCK_LEVELS,
+                              GET_STOCK_LEVELS_CHANGED_SINCE, GET_ITEM_TOMBSTONES_SINCE,
+                              GET_OPEN_STOCK_ALERTS, RAISE_STOCK_ALERT, CLEAR_STOCK_ALERTS)
+from database.alerts import StockAlert, StockLevels
+from database.analytics import IN_STOCK
+
+
+class AlertController:
+    """
+    Low-stock alerts: the persistent alert list and the shared watcher
+    
+    subscribe() starts a StockWatcher on first use. Controllers call
+    item_changed() after every item write so alerts for local changes
+    arrive at once; writes from other terminals are picked up on the
+    watcher's next poll.
+    """
+    
+    watcher = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def subscribe(callback):
+        """
+        Call callback(alerts) with every batch of new StockAlerts
+        
+        Callbacks run on the watcher thread. Returns a function that
+        removes the subscription, or None when alerts are disabled.
+        """
+        if not ALERT_SETTINGS['enabled']:
+            return None
+        with AlertController._lock:
+            if AlertController.watcher is None:
+                AlertController.watcher = StockWatcher()
+                AlertController.watcher.start()
+            watcher = AlertController.watcher
+        return watcher.subscribe(callback)
+    
+    @staticmethod
+    def item_changed():
+        """Ask the watcher to check for changed rows now"""
+        if AlertController.watcher is not None:
+            AlertController.watcher.nudge()
+    
+    @staticmethod
+    def stop(timeout=None):
+        """
+        Stop the watcher and wait for its thread (e.g. before closing the connection)
+        
+        Waits up to timeout seconds (ALERT_SETTINGS stop_timeout by default);
+        returns False if a pass was still running by then.
+        """
+        if timeout is None:
+            timeout = ALERT_SETTINGS['stop_timeout']
+        with AlertController._lock:
+            watcher, AlertController.watcher = AlertController.watcher, None
+        if watcher is None:
+            return True
+        return watcher.stop(timeout)
+    
+    @staticmethod
+    def get_open_alerts():
+        """Return the open alerts as StockAlerts, newest first"""
+        return [StockAlert(item_id, name, location, quantity, reorder_level, level, IN_STOCK)
+                for item_id, name, location, quantity, reorder_level, level, _
+                in db.fetch_all(GET_OPEN_STOCK_ALERTS)]
+    
+    @staticmethod
+    def get_low_stock_levels():
+        """
+        Return (server_time, low_stock_rows), or None on failure
+        
+        Read in one transaction so rows written after server_time are
+        certain to show up in the next get_stock_changes().
+        """
+        try:
+            with db.transaction():
+                server_time = db.fetch_one(GET_SERVER_TIME)[0]
+                rows = db.fetch_all(GET_LOW_STOCK_LEVELS)
+            return server_time, rows
+        except Exception as e:
+            print(f"❌ Failed to load stock levels: {e}")
+            return None
+    
+    @staticmethod
+    def get_stock_changes(since):
+        """
+        Return (server_time, changed_rows, deleted_ids) since a mark, or None on failure
+        
+        changed_rows and deleted_ids are None when the mark is older than
+        tombstone_retention, as deletes since then may have been purged.
+        """
+        try:
+            with db.transaction():
+                server_time = db.fetch_one(GET_SERVER_TIME)[0]
+                if since < server_time - datetime.timedelta(
+                        seconds=QUERY_SETTINGS['tombstone_retention']):
+                    return server_time, None, None
+                changed = db.fetch_all(GET_STOCK_LEVELS_CHANGED_SINCE, (since,))
+                deleted = [row[0] for row in db.fetch_all(GET_ITEM_TOMBSTONES_SINCE, (since,))]
+            return server_time, changed, deleted
+        except Exception as e:
+            print(f"❌ Failed to fetch stock changes: {e}")
+            return None
+    
+    @staticmethod
+    def record(alerts):
+        """Write status changes to the persistent alert list; returns success"""
+        try:
+            with db.transaction():
+                for alert in alerts:
+                    db.execute_query(CLEAR_STOCK_ALERTS, (alert.item_id, alert.level))
+                    if alert.level != IN_STOCK:
+                        db.execute_query(RAISE_STOCK_ALERT, (
+                            alert.item_id, alert.item_name, alert.location, alert.quantity,
+                            alert.reorder_level, alert.level, alert.item_id, alert.level
+                        ))
+            return True
+        except Exception as e:
+            print(f"❌ Failed to record stock alerts: {e}")
+            return False
+    
+    @staticmethod
+    def reconcile(levels, open_alerts):
+        """
+        Return the StockAlerts that bring the persistent list in line with levels
+        
+        Covers items that crossed a threshold, or recovered, while no
+        watcher was running.
+        """
+        recorded = {alert.item_id: alert for alert in open_alerts}
+        changes = [alert for alert in levels.alerts()
+                   if alert.item_id not in recorded or recorded[alert.item_id].level != alert.level]
+        changes.extend(alert._replace(level=IN_STOCK, previous=alert.level)
+                       for item_id, alert in recorded.items() if item_id not in levels)
+        return changes
+
+
+class StockWatcher:
+    """
+    Background thread that turns item writes into stock alerts
+    
+    It starts from the low-stock items, then each pass reads only the rows
+    written since the previous one (the same server-clock mark and overlap
+    as ItemChangeTracker), so no pass scans the items table. Status changes
+    are written to stock_alerts and handed to every subscriber.
+    """
+    
+    def __init__(self, interval=None, overlap=None):
+        self.interval = ALERT_SETTINGS['poll_interval'] if interval is None else interval
+        if overlap is None:
+            overlap = QUERY_SETTINGS['change_overlap']
+        self.overlap = datetime.timedelta(seconds=overlap)
+        self.levels = None
+        self.mark = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+    
+    def subscribe(self, callback):
+        """Add a subscriber; returns a function that removes it"""
+        with self._lock:
+            self._subscribers.append(callback)
+        
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+    
+    def start(self):
+        """Start polling on a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='stock-watcher', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=None):
+        """
+        Stop the thread after its current pass and wait up to timeout seconds for it
+        
+        Returns True once the thread has exited (or was never started).
+        """
+        self._stopped.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is None or thread is threading.current_thread():
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+    
+    def nudge(self):
+        """Run the next pass now instead of at the end of the interval"""
+        self._wake.set()
+    
+    def check(self):
+        """
+        Run one pass and return the StockAlerts it published
+        
+        The first pass loads the low-stock items and reconciles the
+        persistent alert list with them; later passes apply only changes.
+        A failed read keeps the old mark, so the next pass retries it.
+        """
+        if self.levels is None:
+            loaded = AlertController.get_low_stock_levels()
+            if loaded is None:
+                return []
+            server_time, rows = loaded
+            levels = StockLevels(rows)
+            alerts = AlertController.reconcile(levels, AlertController.get_open_alerts())
+            self.levels = levels
+        else:
+            changes = AlertController.get_stock_changes(self.mark)
+            if changes is None:
+                return []
+            server_time, changed, deleted = changes
+            if changed is None:
+                # The mark outlived the tombstones: start again from the levels
+                self.levels = None
+                return self.check()
+            alerts = self.levels.update(changed, deleted)
+        
+        self.mark = server_time - self.overlap
+        if alerts:
+            AlertController.record(alerts)
+            self.publish(alerts)
+        return alerts
+    
+    def publish(self, alerts):
+        """Hand alerts to every subscriber"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(alerts)
+            except Exception as e:
+                print(f"❌ Alert subscriber failed: {e}")
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.clear()
+            try:
+                self.check()
+            except Exception as e:
+                # Keep watching; the next pass starts again from the low-stock items
+                print(f"❌ Stock watcher pass failed: {e}")
+                self.levels = None
+            self._wake.wait(self.interval)
@@ -0,0 +1,187 @@
+"""
+Analysis controller
+"""
+import threading
+from concurrent.futures import Future
+from config import ANALYSIS_SETTINGS
+from database.connection import db
+from database.queries import (GET_ALL_ITEMS, GET_INVENTORY_SUMMARY, GET_VALUE_BY_CATEGORY,
+                              GET_VALUE_BY_LOCATION, GET_VALUE_BY_SUPPLIER, GET_TOP_VALUE_ITEMS,
+                              GET_CHANGE_MARKER)
+from database.analytics import (InventoryAnalysis, InventoryAnalytics, analyze_rows,
+                                order_groups, load_numpy)
+from controllers.inventory_controller import InventoryController
+from controllers.dashboard_controller import DashboardController
+
+
+# Server-side group-by for each breakdown in the Analysis window
+GROUP_QUERIES = {
+    'category': GET_VALUE_BY_CATEGORY,
+    'location': GET_VALUE_BY_LOCATION,
+    'supplier': GET_VALUE_BY_SUPPLIER,
+}
+
+# Tables whose cached reads are stale once a part of the change marker moved
+CHANGED_TABLES = {
+    'items': {'items', 'item_tombstones'},
+    'shops': {'shops'},
+}
+
+
+class AnalysisController:
+    """Computes the inventory analysis shown in the Analysis window"""
+    
+    # Refresh results by (kind, marker value): every open window that sees
+    # the same marker shares one recompute instead of running its own
+    _refreshes = {}
+    # Marker value each part's cached tables were last invalidated for
+    _invalidated = {}
+    _refresh_lock = threading.Lock()
+    
+    @staticmethod
+    def analyze_inventory(top=None):
+        """
+        Return an InventoryAnalysis of every item, or None on failure
+        
+        By default the aggregation runs on the server (analyze_on_server);
+        with pushdown disabled the items are loaded and analyzed locally.
+        """
+        if top is None:
+            top = ANALYSIS_SETTINGS['top_items']
+        if ANALYSIS_SETTINGS['pushdown']:
+            return AnalysisController.analyze_on_server(top)
+        return AnalysisController.analyze_locally(top)
+    
+    @staticmethod
+    def analyze_on_server(top=5):
+        """
+        Build the analysis from aggregate queries
+        
+        Only the summary row, one row per category/location/supplier and
+        the top items cross the network.
+        """
+        try:
+            with db.transaction():
+                summary = db.fetch_one(GET_INVENTORY_SUMMARY, cached=True)
+                groups = {column: db.fetch_all(query, cached=True)
+                          for column, query in GROUP_QUERIES.items()}
+                top_items = db.fetch_all(GET_TOP_VALUE_ITEMS, (top,), cached=True)
+        except Exception as e:
+            print(f"❌ Inventory analysis failed: {e}")
+            return None
+        
+        return AnalysisController.build_analysis(summary, groups, top_items)
+    
+    @staticmethod
+    def build_analysis(summary, groups, top_items):
+        """Turn the aggregate query rows into an InventoryAnalysis"""
+        total_items, total_quantity, total_value, in_stock, low_stock, out_of_stock = summary
+        return InventoryAnalysis(
+            total_items or 0, total_quantity or 0, float(total_value or 0),
+            in_stock or 0, low_stock or 0, out_of_stock or 0,
+            [(float(value or 0), item_id, name, quantity)
+             for value, item_id, name, quantity in top_items],
+            {column: order_groups((label, items, quantity or 0, float(value or 0))
+                                  for label, items, quantity, value in rows)
+             for column, rows in groups.items()},
+        )
+    
+    @staticmethod
+    def analyze_locally(top=5):
+        """
+        Load every item and analyze it in memory
+        
+        Items go into a compact ItemStore and are analyzed with NumPy;
+        without NumPy the rows are streamed through analyze_rows() instead.
+        """
+        if load_numpy() is None:
+            return analyze_rows(db.fetch_iter(GET_ALL_ITEMS, cached=True), top)
+        
+        store = InventoryController.load_item_store()
+        if store is None:
+            return None
+        return InventoryAnalytics(store).analyze(top)
+    
+    @staticmethod
+    def get_change_marker():
+        """
+        Return {'items': ..., 'shops': ...} change markers, or None on failure
+        
+        A part's marker moves whenever rows of that part are written, from
+        any terminal. The probe is cached for a few seconds so several
+        windows in one process share it.
+        """
+        row = db.fetch_one(GET_CHANGE_MARKER, cached=True)
+        if not row:
+            return None
+        return {'items': tuple(row[:3]), 'shops': tuple(row[3:])}
+    
+    @staticmethod
+    def changed_parts(old, new):
+        """Return the set of parts whose marker differs between old and new"""
+        if old is None or new is None:
+            return set()
+        return {part for part in new if old.get(part) != new[part]}
+    
+    @classmethod
+    def refresh(cls, parts, marker, top=None):
+        """
+        Recompute only what depends on the changed parts, as of marker
+        
+        Returns (stats, analysis); analysis is None unless items changed.
+        The overview totals are reloaded into the shared AggregateStore.
+        Windows refreshing to the same marker share one set of queries.
+        """
+        if top is None:
+            top = ANALYSIS_SETTINGS['top_items']
+        cls._invalidate(marker)
+        
+        stats = cls._shared(('stats', marker['items'], marker['shops']),
+                            DashboardController.recompute)
+        analysis = None
+        if 'items' in parts:
+            analysis = cls._shared(('analysis', marker['items'], top),
+                                   lambda: cls.analyze_inventory(top))
+        return stats, analysis
+    
+    @classmethod
+    def _invalidate(cls, marker):
+        """Drop cached reads of the parts that moved since the last refresh"""
+        with cls._refresh_lock:
+            parts = {part for part in marker if cls._invalidated.get(part) != marker[part]}
+            cls._invalidated.update((part, marker[part]) for part in parts)
+        if parts and db.cache is not None:
+            tables = set()
+            for part in parts:
+                tables |= CHANGED_TABLES[part]
+            db.cache.invalidate_tables(tables)
+    
+    @classmethod
+    def _shared(cls, key, compute):
+        """
+        Return compute() for key, running it once for every caller
+        
+        Callers arriving while it runs wait for the same result. Only the
+        newest marker of each kind is kept, and failures (None) are not.
+        """
+        with cls._refresh_lock:
+            future = cls._refreshes.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                for old in [old for old in cls._refreshes if old[0] == key[0]]:
+                    del cls._refreshes[old]
+                cls._refreshes[key] = future
+        
+        if owner:
+            try:
+                result = compute()
+            except Exception as e:
+                result = None
+                print(f"❌ Analysis refresh failed: {e}")
+            if result is None:
+                with cls._refresh_lock:
+                    if cls._refreshes.get(key) is future:
+                        del cls._refreshes[key]
+            future.set_result(result)
+        return future.result()
@@ -0,0 +1,80 @@
+"""
+Dashboard controller
+"""
+import threading
+from config import DASHBOARD_SETTINGS
+from database.connection import db
+from database.queries import GET_DASHBOARD_STATS
+from database.aggregates import AggregateStore
+
+
+class DashboardController:
+    """
+    Serves dashboard statistics from the in-memory AggregateStore
+    
+    The inventory and shop controllers report every write as a delta, so the
+    Dashboard and Analysis windows read the totals without querying. Only
+    the first read (or one after invalidate()) runs GET_DASHBOARD_STATS on
+    the calling thread; after that a background recompute every
+    recompute_interval seconds corrects drift.
+    """
+    
+    store = AggregateStore()
+    _refreshing = False
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get_stats():
+        """Return (total_items, total_shops, total_value, low_stock, out_of_stock)"""
+        store = DashboardController.store
+        stats = store.snapshot()
+        if stats is None:
+            # An invalidate() racing the recompute leaves the store empty; show the raw row
+            fresh = DashboardController.recompute()
+            return store.snapshot() or fresh or (0, 0, 0, 0, 0)
+        
+        if store.age() > DASHBOARD_SETTINGS['recompute_interval']:
+            DashboardController._recompute_in_background()
+        return stats
+    
+    @staticmethod
+    def recompute():
+        """Reload the totals from the server and return the fetched row"""
+        store = DashboardController.store
+        generation = store.generation()
+        stats = db.fetch_one(GET_DASHBOARD_STATS)
+        if stats:
+            store.load(stats, generation)
+        return stats
+    
+    @staticmethod
+    def item_changed(old=None, new=None):
+        """Record an item write; see AggregateStore.apply_item"""
+        DashboardController.store.apply_item(old, new)
+    
+    @staticmethod
+    def shops_changed(count):
+        """Record shops added (positive) or removed (negative)"""
+        DashboardController.store.apply_shops(count)
+    
+    @staticmethod
+    def invalidate():
+        """Force a full recompute on the next read"""
+        DashboardController.store.invalidate()
+    
+    @classmethod
+    def _recompute_in_background(cls):
+        with cls._lock:
+            if cls._refreshing:
+                return
+            cls._refreshing = True
+        threading.Thread(target=cls._background_recompute, name='dashboard-recompute',
+                         daemon=True).start()
+    
+    @classmethod
+    def _background_recompute(cls):
+        try:
+            cls.recompute()
+        finally:
+            with cls._lock:
+                cls._refreshing = False
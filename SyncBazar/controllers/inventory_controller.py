@@ -1,16 +1,38 @@
 """
 Inventory controller
 """
+import bisect
+import datetime
+import math
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from config import BUSINESS_RULES, QUERY_SETTINGS
 from database.connection import db
-from database.queries import ADD_ITEM, UPDATE_ITEM, DELETE_ITEM
+from controllers.search_controller import SearchController
+from controllers.dashboard_controller import DashboardController
+from controllers.alert_controller import AlertController
+from database.queries import (ADD_ITEM, ADD_ITEM_RETURNING_ID, GET_ITEM_BY_ID,
+                              UPDATE_ITEM, DELETE_ITEM, LOG_ACTIVITY,
+                              GET_ITEMS_FIRST_PAGE, GET_ITEMS_PAGE_AFTER, GET_ITEM_TOTALS,
+                              GET_SERVER_TIME, GET_ITEMS_CHANGED_SINCE,
+                              GET_ITEM_TOMBSTONES_SINCE, PURGE_ITEM_TOMBSTONES,
+                              GET_ALL_ITEMS)
+from database.item_store import ItemStore
 from utils.validators import validate_numeric
 
+# Background thread used to fetch the next item page ahead of the UI
+_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='item-prefetch')
+
+
+def _tombstone_retention():
+    return datetime.timedelta(seconds=QUERY_SETTINGS['tombstone_retention'])
+
 
 class InventoryController:
     """Handles inventory business logic"""
     
     @staticmethod
-    def add_item(item_data):
+    def add_item(item_data, user_id=None):
         """
         Add new item
         
@@ -20,70 +42,516 @@ class InventoryController:
         - As per Lehman's Law (Continuing Change), this modularity allows the system to evolve easily
           as user requirements change over time.
         """
-        # Validate required fields
-        if not item_data.get('name'):
-            return False, "Item name is required"
-        
-        # Validate numeric fields
-        quantity_valid, quantity_msg = validate_numeric(item_data.get('quantity', 0), "Quantity")
-        if not quantity_valid:
-            return False, quantity_msg
-        
-        price_valid, price_msg = validate_numeric(item_data.get('price', 0), "Price")
-        if not price_valid:
-            return False, price_msg
+        params, error = InventoryController._item_params(item_data)
+        if error:
+            return False, error
         
         try:
-            # Add to database
-            db.execute_query(ADD_ITEM, (
-                item_data['name'],
-                item_data.get('category', 'General'),
-                item_data.get('sku', ''),
-                int(float(item_data['quantity'])),
-                10,  # Default reorder level
-                float(item_data['price']),
-                item_data.get('location', 'Main Store'),
-                item_data.get('supplier', '')
-            ))
+            # Insert the item and its activity row atomically
+            with db.transaction():
+                item_id = db.fetch_one(ADD_ITEM_RETURNING_ID, params)[0]
+                db.execute_query(LOG_ACTIVITY, (
+                    'ITEM_ADDED', f"Added item '{params[0]}'", item_id, params[3], user_id
+                ))
+            SearchController.item_saved(InventoryController._search_row(item_id, params))
+            DashboardController.item_changed(new=params[3:6])
+            AlertController.item_changed()
             return True, "Item added successfully"
         except Exception as e:
             return False, f"Failed to add item: {str(e)}"
     
     @staticmethod
-    def update_item(item_id, item_data):
+    def update_item(item_id, item_data, user_id=None):
         """Update existing item"""
-        if not item_data.get('name'):
-            return False, "Item name is required"
-        
-        quantity_valid, quantity_msg = validate_numeric(item_data.get('quantity', 0), "Quantity")
-        if not quantity_valid:
-            return False, quantity_msg
-        
-        price_valid, price_msg = validate_numeric(item_data.get('price', 0), "Price")
-        if not price_valid:
-            return False, price_msg
+        params, error = InventoryController._item_params(item_data)
+        if error:
+            return False, error
         
         try:
-            db.execute_query(UPDATE_ITEM, (
-                item_data['name'],
-                item_data.get('category', 'General'),
-                item_data.get('sku', ''),
-                int(float(item_data['quantity'])),
-                10,
-                float(item_data['price']),
-                item_data.get('location', 'Main Store'),
-                item_data.get('supplier', ''),
-                item_id
-            ))
+            with db.transaction():
+                old = db.fetch_one(GET_ITEM_BY_ID, (item_id,))
+                if not old:
+                    return False, "Item not found"
+                db.execute_query(UPDATE_ITEM, params + (item_id,))
+                db.execute_query(LOG_ACTIVITY, (
+                    'ITEM_UPDATED', f"Updated item '{params[0]}'", item_id,
+                    params[3] - old[4], user_id
+                ))
+            SearchController.item_saved(InventoryController._search_row(item_id, params))
+            DashboardController.item_changed(old=old[4:7], new=params[3:6])
+            AlertController.item_changed()
             return True, "Item updated successfully"
         except Exception as e:
             return False, f"Failed to update item: {str(e)}"
     
     @staticmethod
-    def delete_item(item_id):
+    def delete_item(item_id, user_id=None):
         """Delete item"""
         try:
-            db.execute_query(DELETE_ITEM, (item_id,))
+            with db.transaction():
+                old = db.fetch_one(GET_ITEM_BY_ID, (item_id,))
+                if not old:
+                    return False, "Item not found"
+                db.execute_query(DELETE_ITEM, (item_id,))
+                db.execute_query(LOG_ACTIVITY, (
+                    'ITEM_DELETED', f"Deleted item '{old[1]}'", item_id, -old[4], user_id
+                ))
+            SearchController.item_deleted(item_id)
+            DashboardController.item_changed(old=old[4:7])
+            AlertController.item_changed()
+            InventoryController.purge_tombstones()
             return True, "Item deleted successfully"
         except Exception as e:
             return False, f"Failed to delete item: {str(e)}"
+    
+    @staticmethod
+    def get_items_page(after=None, page_size=None):
+        """
+        Fetch one page of items ordered by (item_name, item_id)
+        
+        after is the (item_name, item_id) of the last row of the previous
+        page, or None for the first page. Each page is an index seek, so
+        deep pages cost the same as the first one.
+        """
+        if page_size is None:
+            page_size = QUERY_SETTINGS['page_size']
+        if after is None:
+            return db.fetch_all(GET_ITEMS_FIRST_PAGE, (page_size,))
+        name, item_id = after
+        return db.fetch_all(GET_ITEMS_PAGE_AFTER, (page_size, name, name, item_id))
+    
+    @staticmethod
+    def get_item(item_id):
+        """Return one item row by id, or None if it does not exist"""
+        return db.fetch_one(GET_ITEM_BY_ID, (item_id,))
+    
+    @staticmethod
+    def get_server_time():
+        """Return the database server's current time, or None on failure"""
+        row = db.fetch_one(GET_SERVER_TIME)
+        return row[0] if row else None
+    
+    @staticmethod
+    def get_item_changes(since, after=None):
+        """
+        Return (server_time, changed_rows, deleted_ids) for writes at or after since
+        
+        Changed rows come in the server's (item_name, item_id) order, each
+        followed by previous_id (the row before it in that order) and
+        past_page (1 if it sorts after the keyset key after, the last row a
+        paged list has loaded). changed_rows and deleted_ids are None when
+        since is older than tombstone_retention, as tombstones written since
+        then may have been purged. Returns None if any of the queries
+        fails, so callers never mistake an error for "nothing changed".
+        """
+        name, item_id = after if after is not None else (None, None)
+        try:
+            with db.transaction():
+                server_time = db.fetch_one(GET_SERVER_TIME)[0]
+                if since < server_time - _tombstone_retention():
+                    return server_time, None, None
+                changed = db.fetch_all(GET_ITEMS_CHANGED_SINCE, (name, name, item_id, since))
+                deleted = [row[0] for row in db.fetch_all(GET_ITEM_TOMBSTONES_SINCE, (since,))]
+            return server_time, changed, deleted
+        except Exception as e:
+            print(f"❌ Failed to fetch item changes: {e}")
+            return None
+    
+    @staticmethod
+    def purge_tombstones():
+        """Delete tombstones older than tombstone_retention; returns how many went"""
+        now = InventoryController.get_server_time()
+        if now is None:
+            return 0
+        result = db.execute_query(PURGE_ITEM_TOMBSTONES, (now - _tombstone_retention(),))
+        return result.rowcount if result else 0
+    
+    @staticmethod
+    def load_item_store():
+        """
+        Load every item into a compact ItemStore, or return None on failure
+        
+        Streams GET_ALL_ITEMS batch by batch, so the full list of Rows is
+        never held at once.
+        """
+        try:
+            return ItemStore.from_batches(db.fetch_iter(GET_ALL_ITEMS, raise_errors=True))
+        except Exception as e:
+            print(f"❌ Failed to load items: {e}")
+            return None
+    
+    @staticmethod
+    def get_item_totals():
+        """Return (item_count, total_quantity, total_value) for all items"""
+        totals = db.fetch_one(GET_ITEM_TOTALS, cached=True)
+        if not totals:
+            return 0, 0, 0
+        count, quantity, value = totals
+        return count or 0, quantity or 0, value or 0
+    
+    @staticmethod
+    def add_items(items_data, user_id=None):
+        """
+        Add many items in bulk
+        
+        Invalid rows are skipped and reported; valid rows are written in
+        chunks. Returns (added_count, failures) where failures is a list of
+        (index, message) tuples indexed into items_data.
+        """
+        rows, indexes, failures = [], [], []
+        for index, item_data in enumerate(items_data):
+            params, error = InventoryController._item_params(item_data)
+            if error:
+                failures.append((index, error))
+            else:
+                rows.append(params)
+                indexes.append(index)
+        
+        result = InventoryController._bulk_write(ADD_ITEM, rows, indexes, failures,
+                                                 'BULK_ADDED', "Bulk added {} items", user_id)
+        if result[0]:
+            # New item ids are not returned by executemany, so rebuild
+            SearchController.invalidate()
+            failed = {index for index, _ in result[1]}
+            for params, index in zip(rows, indexes):
+                if index not in failed:
+                    DashboardController.item_changed(new=params[3:6])
+            AlertController.item_changed()
+        return result
+    
+    @staticmethod
+    def update_items(updates, user_id=None):
+        """
+        Update many items in bulk
+        
+        updates is an iterable of (item_id, item_data) pairs. Returns
+        (updated_count, failures) like add_items.
+        """
+        rows, indexes, failures = [], [], []
+        for index, (item_id, item_data) in enumerate(updates):
+            params, error = InventoryController._item_params(item_data)
+            if error:
+                failures.append((index, error))
+            else:
+                rows.append(params + (item_id,))
+                indexes.append(index)
+        
+        written, failures = InventoryController._bulk_write(
+            UPDATE_ITEM, rows, indexes, failures, 'BULK_UPDATED', "Bulk updated {} items", user_id)
+        InventoryController._sync_search_index(rows, indexes, failures, updated=True)
+        if written:
+            # Old quantities are not read back for bulk writes
+            DashboardController.invalidate()
+            AlertController.item_changed()
+        return written, failures
+    
+    @staticmethod
+    def delete_items(item_ids, user_id=None):
+        """
+        Delete many items in bulk
+        
+        Returns (deleted_count, failures) like add_items.
+        """
+        rows, indexes, failures = [], [], []
+        for index, item_id in enumerate(item_ids):
+            try:
+                rows.append((int(item_id),))
+                indexes.append(index)
+            except (TypeError, ValueError):
+                failures.append((index, f"Invalid item id: {item_id}"))
+        
+        written, failures = InventoryController._bulk_write(
+            DELETE_ITEM, rows, indexes, failures, 'BULK_DELETED', "Bulk deleted {} items", user_id)
+        InventoryController._sync_search_index(rows, indexes, failures, updated=False)
+        if written:
+            DashboardController.invalidate()
+            AlertController.item_changed()
+            InventoryController.purge_tombstones()
+        return written, failures
+    
+    @staticmethod
+    def _item_params(item_data):
+        """Validate item data and build ADD_ITEM parameters, or return an error"""
+        # Validate required fields
+        if not item_data.get('name'):
+            return None, "Item name is required"
+        
+        # Validate numeric fields
+        quantity_valid, quantity_msg = validate_numeric(item_data.get('quantity', 0), "Quantity")
+        if not quantity_valid:
+            return None, quantity_msg
+        
+        price_valid, price_msg = validate_numeric(item_data.get('price', 0), "Price")
+        if not price_valid:
+            return None, price_msg
+        
+        return (
+            item_data['name'],
+            item_data.get('category', 'General'),
+            item_data.get('sku', ''),
+            int(float(item_data.get('quantity', 0))),
+            BUSINESS_RULES['default_reorder_level'],
+            float(item_data.get('price', 0)),
+            item_data.get('location', 'Main Store'),
+            item_data.get('supplier', '')
+        ), None
+    
+    @staticmethod
+    def _search_row(item_id, params):
+        """Build a SEARCH_ITEMS-shaped row from ADD_ITEM parameters"""
+        name, category, sku, quantity, reorder_level, price, location, supplier = params
+        return (item_id, name, category, sku, quantity, price, location, supplier)
+    
+    @staticmethod
+    def _sync_search_index(rows, indexes, failures, updated):
+        """Apply successful bulk updates/deletes to the search index"""
+        failed = {index for index, _ in failures}
+        for params, index in zip(rows, indexes):
+            if index in failed:
+                continue
+            if updated:
+                SearchController.item_saved(InventoryController._search_row(params[-1], params[:-1]))
+            else:
+                SearchController.item_deleted(params[0])
+    
+    @staticmethod
+    def _bulk_write(query, rows, indexes, failures, activity_type, description, user_id):
+        """Run a bulk statement and map database errors back to input indexes"""
+        written, errors = db.execute_many(query, rows)
+        failures.extend((indexes[row_index], f"Database error: {message}")
+                        for row_index, message in errors)
+        failures.sort()
+        
+        if written:
+            # One summary activity row per batch rather than one per item
+            db.execute_query(LOG_ACTIVITY, (
+                activity_type, description.format(written), None, None, user_id
+            ))
+        return written, failures
+
+
+class ItemPager:
+    """
+    Walks the item list one keyset page at a time
+    
+    As soon as a page is handed out, the following page is requested on a
+    background thread, so it is usually ready by the time the user scrolls
+    to the end of the list.
+    """
+    
+    def __init__(self, page_size=None):
+        self.page_size = page_size or QUERY_SETTINGS['page_size']
+        self.reset()
+    
+    def reset(self):
+        """Start again from the first page"""
+        self.after = None
+        self.exhausted = False
+        self._prefetch = None
+    
+    def next_page(self):
+        """Return the next page of rows (empty once the list is exhausted)"""
+        if self.exhausted:
+            return []
+        
+        if self._prefetch is not None:
+            rows = self._prefetch.result()
+            self._prefetch = None
+        else:
+            rows = InventoryController.get_items_page(self.after, self.page_size)
+        
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            last = rows[-1]
+            self.after = (last[1], last[0])
+        self._start_prefetch()
+        return rows
+    
+    def refetch(self):
+        """Drop a prefetched page that may predate a write"""
+        self._prefetch = None
+        self._start_prefetch()
+    
+    def _start_prefetch(self):
+        if not self.exhausted:
+            self._prefetch = _prefetch_executor.submit(
+                InventoryController.get_items_page, self.after, self.page_size)
+
+
+class ItemList:
+    """
+    The loaded item rows in server order, held in an ItemStore
+    
+    Rows live in the store's column arrays, not as pyodbc Rows, and read
+    back as tuples by list index. Every row has an ordinal that grows down
+    the list, so a row is found by item_id with a binary search over the
+    ordinals instead of a scan. A row inserted between two others takes
+    the midpoint of their ordinals; the list is renumbered when two
+    neighbours run out of room. after is the keyset key of the last page
+    added, and complete is set once the last page is in.
+    """
+    
+    def __init__(self):
+        self.store = ItemStore()
+        self.after = None
+        self.complete = False
+        self._order = array('i')       # store position of each row, in list order
+        self._ordinals = array('d')    # ordinal of each row, in list order
+        self._ordinal_at = array('d')  # ordinal by store position; NaN once removed
+    
+    def __len__(self):
+        return len(self._order)
+    
+    def __getitem__(self, index):
+        return self.store.row(self._order[index])
+    
+    def __iter__(self):
+        for position in self._order:
+            yield self.store.row(position)
+    
+    @property
+    def loaded(self):
+        """True once at least one page has been added"""
+        return self.complete or self.after is not None
+    
+    def add_page(self, rows, after, complete):
+        """Append the next keyset page"""
+        ordinal = self._ordinals[-1] if self._ordinals else 0.0
+        for row in rows:
+            ordinal += 1.0
+            self._order.append(self._put(row, ordinal))
+            self._ordinals.append(ordinal)
+        self.after = after
+        self.complete = complete
+    
+    def index(self, item_id):
+        """Return the index of the row for item_id, or None if it is not loaded"""
+        position = self.store.position(item_id)
+        if position is None or math.isnan(self._ordinal_at[position]):
+            return None
+        return bisect.bisect_left(self._ordinals, self._ordinal_at[position])
+    
+    def insert(self, index, row):
+        """Insert a row before index"""
+        before = self._ordinals[index - 1] if index > 0 else None
+        after = self._ordinals[index] if index < len(self._ordinals) else None
+        if before is None:
+            ordinal = after - 1.0 if after is not None else 0.0
+        elif after is None:
+            ordinal = before + 1.0
+        else:
+            ordinal = (before + after) / 2
+            if not before < ordinal < after:
+                self._renumber()
+                return self.insert(index, row)
+        self._order.insert(index, self._put(row, ordinal))
+        self._ordinals.insert(index, ordinal)
+    
+    def remove(self, item_id):
+        """Remove the row for item_id; returns its old index or None"""
+        index = self.index(item_id)
+        if index is not None:
+            self._ordinal_at[self._order[index]] = math.nan
+            del self._order[index]
+            del self._ordinals[index]
+        return index
+    
+    def _put(self, row, ordinal):
+        """Store a row, reusing the slot of an earlier copy; returns its position"""
+        position = self.store.position(row[0])
+        if position is None:
+            self.store.append(row)
+            self._ordinal_at.append(ordinal)
+            return len(self.store) - 1
+        self.store.replace(position, row)
+        self._ordinal_at[position] = ordinal
+        return position
+    
+    def _renumber(self):
+        self._ordinals = array('d', range(len(self._order)))
+        for index, position in enumerate(self._order):
+            self._ordinal_at[position] = float(index)
+
+
+class ItemChangeTracker:
+    """
+    Fetches only the item rows written since the previous poll
+    
+    The high-water mark comes from the server clock and is moved back by
+    change_overlap seconds each time, so a write that committed just after
+    a poll (with an earlier updated_at) is still picked up by the next one.
+    Rows seen twice are harmless because merge() is idempotent.
+    """
+    
+    def __init__(self, overlap=None):
+        if overlap is None:
+            overlap = QUERY_SETTINGS['change_overlap']
+        self.overlap = datetime.timedelta(seconds=overlap)
+        self.mark = None
+    
+    def start(self):
+        """Take a mark before a full load; returns False if that failed"""
+        now = InventoryController.get_server_time()
+        self.mark = now - self.overlap if now is not None else None
+        return self.mark is not None
+    
+    def poll(self, after=None):
+        """
+        Return (changed_rows, deleted_ids), or None if a full reload is needed
+        
+        after is the keyset key of the last loaded row (None when the whole
+        table is loaded); see InventoryController.get_item_changes.
+        """
+        if self.mark is None:
+            return None
+        changes = InventoryController.get_item_changes(self.mark, after)
+        if changes is None:
+            return None
+        server_time, changed, deleted = changes
+        if changed is None:
+            return None
+        self.mark = server_time - self.overlap
+        return changed, deleted
+    
+    @staticmethod
+    def merge(items, changed, deleted):
+        """
+        Patch an ItemList in place and return the edits made
+        
+        changed holds get_item_changes() rows in server order, each placed
+        right after its previous_id, so the list keeps the server's
+        collation. Rows flagged past_page are left for a later page.
+        Returns a list of ('update', index, row), ('insert', index, row) and
+        ('delete', item_id) operations to replay on a view of the list, or
+        None if a row's predecessor is not in the list (reload it then).
+        """
+        operations = []
+        for row in changed:
+            item, previous_id, past_page = tuple(row[:-2]), row[-2], row[-1]
+            old_index = items.remove(item[0])
+            if past_page:
+                if old_index is not None:
+                    operations.append(('delete', item[0]))
+                continue
+            
+            if previous_id is None:
+                index = 0
+            else:
+                index = items.index(previous_id)
+                if index is None:
+                    return None
+                index += 1
+            items.insert(index, item)
+            stored = items[index]
+            if old_index == index:
+                operations.append(('update', index, stored))
+            else:
+                if old_index is not None:
+                    operations.append(('delete', item[0]))
+                operations.append(('insert', index, stored))
+        
+        for item_id in deleted:
+            if items.remove(item_id) is not None:
+                operations.append(('delete', item_id))
+        return operations
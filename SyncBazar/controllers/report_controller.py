@@ -0,0 +1,238 @@
+"""
+Report controller
+"""
+import multiprocessing
+import os
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import REPORT_SETTINGS
+from database.connection import db
+from database.queries import (GET_INVENTORY_REPORT, GET_STOCK_VALUATION_REPORT,
+                              GET_LOW_STOCK_REPORT, COUNT_ITEMS, COUNT_LOW_STOCK_ITEMS,
+                              GET_INVENTORY_REPORT_BY_LOCATION,
+                              GET_STOCK_VALUATION_REPORT_BY_LOCATION,
+                              GET_LOW_STOCK_REPORT_BY_LOCATION, COUNT_ITEMS_BY_LOCATION,
+                              COUNT_LOW_STOCK_ITEMS_BY_LOCATION)
+from database.analytics import stock_status
+from controllers.shop_controller import ShopController
+from utils.reports import write_report, format_for
+
+
+STATUS_LABELS = ("In Stock", "Low Stock", "Out of Stock")
+
+
+def _inventory_row(row):
+    """Add the stock status the inventory list shows"""
+    return tuple(row) + (STATUS_LABELS[stock_status(row[4], row[5])],)
+
+
+Report = namedtuple('Report', ['title', 'query', 'count_query', 'headers', 'formatter',
+                               'shop_query', 'shop_count_query'])
+
+REPORTS = {
+    'inventory': Report(
+        "Inventory Report", GET_INVENTORY_REPORT, COUNT_ITEMS,
+        ("Item ID", "Item Name", "Category", "SKU", "Quantity", "Reorder Level",
+         "Unit Price", "Total Value", "Location", "Supplier", "Created At", "Status"),
+        _inventory_row,
+        GET_INVENTORY_REPORT_BY_LOCATION, COUNT_ITEMS_BY_LOCATION,
+    ),
+    'valuation': Report(
+        "Stock Valuation", GET_STOCK_VALUATION_REPORT, COUNT_ITEMS,
+        ("Item ID", "Item Name", "Category", "Location", "Quantity", "Unit Price",
+         "Total Value"),
+        None,
+        GET_STOCK_VALUATION_REPORT_BY_LOCATION, COUNT_ITEMS_BY_LOCATION,
+    ),
+    'low_stock': Report(
+        "Low Stock Alert", GET_LOW_STOCK_REPORT, COUNT_LOW_STOCK_ITEMS,
+        ("Item ID", "Item Name", "Category", "SKU", "Quantity", "Reorder Level",
+         "Shortfall", "Location", "Supplier"),
+        None,
+        GET_LOW_STOCK_REPORT_BY_LOCATION, COUNT_LOW_STOCK_ITEMS_BY_LOCATION,
+    ),
+}
+
+# Outcome of one batch job; shop is None for the catalog-wide report
+JobResult = namedtuple('JobResult', ['report', 'shop', 'path', 'success', 'rows',
+                                     'seconds', 'message'])
+
+
+class ReportController:
+    """Exports reports by streaming query results straight to a file"""
+    
+    @staticmethod
+    def export(report, path, fmt=None, progress=None, shop=None):
+        """
+        Write a report to path and return (success, message)
+        
+        Rows are streamed from the server in batches of REPORT_SETTINGS
+        batch_size, so memory use does not grow with the catalog.
+        progress(done, total) is called after each batch. With shop, only
+        items stocked at that shop (items.location) are included.
+        """
+        if report not in REPORTS:
+            return False, f"Unknown report: {report}"
+        title = REPORTS[report].title
+        
+        try:
+            rows = ReportController.export_rows(report, path, fmt, progress, shop)
+            return True, f"{title}: {rows:,} rows written to {path}"
+        except Exception as e:
+            print(f"❌ Report export failed: {e}")
+            return False, f"Failed to export {title.lower()}: {e}"
+    
+    @staticmethod
+    def export_rows(report, path, fmt=None, progress=None, shop=None):
+        """Like export(), but returns the row count and raises on failure"""
+        definition = REPORTS[report]
+        if shop is None:
+            query, count_query, params = definition.query, definition.count_query, None
+        else:
+            query, count_query = definition.shop_query, definition.shop_count_query
+            params = (shop,)
+        
+        count = db.fetch_one(count_query, params)
+        return write_report(
+            path, definition.headers,
+            db.fetch_iter(query, params, batch_size=REPORT_SETTINGS['batch_size'],
+                          raise_errors=True),
+            fmt=fmt or format_for(path), formatter=definition.formatter,
+            title=definition.title, total=count[0] if count else None, progress=progress)
+    
+    @staticmethod
+    def default_path(report, fmt='csv', folder=None, stamp=None):
+        """Return e.g. reports/inventory_20240131.csv"""
+        folder = folder or REPORT_SETTINGS['output_dir']
+        name = f"{report}_{stamp}.{fmt}" if stamp else f"{report}.{fmt}"
+        return os.path.join(folder, name)
+    
+    @staticmethod
+    def batch_jobs(folder, shops, fmt='csv', reports=None):
+        """
+        Return [(report, shop_name, path)] for a month-end batch
+        
+        Every report is produced once for the whole catalog (in folder/all)
+        and once per shop (in folder/<shop_id>_<shop name>). Items have no
+        shop id: an item belongs to a shop when its free-text location is
+        exactly the shop's name.
+        """
+        reports = reports or list(REPORTS)
+        targets = [(None, 'all')]
+        for shop in shops:
+            shop_id, name = shop[0], shop[1]
+            slug = re.sub(r'[^\w-]+', '_', name or '').strip('_')
+            targets.append((name, f"{shop_id}_{slug}" if slug else str(shop_id)))
+        return [(report, shop, os.path.join(folder, subfolder, f"{report}.{fmt}"))
+                for shop, subfolder in targets for report in reports]
+    
+    @staticmethod
+    def run_batch(folder, fmt='csv', workers=None, shops=None, progress=None):
+        """
+        Generate every report for every shop in parallel processes
+        
+        Jobs are fanned out over a ProcessPoolExecutor with one worker per
+        core (or workers); each worker opens its own database connection.
+        progress(done, total) is called as jobs finish. Returns a summary
+        dict with the JobResult of every job and the overall timings, which
+        is also written to folder/summary.txt. summary['unmatched'] lists
+        the shops no item's location matched, whose reports are all empty.
+        """
+        if shops is None:
+            shops = ShopController.get_all_shops()
+        jobs = ReportController.batch_jobs(folder, shops, fmt)
+        for path in {os.path.dirname(path) for _, _, path in jobs}:
+            os.makedirs(path, exist_ok=True)
+        
+        workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+        started = time.perf_counter()
+        results = []
+        futures = []
+        # spawn, not fork: a forked worker would share the parent's ODBC socket
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   mp_context=multiprocessing.get_context('spawn'))
+        try:
+            futures = [pool.submit(_run_job, report, shop, path, fmt)
+                       for report, shop, path in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if progress is not None:
+                    progress(len(results), len(jobs))
+        finally:
+            # Drops queued jobs if we stopped early (e.g. cancelled from the GUI)
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+        
+        order = {job[2]: index for index, job in enumerate(jobs)}
+        results.sort(key=lambda result: order[result.path])
+        summary = {
+            'folder': folder,
+            'workers': workers,
+            'elapsed': time.perf_counter() - started,
+            'job_seconds': sum(result.seconds for result in results),
+            'failed': sum(1 for result in results if not result.success),
+            'unmatched': ReportController.unmatched_shops(results),
+            'jobs': results,
+        }
+        for shop in summary['unmatched']:
+            print(f"⚠️ No items have location '{shop}'; its shop reports are empty")
+        with open(os.path.join(folder, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write(ReportController.format_summary(summary) + "\n")
+        return summary
+    
+    @staticmethod
+    def unmatched_shops(results):
+        """Return the shops whose batch jobs all succeeded with no rows"""
+        shops = {}
+        for result in results:
+            if result.shop is not None:
+                empty = result.success and result.rows == 0
+                shops[result.shop] = shops.get(result.shop, True) and empty
+        return [shop for shop, empty in shops.items() if empty]
+    
+    @staticmethod
+    def format_summary(summary):
+        """Return a plain-text timing summary of a batch"""
+        lines = [f"{'Report':<12} {'Shop':<24} {'Rows':>9} {'Seconds':>8}  Status"]
+        for result in summary['jobs']:
+            lines.append(f"{result.report:<12} {(result.shop or 'All shops')[:24]:<24} "
+                         f"{result.rows:>9,} {result.seconds:>8.2f}  "
+                         f"{'OK' if result.success else result.message}")
+        speedup = summary['job_seconds'] / summary['elapsed'] if summary['elapsed'] else 0
+        lines.append(
+            f"{len(summary['jobs'])} reports ({summary['failed']} failed) in "
+            f"{summary['elapsed']:.2f}s on {summary['workers']} workers "
+            f"({summary['job_seconds']:.2f}s of report time, {speedup:.1f}x)")
+        for shop in summary.get('unmatched', ()):
+            lines.append(f"⚠️ No items have location '{shop}' (items are matched to shops "
+                         f"by name); its reports are empty")
+        return "\n".join(lines)
+
+
+# Set in a batch worker whose database connection failed at start-up
+_worker_error = None
+
+
+def _init_worker():
+    """Batch worker start-up: hold one dedicated connection for this process"""
+    global _worker_error
+    db.pooled = False
+    db.cache = None
+    if not db.connect():
+        # Every job sent to this worker then fails with this message
+        _worker_error = f"Batch worker {os.getpid()} could not connect to the database"
+
+
+def _run_job(report, shop, path, fmt):
+    """Batch worker: export one report and time it"""
+    if _worker_error is not None:
+        return JobResult(report, shop, path, False, 0, 0.0, _worker_error)
+    started = time.perf_counter()
+    try:
+        rows = ReportController.export_rows(report, path, fmt, shop=shop)
+        return JobResult(report, shop, path, True, rows, time.perf_counter() - started, "")
+    except Exception as e:
+        return JobResult(report, shop, path, False, 0, time.perf_counter() - started, str(e))
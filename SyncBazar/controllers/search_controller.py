@@ -0,0 +1,181 @@
+"""
+Search controller
+"""
+import threading
+import time
+from config import SEARCH_SETTINGS
+from database.connection import db
+from database.queries import SEARCH_ITEMS, GET_SEARCH_SNAPSHOT
+from database.search_index import TrigramIndex, has_wildcards, row_matches
+
+
+class SearchController:
+    """
+    Handles item search for Inventory and Network Search
+    
+    Searches are answered from a process-wide trigram index built from one
+    item snapshot. Until the first build finishes (and for terms containing
+    LIKE wildcards) the search goes to the server as before. The inventory
+    controller reports each item change so the index stays current without
+    a rebuild; a background rebuild every index_max_age seconds picks up
+    changes made from other terminals.
+    """
+    
+    _index = None
+    _built_at = 0.0
+    _building = False
+    _failed_at = None
+    _pending = None
+    # Bumped by invalidate(); a build that started before it is discarded
+    _generation = 0
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def search_items(term):
+        """Search items by name, category, SKU or supplier"""
+        index = SearchController.get_index()
+        if index is None or has_wildcards(term):
+            return SearchController.search_server(term)
+        return index.search(term)
+    
+    @staticmethod
+    def search_server(term):
+        """Run SEARCH_ITEMS on the server"""
+        pattern = f'%{term}%'
+        return db.fetch_all(SEARCH_ITEMS, (pattern, pattern, pattern, pattern))
+    
+    @classmethod
+    def get_index(cls):
+        """Return the index if it is ready, starting a (re)build when needed"""
+        if not SEARCH_SETTINGS['use_index']:
+            return None
+        
+        with cls._lock:
+            index = cls._index
+            now = time.monotonic()
+            expired = now - cls._built_at > SEARCH_SETTINGS['index_max_age']
+            # After a failed build wait a little before hitting the server again
+            backoff = cls._failed_at is not None and now - cls._failed_at < 30
+            if (index is None or expired) and not cls._building and not backoff:
+                cls._building = True
+                cls._pending = []
+                threading.Thread(target=cls._build, args=(cls._generation,),
+                                 name='search-index', daemon=True).start()
+        return index
+    
+    @classmethod
+    def item_saved(cls, row):
+        """Add or replace an item (a SEARCH_ITEMS-shaped row) in the index"""
+        cls._apply('upsert', row)
+    
+    @classmethod
+    def item_deleted(cls, item_id):
+        """Remove an item from the index"""
+        cls._apply('remove', item_id)
+    
+    @classmethod
+    def invalidate(cls):
+        """Forget the index after changes that cannot be applied one by one"""
+        with cls._lock:
+            cls._index = None
+            cls._built_at = 0.0
+            cls._generation += 1
+    
+    @classmethod
+    def _apply(cls, action, value):
+        with cls._lock:
+            index = cls._index
+            if cls._pending is not None:
+                # Replayed onto the index that is being built
+                cls._pending.append((action, value))
+        if index is not None:
+            getattr(index, action)(value)
+    
+    @classmethod
+    def _build(cls, generation):
+        """
+        Build a fresh index from the item snapshot (background thread)
+        
+        If invalidate() ran meanwhile the snapshot may predate the change,
+        so the result is dropped and the next search starts another build.
+        """
+        started = time.monotonic()
+        index = TrigramIndex()
+        try:
+            for batch in db.fetch_iter(GET_SEARCH_SNAPSHOT, raise_errors=True):
+                index.add_rows(batch)
+        except Exception as e:
+            print(f"❌ Search index build failed: {e}")
+            index = None
+        
+        with cls._lock:
+            if index is None:
+                cls._failed_at = time.monotonic()
+            elif generation == cls._generation:
+                for action, value in cls._pending:
+                    getattr(index, action)(value)
+                cls._index = index
+                cls._built_at = started
+                cls._failed_at = None
+            cls._pending = None
+            cls._building = False
+
+
+class IncrementalSearch:
+    """
+    One search-as-you-type session
+    
+    When the new term contains the previous term, every match of the new
+    term is already in the previous results, so they are filtered locally
+    instead of searching again. Typing a SKU one character at a time
+    therefore costs one real search rather than one per keystroke. Result
+    sets older than refine_max_age seconds are not reused, and reset()
+    drops them after the items change.
+    """
+    
+    def __init__(self, search=None, max_age=None, clock=time.monotonic):
+        self.search_func = search or SearchController.search_items
+        self.max_age = SEARCH_SETTINGS['refine_max_age'] if max_age is None else max_age
+        self.clock = clock
+        self.searches = 0
+        self._term = None
+        self._results = None
+        self._fetched_at = None
+        self._lock = threading.Lock()
+    
+    def search(self, term):
+        """Return the rows matching term, narrowing the last results if possible"""
+        refined = self.refine(term)
+        if refined is not None:
+            return refined
+        
+        fetched_at = self.clock()
+        results = self.search_func(term)
+        self.searches += 1
+        self._remember(term, results, fetched_at)
+        return results
+    
+    def refine(self, term):
+        """Filter the previous results for term, or return None if they cannot be used"""
+        with self._lock:
+            previous, results, fetched_at = self._term, self._results, self._fetched_at
+        if previous is None or self.clock() - fetched_at > self.max_age:
+            return None
+        if has_wildcards(term) or has_wildcards(previous):
+            return None
+        
+        needle = term.lower()
+        if previous.lower() not in needle:
+            return None
+        refined = [row for row in results if row_matches(row, needle)]
+        self._remember(term, refined, fetched_at)
+        return refined
+    
+    def reset(self):
+        """Forget the previous results (e.g. after items were written)"""
+        with self._lock:
+            self._term = self._results = self._fetched_at = None
+    
+    def _remember(self, term, results, fetched_at):
+        with self._lock:
+            self._term, self._results, self._fetched_at = term, results, fetched_at
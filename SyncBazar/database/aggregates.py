@@ -0,0 +1,125 @@
+"""
+Incrementally maintained dashboard aggregates for SyncBazar
+
+GET_DASHBOARD_STATS scans the items table four times. The store keeps the
+same five numbers in memory and moves them by a small delta whenever an
+item or shop is written through a controller, so reading them costs
+nothing however large the catalog gets. A full recompute from the server
+replaces the numbers now and then to correct any drift (e.g. writes from
+other terminals); the deltas applied while it ran are replayed on top, so
+a steady stream of writes cannot keep it from landing.
+"""
+import threading
+import time
+from collections import deque
+
+
+# Positions in a stats tuple, same order as GET_DASHBOARD_STATS
+TOTAL_ITEMS, TOTAL_SHOPS, TOTAL_VALUE, LOW_STOCK, OUT_OF_STOCK = range(5)
+
+
+def item_contribution(quantity, reorder_level, unit_price):
+    """Return what one item adds to (items, shops, value, low_stock, out_of_stock)"""
+    quantity = int(quantity or 0)
+    reorder_level = int(reorder_level or 0)
+    low_stock = 1 if 0 < quantity < reorder_level else 0
+    out_of_stock = 1 if quantity == 0 else 0
+    return (1, 0, quantity * float(unit_price or 0), low_stock, out_of_stock)
+
+
+class AggregateStore:
+    """Thread-safe dashboard totals kept current by deltas"""
+    
+    # Deltas remembered for replay onto a recompute that was running
+    MAX_REPLAY = 10000
+    
+    def __init__(self, clock=time.monotonic, max_replay=MAX_REPLAY):
+        self.clock = clock
+        self._totals = None
+        self._loaded_at = None
+        self._generation = 0
+        self._invalidated = 0  # generation of the last invalidate()
+        self._recent = deque(maxlen=max_replay)  # (generation, delta)
+        self._lock = threading.Lock()
+    
+    def snapshot(self):
+        """Return the stats tuple, or None until the first load()"""
+        with self._lock:
+            if self._totals is None:
+                return None
+            return tuple(self._totals)
+    
+    def age(self):
+        """Seconds since the last full load (None if never loaded)"""
+        with self._lock:
+            if self._loaded_at is None:
+                return None
+            return self.clock() - self._loaded_at
+    
+    def generation(self):
+        """Token to take before a recompute and pass to load() with its result"""
+        with self._lock:
+            return self._generation
+    
+    def load(self, stats, generation=None):
+        """
+        Replace the totals with a full recompute (a GET_DASHBOARD_STATS row).
+        
+        Deltas applied since ``generation`` was taken are replayed on top of
+        it. A write that committed just before the query read the table but
+        reported its delta after the token is counted twice until the next
+        recompute. The recompute is discarded (False) only if invalidate()
+        ran meanwhile or more than max_replay deltas arrived.
+        """
+        with self._lock:
+            totals = [int(stats[TOTAL_ITEMS] or 0), int(stats[TOTAL_SHOPS] or 0),
+                      float(stats[TOTAL_VALUE] or 0), int(stats[LOW_STOCK] or 0),
+                      int(stats[OUT_OF_STOCK] or 0)]
+            if generation is not None and generation != self._generation:
+                if self._invalidated > generation:
+                    return False
+                replay = [delta for applied, delta in self._recent if applied > generation]
+                if len(replay) < self._generation - generation:
+                    return False
+                for delta in replay:
+                    for i, value in enumerate(delta):
+                        totals[i] += value
+            self._totals = totals
+            self._loaded_at = self.clock()
+            return True
+    
+    def apply_item(self, old=None, new=None):
+        """
+        Move the totals for one item write.
+        
+        old and new are (quantity, reorder_level, unit_price) before and
+        after the write; old is None for an insert, new is None for a delete.
+        """
+        delta = [0, 0, 0.0, 0, 0]
+        if old is not None:
+            for i, value in enumerate(item_contribution(*old)):
+                delta[i] -= value
+        if new is not None:
+            for i, value in enumerate(item_contribution(*new)):
+                delta[i] += value
+        self._apply(delta)
+    
+    def apply_shops(self, count):
+        """Move the shop total by count (negative for deletes)"""
+        self._apply([0, count, 0.0, 0, 0])
+    
+    def invalidate(self):
+        """Forget the totals after a change that cannot be applied as a delta"""
+        with self._lock:
+            self._totals = None
+            self._loaded_at = None
+            self._generation += 1
+            self._invalidated = self._generation
+    
+    def _apply(self, delta):
+        with self._lock:
+            self._generation += 1
+            self._recent.append((self._generation, delta))
+            if self._totals is not None:
+                for i, value in enumerate(delta):
+                    self._totals[i] += value
@@ -0,0 +1,99 @@
+"""
+Low-stock alert state for SyncBazar
+
+StockLevels remembers the stock status of every item that is below its
+reorder level. Feeding it the rows written since the last check (and the
+ids deleted) returns one StockAlert per item whose status actually moved,
+so the watcher never has to rescan the table: the first load reads only
+the low-stock items, through the is_low_stock index, and every later pass
+reads only the changed rows. Items it has no entry for are in stock.
+"""
+from collections import namedtuple
+from database.analytics import stock_status, IN_STOCK, LOW_STOCK, OUT_OF_STOCK
+
+
+# A status change for one item; level is IN_STOCK once an alert clears
+StockAlert = namedtuple('StockAlert', ['item_id', 'item_name', 'location', 'quantity',
+                                       'reorder_level', 'level', 'previous'])
+
+LEVEL_LABELS = {IN_STOCK: "In Stock", LOW_STOCK: "Low Stock", OUT_OF_STOCK: "Out of Stock"}
+
+
+def describe_alert(alert):
+    """One-line text for an alert, e.g. for the dashboard"""
+    where = f" ({alert.location})" if alert.location else ""
+    if alert.level == OUT_OF_STOCK:
+        return f"{alert.item_name}{where}: out of stock"
+    if alert.level == LOW_STOCK:
+        return (f"{alert.item_name}{where}: {alert.quantity} left, "
+                f"reorder level {alert.reorder_level}")
+    return f"{alert.item_name}{where}: back in stock"
+
+
+class StockLevels:
+    """
+    Last known status of every low or out-of-stock item
+    
+    Rows are (item_id, item_name, location, quantity, reorder_level), the
+    shape of GET_LOW_STOCK_LEVELS and GET_STOCK_LEVELS_CHANGED_SINCE.
+    """
+    
+    def __init__(self, rows=()):
+        self._alerts = {}
+        self.load(rows)
+    
+    def __len__(self):
+        return len(self._alerts)
+    
+    def __contains__(self, item_id):
+        return item_id in self._alerts
+    
+    def load(self, rows):
+        """Replace the state with the full list of low-stock rows"""
+        self._alerts = {}
+        for row in rows:
+            alert = self._alert(row, IN_STOCK)
+            if alert.level != IN_STOCK:
+                self._alerts[alert.item_id] = alert
+    
+    def level(self, item_id):
+        """Return the item's status code (IN_STOCK if not tracked)"""
+        alert = self._alerts.get(item_id)
+        return alert.level if alert is not None else IN_STOCK
+    
+    def alerts(self):
+        """Return the current alert of every tracked item"""
+        return list(self._alerts.values())
+    
+    def update(self, rows, deleted=()):
+        """
+        Apply changed rows and deleted ids; return the StockAlerts raised
+        
+        Rows whose status did not change (e.g. re-read because of the
+        change-tracking overlap, or a price edit) produce nothing. A deleted
+        item that had an alert produces a cleared (IN_STOCK) alert.
+        """
+        changed = []
+        for row in rows:
+            alert = self._alert(row, self.level(row[0]))
+            if alert.level == alert.previous:
+                if alert.level != IN_STOCK:
+                    self._alerts[alert.item_id] = alert
+                continue
+            if alert.level == IN_STOCK:
+                del self._alerts[alert.item_id]
+            else:
+                self._alerts[alert.item_id] = alert
+            changed.append(alert)
+        
+        for item_id in deleted:
+            alert = self._alerts.pop(item_id, None)
+            if alert is not None:
+                changed.append(alert._replace(level=IN_STOCK, previous=alert.level))
+        return changed
+    
+    @staticmethod
+    def _alert(row, previous):
+        item_id, item_name, location, quantity, reorder_level = row[:5]
+        return StockAlert(item_id, item_name, location, quantity, reorder_level,
+                          stock_status(quantity or 0, reorder_level or 0), previous)
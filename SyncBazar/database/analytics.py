@@ -0,0 +1,188 @@
+"""
+Inventory analytics for the Analysis window
+
+InventoryAnalytics loads an ItemStore's columns into NumPy arrays and
+answers every figure of the inventory analysis -- totals, stock status,
+value per category/location/supplier and the top items by value -- with
+vectorized operations, so the work per item is a few machine instructions
+instead of a Python loop iteration.
+
+analyze_rows() is the plain streaming implementation, used when NumPy is
+not installed and as the reference in tests and benchmarks. Both return an
+InventoryAnalysis with the same contents.
+
+NumPy is imported on first use (load_numpy), not with this module: the
+stock status helpers here are needed at start-up, NumPy is not.
+"""
+import heapq
+from collections import namedtuple
+
+# Set by load_numpy(); stays None if NumPy is not installed
+np = None
+_numpy_loaded = False
+
+
+def load_numpy():
+    """Import NumPy if it has not been yet; returns the module or None"""
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:  # optional; analyze_rows() is used instead
+            pass
+        _numpy_loaded = True
+    return np
+
+
+# Stock status codes, in the order the window lists them
+IN_STOCK, LOW_STOCK, OUT_OF_STOCK = 0, 1, 2
+
+# Item columns that can be grouped on
+GROUP_COLUMNS = ('category', 'location', 'supplier')
+
+InventoryAnalysis = namedtuple('InventoryAnalysis', [
+    'total_items', 'total_quantity', 'total_value',
+    'in_stock', 'low_stock', 'out_of_stock',
+    'top_items',    # [(value, item_id, name, quantity)], most valuable first
+    'groups',       # {column: [(label, items, quantity, value)]}, by value descending
+])
+
+
+def stock_status(quantity, reorder_level):
+    """
+    Status code for one item, as the inventory list classifies it
+    
+    GET_LOW_STOCK_LEVELS selects exactly the items this does not call
+    IN_STOCK; keep the two in step.
+    """
+    if quantity == 0:
+        return OUT_OF_STOCK
+    if quantity < reorder_level:
+        return LOW_STOCK
+    return IN_STOCK
+
+
+def analyze_rows(batches, top=5):
+    """Compute an InventoryAnalysis from GET_ALL_ITEMS row batches in one pass"""
+    total_items = total_quantity = 0
+    total_value = 0.0
+    statuses = [0, 0, 0]
+    top_items = []  # min-heap of (value, item_id, name, quantity)
+    groups = {column: {} for column in GROUP_COLUMNS}
+    
+    for batch in batches:
+        for item in batch:
+            item_id, name, category, sku, quantity, reorder_level, price, location, supplier, created_at = item
+            item_value = quantity * float(price)
+            
+            total_items += 1
+            total_quantity += quantity
+            total_value += item_value
+            statuses[stock_status(quantity, reorder_level)] += 1
+            
+            for column, label in zip(GROUP_COLUMNS, (category, location, supplier)):
+                entry = groups[column].setdefault(label, [0, 0, 0.0])
+                entry[0] += 1
+                entry[1] += quantity
+                entry[2] += item_value
+            
+            entry = (item_value, item_id, name, quantity)
+            if len(top_items) < top:
+                heapq.heappush(top_items, entry)
+            elif entry > top_items[0]:
+                heapq.heapreplace(top_items, entry)
+    
+    return InventoryAnalysis(
+        total_items, total_quantity, total_value,
+        statuses[IN_STOCK], statuses[LOW_STOCK], statuses[OUT_OF_STOCK],
+        sorted(top_items, reverse=True),
+        {column: order_groups((label,) + tuple(entry) for label, entry in totals.items())
+         for column, totals in groups.items()},
+    )
+
+
+def order_groups(groups):
+    """Order (label, items, quantity, value) groups by value, largest first"""
+    return sorted(groups, key=lambda group: (-group[3], str(group[0])))
+
+
+class InventoryAnalytics:
+    """
+    Vectorized analysis over an item snapshot
+    
+    Built from an ItemStore: the numeric columns are copied into NumPy
+    arrays once, and the interned category/location/supplier codes are
+    used directly as group keys for bincount.
+    """
+    
+    def __init__(self, store):
+        if load_numpy() is None:
+            raise ImportError("InventoryAnalytics requires numpy")
+        self.store = store
+        self.item_ids = np.array(store.item_ids, dtype=np.int64)
+        self.quantities = np.array(store.quantities, dtype=np.int64)
+        self.reorder_levels = np.array(store.reorder_levels, dtype=np.int64)
+        self.values = self.quantities * np.array(store.unit_prices, dtype=np.float64)
+        
+        self.statuses = np.full(len(self.item_ids), IN_STOCK, dtype=np.int8)
+        self.statuses[self.quantities < self.reorder_levels] = LOW_STOCK
+        self.statuses[self.quantities == 0] = OUT_OF_STOCK
+        
+        self.codes = {
+            'category': (np.array(store.categories, dtype=np.intp), store.category_pool),
+            'location': (np.array(store.locations, dtype=np.intp), store.location_pool),
+            'supplier': (np.array(store.suppliers, dtype=np.intp), store.supplier_pool),
+        }
+    
+    def __len__(self):
+        return len(self.item_ids)
+    
+    def totals(self):
+        """Return (items, total_quantity, total_value)"""
+        return len(self), int(self.quantities.sum()), float(self.values.sum())
+    
+    def status_counts(self):
+        """Return (in_stock, low_stock, out_of_stock)"""
+        counts = np.bincount(self.statuses, minlength=3)
+        return int(counts[IN_STOCK]), int(counts[LOW_STOCK]), int(counts[OUT_OF_STOCK])
+    
+    def group_by(self, column):
+        """Return [(label, items, quantity, value)] per distinct value of column"""
+        codes, pool = self.codes[column]
+        size = len(pool)
+        counts = np.bincount(codes, minlength=size)
+        quantities = np.bincount(codes, weights=self.quantities, minlength=size)
+        values = np.bincount(codes, weights=self.values, minlength=size)
+        present = np.flatnonzero(counts)
+        return order_groups((pool.values[code], int(counts[code]), int(quantities[code]),
+                             float(values[code])) for code in present)
+    
+    def top_items(self, k=5):
+        """Return the k most valuable items as [(value, item_id, name, quantity)]"""
+        count = len(self)
+        if count == 0 or k <= 0:
+            return []
+        if count > k:
+            # O(n) selection of the k largest, then an exact order over them
+            # and anything tied with the k-th, largest item_id first on ties
+            cutoff = self.values[np.argpartition(self.values, count - k)[count - k]]
+            candidates = np.flatnonzero(self.values >= cutoff)
+        else:
+            candidates = np.arange(count)
+        order = np.lexsort((self.item_ids[candidates], self.values[candidates]))[::-1][:k]
+        
+        return [(float(self.values[index]), int(self.item_ids[index]),
+                 self.store.names[index], int(self.quantities[index]))
+                for index in candidates[order]]
+    
+    def analyze(self, top=5):
+        """Return the full InventoryAnalysis"""
+        total_items, total_quantity, total_value = self.totals()
+        in_stock, low_stock, out_of_stock = self.status_counts()
+        return InventoryAnalysis(
+            total_items, total_quantity, total_value,
+            in_stock, low_stock, out_of_stock,
+            self.top_items(top),
+            {column: self.group_by(column) for column in GROUP_COLUMNS},
+        )
@@ -0,0 +1,191 @@
+"""
+Query result cache for SyncBazar
+
+Results are keyed by (query, params), expire after a per-query TTL and are
+evicted least-recently-used once the row budget is exceeded. Every entry is
+tagged with the tables its query reads, so a write to a table drops exactly
+the cached reads that depend on it.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from database.queries import (GET_DASHBOARD_STATS, GET_ALL_SHOPS, GET_ALL_ITEMS, GET_ITEM_TOTALS,
+                              GET_INVENTORY_SUMMARY, GET_VALUE_BY_CATEGORY, GET_VALUE_BY_LOCATION,
+                              GET_VALUE_BY_SUPPLIER, GET_TOP_VALUE_ITEMS, GET_CHANGE_MARKER)
+
+
+# Seconds each cached read stays fresh; other queries use the default TTL
+QUERY_TTLS = {
+    GET_DASHBOARD_STATS: 15,
+    GET_ALL_SHOPS: 300,
+    GET_ALL_ITEMS: 60,
+    GET_ITEM_TOTALS: 60,
+    GET_INVENTORY_SUMMARY: 60,
+    GET_VALUE_BY_CATEGORY: 60,
+    GET_VALUE_BY_LOCATION: 60,
+    GET_VALUE_BY_SUPPLIER: 60,
+    GET_TOP_VALUE_ITEMS: 60,
+    GET_CHANGE_MARKER: 5,
+}
+
+_READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+([\w\[\]\.#]+)', re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r'\b(?:INSERT\s+INTO|DELETE\s+FROM|UPDATE|MERGE\s+INTO|TRUNCATE\s+TABLE)\s+([\w\[\]\.#]+)',
+    re.IGNORECASE
+)
+_SCHEMA_CHANGE = re.compile(r'\b(?:CREATE|ALTER|DROP)\s+(?:TABLE|INDEX|VIEW)\b', re.IGNORECASE)
+
+
+def _table_name(name):
+    """Normalize [dbo].[items] style names to 'items'"""
+    return name.replace('[', '').replace(']', '').split('.')[-1].lower()
+
+
+@lru_cache(maxsize=512)
+def tables_read(query):
+    """Return the set of tables a query reads from"""
+    return frozenset(_table_name(name) for name in _READ_TABLES.findall(query))
+
+
+@lru_cache(maxsize=512)
+def tables_written(query):
+    """
+    Return the set of tables a statement writes to.
+    
+    Returns None for schema changes, meaning every cached read is suspect.
+    """
+    if _SCHEMA_CHANGE.search(query):
+        return None
+    return frozenset(_table_name(name) for name in _WRITE_TABLES.findall(query))
+
+
+class QueryCache:
+    """Thread-safe TTL + LRU cache of query results with table invalidation"""
+    
+    def __init__(self, max_rows=50000, default_ttl=30, ttls=None, clock=time.monotonic):
+        self.max_rows = max_rows
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.clock = clock
+        
+        # key -> (expires_at, weight, tables, value), least recently used first
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._generations = {}
+        self._epoch = 0
+        self._rows = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(query, params=None):
+        """Build the cache key for a query and its parameters"""
+        return query, tuple(params) if params else ()
+    
+    def get(self, query, params=None):
+        """Return (True, value) on a fresh hit, otherwise (False, None)"""
+        key = self.make_key(query, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[3]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+    
+    def generation(self, query):
+        """
+        Snapshot the write generation of the tables a query reads.
+        
+        Take it before running the query and pass it to put(); if a write
+        lands in between, the now-stale result is not cached.
+        """
+        with self._lock:
+            return self._generation(tables_read(query))
+    
+    def put(self, query, params, value, generation=None):
+        """Cache a query result (lists are weighted by their row count)"""
+        weight = len(value) if isinstance(value, list) else 1
+        if weight > self.max_rows:
+            return
+        ttl = self.ttls.get(query, self.default_ttl)
+        tables = tables_read(query)
+        key = self.make_key(query, params)
+        
+        with self._lock:
+            if generation is not None and generation != self._generation(tables):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + ttl, weight, tables, value)
+            self._rows += weight
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while self._rows > self.max_rows:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def invalidate_query(self, query):
+        """Drop cached reads affected by a write statement"""
+        tables = tables_written(query)
+        if tables is None:
+            self.clear()
+        elif tables:
+            self.invalidate_tables(tables)
+    
+    def invalidate_tables(self, tables):
+        """Drop every cached read that touches any of the given tables"""
+        with self._lock:
+            for table in tables:
+                table = _table_name(table)
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+    
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_table.clear()
+            self._rows = 0
+    
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'rows': self._rows,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+    
+    def _generation(self, tables):
+        """Current write generation for a set of tables (lock held)"""
+        return self._epoch, tuple(self._generations.get(t, 0) for t in sorted(tables))
+    
+    def _remove(self, key):
+        """Remove one entry and its table tags (lock held)"""
+        _, weight, tables, _ = self._entries.pop(key)
+        self._rows -= weight
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
@@ -1,14 +1,27 @@
 """
 Database connection module for SQL Server
 """
-import pyodbc
-from config import DB_CONFIG
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from config import DB_CONFIG, POOL_SETTINGS, QUERY_SETTINGS, CACHE_SETTINGS
+if DB_CONFIG.get('backend') == 'fake':
+    from database import fake_odbc as pyodbc
+else:
+    import pyodbc
+from database.cache import QueryCache, QUERY_TTLS
+from database import schema
+from database.pool import ConnectionPool, PoolError
+
+
+# What execute_query() hands back once the connection has been returned
+QueryResult = namedtuple('QueryResult', ['rowcount', 'rows'])
 
 
 class DatabaseConnection:
     """Handles SQL Server database connection"""
     
-    def __init__(self):
+    def __init__(self, pooled=None):
         self.server = DB_CONFIG['server']
         self.database = DB_CONFIG['database']
         self.username = DB_CONFIG['username']
@@ -16,68 +29,383 @@ class DatabaseConnection:
         self.driver = DB_CONFIG['driver']
         self.trusted_connection = DB_CONFIG.get('trusted_connection', 'yes')
         self.conn = None
+        self.pool = None
+        self.pooled = POOL_SETTINGS['enabled'] if pooled is None else pooled
+        # Serializes access to the single shared connection when not pooled
+        self._lock = threading.RLock()
+        # Per-thread connection pinned by an open transaction() block
+        self._local = threading.local()
+        self.cache = QueryCache(
+            max_rows=CACHE_SETTINGS['max_rows'],
+            default_ttl=CACHE_SETTINGS['default_ttl'],
+            ttls=QUERY_TTLS
+        ) if CACHE_SETTINGS['enabled'] else None
+    
+    def build_connection_string(self):
+        """Build the ODBC connection string from DB_CONFIG"""
+        if self.trusted_connection.lower() == 'yes':
+            return (
+                f'DRIVER={{{self.driver}}};'
+                f'SERVER={self.server};'
+                f'DATABASE={self.database};'
+                f'Trusted_Connection=yes;'
+            )
+        return (
+            f'DRIVER={{{self.driver}}};'
+            f'SERVER={self.server};'
+            f'DATABASE={self.database};'
+            f'UID={self.username};'
+            f'PWD={self.password}'
+        )
+    
+    def open_connection(self):
+        """Open a new raw connection (used directly and as the pool factory)"""
+        conn = pyodbc.connect(self.build_connection_string())
+        conn.autocommit = True
+        return conn
     
     def connect(self):
         """Establish connection to SQL Server"""
         try:
-            if self.trusted_connection.lower() == 'yes':
-                conn_str = (
-                    f'DRIVER={{{self.driver}}};'
-                    f'SERVER={self.server};'
-                    f'DATABASE={self.database};'
-                    f'Trusted_Connection=yes;'
+            if self.pooled:
+                self.pool = ConnectionPool(
+                    self.open_connection,
+                    size=POOL_SETTINGS['size'],
+                    idle_timeout=POOL_SETTINGS['idle_timeout'],
+                    checkout_timeout=POOL_SETTINGS['checkout_timeout'],
+                    ping_after_idle=POOL_SETTINGS['ping_after_idle']
                 )
+                # Open one connection up front so a bad config fails here
+                self.pool.warm(1)
             else:
-                conn_str = (
-                    f'DRIVER={{{self.driver}}};'
-                    f'SERVER={self.server};'
-                    f'DATABASE={self.database};'
-                    f'UID={self.username};'
-                    f'PWD={self.password}'
-                )
-            
-            self.conn = pyodbc.connect(conn_str)
-            self.conn.autocommit = True
+                self.conn = self.open_connection()
             print("✅ Database connected successfully")
             return True
-        except pyodbc.Error as e:
+        except (pyodbc.Error, PoolError) as e:
             print(f"❌ Database connection failed: {e}")
             return False
     
+    def warm(self, count):
+        """Open up to count pooled connections ahead of first use"""
+        if self.pool is not None:
+            self.pool.warm(count)
+    
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with-block.
+        
+        In pooled mode this checks a connection out of the pool; otherwise
+        it locks the single shared connection so threads take turns on it.
+        """
+        pinned = getattr(self._local, 'conn', None)
+        if pinned is not None:
+            yield pinned
+        elif self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            with self._lock:
+                yield self.conn
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Run the statements of a with-block as one unit of work.
+        
+        Autocommit is turned off for the block and a single commit is issued
+        at the end; any exception rolls everything back and is re-raised.
+        Inside the block query errors are raised instead of being swallowed,
+        so a failed statement aborts the transaction. Nested blocks join the
+        outer transaction.
+        """
+        if self.in_transaction():
+            yield
+            return
+        
+        with self.connection() as conn:
+            conn.autocommit = False
+            self._local.conn = conn
+            self._local.writes = set()
+            try:
+                yield
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                writes = self._local.writes
+                self._local.conn = None
+                self._local.writes = None
+                conn.autocommit = True
+                # Invalidate again once the writes are visible to other threads
+                for query in writes:
+                    self._invalidate(query)
+    
+    @contextmanager
+    def streaming_connection(self):
+        """
+        Borrow a connection for fetch_iter() to keep while its results are read.
+        
+        Without a pool the shared connection would stay locked and busy with
+        pending results for the whole stream, so a query made between batches
+        (on this thread or another) could not run on it. A dedicated
+        connection is opened instead and closed when the stream ends. Inside
+        transaction() the pinned connection is used as before.
+        """
+        if self.in_transaction() or self.pool is not None or self.conn is None:
+            with self.connection() as conn:
+                yield conn
+            return
+        conn = self.open_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def in_transaction(self):
+        """Return True if the current thread is inside transaction()"""
+        return getattr(self._local, 'conn', None) is not None
+    
     def execute_query(self, query, params=None):
-        """Execute SQL query"""
+        """
+        Execute SQL query
+        
+        Returns a QueryResult (rowcount and any rows) read before the
+        connection is released, or None on failure.
+        """
         # [SW Engineering] Exception Handling: Applies strict try-except blocks to manage database errors
         # gracefully without crashing the application. Logs errors for debugging.
         try:
-            cursor = self.conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor
-        except pyodbc.Error as e:
+            with self.connection() as conn:
+                cursor = self._execute(conn, query, params)
+                try:
+                    rows = cursor.fetchall() if cursor.description else []
+                    return QueryResult(cursor.rowcount, rows)
+                finally:
+                    cursor.close()
+        except (pyodbc.Error, PoolError) as e:
+            if self.in_transaction():
+                raise
+            print(f"❌ Query execution failed: {e}")
+            return None
+    
+    def fetch_all(self, query, params=None, cached=False):
+        """
+        Fetch all results
+        
+        With cached=True the result may be served from the query cache.
+        """
+        if cached and self.cache is not None:
+            hit, rows = self.cache.get(query, params)
+            if hit:
+                return list(rows)
+            generation = self.cache.generation(query)
+        
+        try:
+            with self.connection() as conn:
+                rows = self._execute(conn, query, params).fetchall()
+        except (pyodbc.Error, PoolError) as e:
+            if self.in_transaction():
+                raise
+            print(f"❌ Query execution failed: {e}")
+            return []
+        
+        if cached and self.cache is not None:
+            self.cache.put(query, params, rows, generation)
+            return list(rows)
+        return rows
+    
+    def fetch_one(self, query, params=None, cached=False):
+        """
+        Fetch single result
+        
+        With cached=True the result may be served from the query cache.
+        """
+        if cached and self.cache is not None:
+            hit, row = self.cache.get(query, params)
+            if hit:
+                return row
+            generation = self.cache.generation(query)
+        
+        try:
+            with self.connection() as conn:
+                row = self._execute(conn, query, params).fetchone()
+        except (pyodbc.Error, PoolError) as e:
+            if self.in_transaction():
+                raise
             print(f"❌ Query execution failed: {e}")
             return None
+        
+        if cached and self.cache is not None and row is not None:
+            self.cache.put(query, params, row, generation)
+        return row
     
-    def fetch_all(self, query, params=None):
-        """Fetch all results"""
-        cursor = self.execute_query(query, params)
-        if cursor:
-            return cursor.fetchall()
-        return []
+    def fetch_iter(self, query, params=None, batch_size=None, cached=False, raise_errors=False):
+        """
+        Stream results as lists of at most ``batch_size`` rows.
+        
+        Rows are pulled with fetchmany() so only one batch is held in memory
+        at a time. The stream reads on its own connection (see
+        streaming_connection()), held until the generator is exhausted or
+        closed, so other queries can run between batches. Inside
+        transaction() it shares the transaction's connection, so finish the
+        stream before the next statement there.
+        
+        With cached=True a cached result is replayed in batches; on a miss
+        the streamed rows are kept for the cache only while they fit in its
+        row budget, so huge results still stream in constant memory.
+        
+        Errors end the stream quietly unless raise_errors=True, which lets
+        callers tell a failed read from an empty one.
+        """
+        if batch_size is None:
+            batch_size = QUERY_SETTINGS['fetch_batch_size']
+        
+        keep = None
+        if cached and self.cache is not None:
+            hit, rows = self.cache.get(query, params)
+            if hit:
+                for start in range(0, len(rows), batch_size):
+                    yield rows[start:start + batch_size]
+                return
+            generation = self.cache.generation(query)
+            keep = []
+        
+        try:
+            with self.streaming_connection() as conn:
+                cursor = self._execute(conn, query, params)
+                try:
+                    while True:
+                        batch = cursor.fetchmany(batch_size)
+                        if not batch:
+                            break
+                        if keep is not None:
+                            keep.extend(batch)
+                            if len(keep) > self.cache.max_rows:
+                                keep = None
+                        yield batch
+                finally:
+                    cursor.close()
+        except (pyodbc.Error, PoolError) as e:
+            if raise_errors or self.in_transaction():
+                raise
+            print(f"❌ Query execution failed: {e}")
+            return
+        
+        if keep is not None:
+            self.cache.put(query, params, keep, generation)
+    
+    def execute_many(self, query, rows, chunk_size=None):
+        """
+        Execute one statement for many parameter rows.
+        
+        Rows are sent in chunks with pyodbc fast_executemany and each chunk
+        is committed on its own. If a chunk fails it is rolled back and
+        replayed row by row, so one bad row only fails itself.
+        
+        Inside transaction() nothing is committed per chunk and the first
+        error is raised so the whole transaction rolls back.
+        
+        Returns (written, errors) where errors is a list of
+        (row_index, message) tuples.
+        """
+        if chunk_size is None:
+            chunk_size = QUERY_SETTINGS['bulk_chunk_size']
+        rows = list(rows)
+        written = 0
+        errors = []
+        if not rows:
+            return written, errors
+        
+        if self.in_transaction():
+            # The enclosing transaction owns the commit; any error aborts it
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.fast_executemany = True
+                for start in range(0, len(rows), chunk_size):
+                    cursor.executemany(query, rows[start:start + chunk_size])
+                cursor.close()
+            self._invalidate(query)
+            return len(rows), errors
+        
+        try:
+            with self.connection() as conn:
+                conn.autocommit = False
+                try:
+                    cursor = conn.cursor()
+                    cursor.fast_executemany = True
+                    for start in range(0, len(rows), chunk_size):
+                        chunk = rows[start:start + chunk_size]
+                        try:
+                            cursor.executemany(query, chunk)
+                            conn.commit()
+                            written += len(chunk)
+                        except pyodbc.Error:
+                            conn.rollback()
+                            for offset, params in enumerate(chunk):
+                                try:
+                                    cursor.execute(query, params)
+                                    conn.commit()
+                                    written += 1
+                                except pyodbc.Error as e:
+                                    conn.rollback()
+                                    errors.append((start + offset, str(e)))
+                    cursor.close()
+                finally:
+                    conn.autocommit = True
+        except (pyodbc.Error, PoolError) as e:
+            print(f"❌ Bulk execution failed: {e}")
+            # Rows are handled in order, so everything not yet reached failed
+            done = written + len(errors)
+            errors.extend((index, str(e)) for index in range(done, len(rows)))
+        if written:
+            self._invalidate(query)
+        return written, errors
     
-    def fetch_one(self, query, params=None):
-        """Fetch single result"""
-        cursor = self.execute_query(query, params)
-        if cursor:
-            return cursor.fetchone()
-        return None
+    def migrate(self):
+        """Apply pending schema migrations; returns the versions applied"""
+        try:
+            with self.connection() as conn:
+                applied = schema.migrate(conn, getattr(pyodbc, 'SCHEMA_DIALECT', 'mssql'))
+            if applied:
+                if self.cache is not None:
+                    self.cache.clear()
+                print(f"✅ Database schema migrated to version {applied[-1]}")
+            return applied
+        except (pyodbc.Error, PoolError) as e:
+            print(f"❌ Schema migration failed: {e}")
+            return []
     
     def close(self):
         """Close database connection"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+            print("✅ Database connection pool closed")
         if self.conn:
             self.conn.close()
+            self.conn = None
             print("✅ Database connection closed")
+    
+    def _execute(self, conn, query, params=None):
+        """Run a query on the given connection and return its cursor"""
+        cursor = conn.cursor()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        self._invalidate(query)
+        return cursor
+    
+    def _invalidate(self, query):
+        """Drop cached reads made stale by a write statement"""
+        if self.cache is None:
+            return
+        self.cache.invalidate_query(query)
+        writes = getattr(self._local, 'writes', None)
+        if writes is not None:
+            writes.add(query)
 
 
 # Global database instance
@@ -0,0 +1,410 @@
+"""
+Fake pyodbc driver backed by SQLite, for running SyncBazar offline
+
+Select it with DB_CONFIG['backend'] = 'fake' (or the SYNCBAZAR_DB_BACKEND
+environment variable); database/connection.py then imports this module in
+place of pyodbc. It implements the part of the pyodbc API the application
+uses -- connect(), autocommit, cursors with execute/executemany/fetch*,
+fast_executemany and the pyodbc exception classes -- and rewrites the
+T-SQL idioms found in database/queries.py for SQLite:
+
+- GETDATE()                         -> the current (UTC) time
+- SELECT TOP (?) / TOP n ...        -> ... LIMIT ?, moving the parameter last
+- IF NOT EXISTS (SELECT ... FROM sysobjects / sys.indexes ...) stmt
+                                    -> run the check against sqlite_master
+- INT IDENTITY(1,1) PRIMARY KEY     -> INTEGER PRIMARY KEY AUTOINCREMENT
+- INSERT ... OUTPUT INSERTED.col    -> the new row id
+- CREATE TABLE #name / #name        -> CREATE TEMP TABLE name / name
+
+Migrations use the 'sqlite' dialect of database/schema.py (SCHEMA_DIALECT).
+
+Every round trip to the "server" can be delayed by FAKE_DB_SETTINGS
+latency_ms plus up to jitter_ms, to reproduce a slow branch link: a
+connect costs connect_trips, an execute, commit or rollback one, and a
+result one more for every rows_per_trip rows fetched after the first
+packet. executemany costs one trip with fast_executemany and one per row
+without, as it does against a real server.
+"""
+import datetime
+import math
+import random
+import re
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from config import FAKE_DB_SETTINGS
+
+
+SCHEMA_DIALECT = 'sqlite'
+
+
+# pyodbc's exception hierarchy
+class Error(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class DataError(DatabaseError):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class InternalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+_ERRORS = [
+    (sqlite3.IntegrityError, IntegrityError),
+    (sqlite3.OperationalError, OperationalError),
+    (sqlite3.ProgrammingError, ProgrammingError),
+    (sqlite3.DataError, DataError),
+    (sqlite3.NotSupportedError, NotSupportedError),
+    (sqlite3.Error, DatabaseError),
+]
+
+
+def _wrap_error(error):
+    for sqlite_class, odbc_class in _ERRORS:
+        if isinstance(error, sqlite_class):
+            return odbc_class(str(error))
+    return Error(str(error))
+
+
+# T-SQL rewrites
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+_DEFAULT_GETDATE = re.compile(r'\bDEFAULT\s+GETDATE\(\)', re.IGNORECASE)
+_GETDATE = re.compile(r'\bGETDATE\(\)', re.IGNORECASE)
+_IDENTITY = re.compile(r'\bINT\s+IDENTITY\s*\(\s*1\s*,\s*1\s*\)\s+PRIMARY\s+KEY\b',
+                       re.IGNORECASE)
+_TOP = re.compile(r'^(\s*SELECT\s+(?:DISTINCT\s+)?)TOP\s*(?:\(\s*(\?|\d+)\s*\)|(\d+))\s+',
+                  re.IGNORECASE)
+_OUTPUT_INSERTED = re.compile(r'\bOUTPUT\s+INSERTED\.(\w+)\s+', re.IGNORECASE)
+_SYSOBJECTS = re.compile(
+    r"\bFROM\s+sysobjects\s+WHERE\s+name\s*=\s*'(\w+)'\s+AND\s+xtype\s*=\s*'U'",
+    re.IGNORECASE)
+_SYS_INDEXES = re.compile(
+    r"\bFROM\s+sys\.indexes\s+WHERE\s+name\s*=\s*'(\w+)'\s+"
+    r"AND\s+object_id\s*=\s*OBJECT_ID\('(\w+)'\)", re.IGNORECASE)
+_CREATE_TEMP = re.compile(r'\bCREATE\s+TABLE\s+#(\w+)', re.IGNORECASE)
+_TEMP_NAME = re.compile(r"(?<![\w'#])#(\w+)")
+_IF_EXISTS = re.compile(r'^\s*IF\s+(NOT\s+)?EXISTS\s*\(', re.IGNORECASE)
+_IF = re.compile(r'^\s*IF\b', re.IGNORECASE)
+
+# 'YYYY-MM-DD HH:MM:SS[.fff[fff]]' text comes back as a datetime, like pyodbc
+_TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d{3}|\.\d{6})?$')
+
+
+def translate(query, params=()):
+    """
+    Rewrite one T-SQL statement for SQLite
+    
+    Returns (sql, params, returning) where returning names the column of
+    an OUTPUT INSERTED clause that was removed (None otherwise).
+    """
+    sql = _DEFAULT_GETDATE.sub(f"DEFAULT ({NOW})", query)
+    sql = _GETDATE.sub(NOW, sql)
+    sql = _IDENTITY.sub("INTEGER PRIMARY KEY AUTOINCREMENT", sql)
+    # #name tables live for the session, like SQLite's TEMP tables
+    sql = _CREATE_TEMP.sub(r"CREATE TEMP TABLE \1", sql)
+    sql = _TEMP_NAME.sub(r"\1", sql)
+    sql = _SYSOBJECTS.sub(r"FROM sqlite_master WHERE type = 'table' AND name = '\1'", sql)
+    sql = _SYS_INDEXES.sub(
+        r"FROM sqlite_master WHERE type = 'index' AND name = '\1' AND tbl_name = '\2'", sql)
+    
+    returning = None
+    match = _OUTPUT_INSERTED.search(sql)
+    if match:
+        returning = match.group(1)
+        sql = sql[:match.start()] + sql[match.end():]
+    
+    match = _TOP.match(sql)
+    if match:
+        limit = match.group(2) or match.group(3)
+        sql = match.group(1) + sql[match.end():].rstrip().rstrip(';') + f"\nLIMIT {limit}"
+        if limit == '?':
+            # TOP (?) is the statement's first parameter; LIMIT ? is its last
+            params = tuple(params[1:]) + tuple(params[:1])
+    return sql, params, returning
+
+
+def split_condition(query):
+    """
+    Split 'IF [NOT] EXISTS (check) statement' into (negated, check, statement)
+    
+    Returns (None, None, query) for a statement without a guard.
+    """
+    match = _IF_EXISTS.match(query)
+    if not match:
+        if _IF.match(query):
+            raise NotSupportedError(f"Unsupported T-SQL condition: {query.strip()[:60]}")
+        return None, None, query
+    
+    depth, position = 1, match.end()
+    while depth and position < len(query):
+        char = query[position]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == "'":
+            position = query.index("'", position + 1)
+        position += 1
+    if depth:
+        raise ProgrammingError("Unbalanced parentheses in IF EXISTS")
+    return bool(match.group(1)), query[match.end():position - 1], query[position:]
+
+
+def _param(value):
+    """Bind values SQLite does not take natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(' ')
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def _value(value):
+    if isinstance(value, str) and 19 <= len(value) <= 26 and _TIMESTAMP.match(value):
+        return datetime.datetime.fromisoformat(value.replace('T', ' '))
+    return value
+
+
+def _row(row):
+    return tuple(_value(value) for value in row)
+
+
+class Latency:
+    """Sleeps for one simulated network round trip at a time"""
+    
+    def __init__(self, latency_ms=0, jitter_ms=0, seed=None, sleep=time.sleep):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.random = random.Random(seed)
+        self.sleep = sleep
+        self.trips = 0
+        self._lock = threading.Lock()
+    
+    def trip(self, count=1):
+        """Wait out count round trips"""
+        if count <= 0:
+            return
+        with self._lock:
+            self.trips += count
+            delay = sum(self.latency + self.random.uniform(0, self.jitter)
+                        for _ in range(count)) if self.jitter else self.latency * count
+        if delay > 0:
+            self.sleep(delay)
+
+
+def connect(connection_string='', autocommit=False, database=None, latency_ms=None,
+            jitter_ms=None, rows_per_trip=None, connect_trips=None, seed=None, **kwargs):
+    """
+    Open a connection; the connection string is accepted and ignored
+    
+    Settings not given here come from FAKE_DB_SETTINGS. A database name
+    starting with 'file:' is opened as a SQLite URI (e.g. a shared
+    in-memory database for a pool).
+    """
+    settings = dict(FAKE_DB_SETTINGS)
+    for key, value in (('database', database), ('latency_ms', latency_ms),
+                       ('jitter_ms', jitter_ms), ('rows_per_trip', rows_per_trip),
+                       ('connect_trips', connect_trips), ('seed', seed)):
+        if value is not None:
+            settings[key] = value
+    latency = Latency(settings['latency_ms'], settings['jitter_ms'], settings['seed'])
+    latency.trip(settings['connect_trips'])
+    try:
+        raw = sqlite3.connect(settings['database'], uri=settings['database'].startswith('file:'),
+                              isolation_level=None, check_same_thread=False, timeout=30)
+    except sqlite3.Error as e:
+        raise _wrap_error(e) from e
+    return Connection(raw, latency, settings['rows_per_trip'], autocommit)
+
+
+class Connection:
+    """pyodbc-style connection over a sqlite3 connection in manual-commit mode"""
+    
+    def __init__(self, raw, latency, rows_per_trip=100, autocommit=False):
+        self.raw = raw
+        self.latency = latency
+        self.rows_per_trip = max(1, rows_per_trip)
+        self._autocommit = autocommit
+        self.closed = False
+    
+    @property
+    def autocommit(self):
+        return self._autocommit
+    
+    @autocommit.setter
+    def autocommit(self, value):
+        # Like ODBC, switching autocommit on commits the open transaction
+        if value and not self._autocommit and self.raw.in_transaction:
+            self.commit()
+        self._autocommit = bool(value)
+    
+    def cursor(self):
+        if self.closed:
+            raise ProgrammingError("Attempt to use a closed connection.")
+        return Cursor(self)
+    
+    def execute(self, query, *params):
+        return self.cursor().execute(query, *params)
+    
+    def commit(self):
+        self.latency.trip()
+        if self.raw.in_transaction:
+            self._run(self.raw.execute, "COMMIT")
+    
+    def rollback(self):
+        self.latency.trip()
+        if self.raw.in_transaction:
+            self._run(self.raw.execute, "ROLLBACK")
+    
+    def close(self):
+        if not self.closed:
+            if self.raw.in_transaction:
+                self.raw.execute("ROLLBACK")
+            self.raw.close()
+            self.closed = True
+    
+    def _begin(self):
+        """Open the implicit transaction of manual-commit mode"""
+        if not self._autocommit and not self.raw.in_transaction:
+            self.raw.execute("BEGIN")
+    
+    @staticmethod
+    def _run(func, *args):
+        try:
+            return func(*args)
+        except sqlite3.Error as e:
+            raise _wrap_error(e) from e
+
+
+class Cursor:
+    """pyodbc-style cursor; rows are tuples, timestamps come back as datetimes"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+        self.raw = connection.raw.cursor()
+        self.fast_executemany = False
+        self._rows = None
+        self._description = None
+        self._fetched = 0
+        self._paid = 0
+        self.rowcount = -1
+    
+    @property
+    def description(self):
+        return self._description if self._rows is not None else self.raw.description
+    
+    def execute(self, query, *params):
+        """Run one statement; params may be a sequence or separate arguments"""
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        self.connection.latency.trip()
+        self._reset()
+        
+        negated, check, statement = split_condition(query)
+        if check is not None:
+            sql, _, _ = translate(check)
+            found = self._run(self.raw.execute, sql).fetchone() is not None
+            if found == negated:
+                self._rows = []
+                return self
+        self._execute(statement, params)
+        return self
+    
+    def executemany(self, query, seq_of_params):
+        """Run one statement per parameter row"""
+        rows = list(seq_of_params)
+        self.connection.latency.trip(1 if self.fast_executemany else len(rows))
+        self._reset()
+        sql, _, _ = translate(query)
+        if _TOP.match(query):
+            raise NotSupportedError("TOP (?) is not supported in executemany")
+        self.connection._begin()
+        self._run(self.raw.executemany, sql, [tuple(map(_param, row)) for row in rows])
+        self.rowcount = self.raw.rowcount
+    
+    def fetchone(self):
+        rows = self._fetch(1)
+        return rows[0] if rows else None
+    
+    def fetchmany(self, size=1):
+        return self._fetch(size)
+    
+    def fetchall(self):
+        return self._fetch(None)
+    
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+    
+    def close(self):
+        self.raw.close()
+    
+    def _execute(self, statement, params):
+        sql, params, returning = translate(statement, params)
+        self.connection._begin()
+        self._run(self.raw.execute, sql, tuple(map(_param, params)))
+        self.rowcount = self.raw.rowcount
+        if returning is not None:
+            self._rows = [(self.raw.lastrowid,)]
+            self._description = ((returning, int, None, None, None, None, False),)
+        # The first packet of results comes back with the execute
+        self._paid = 1
+    
+    def _fetch(self, size):
+        if self._rows is not None:
+            end = len(self._rows) if size is None else self._fetched + size
+            rows = self._rows[self._fetched:end]
+        elif size is None:
+            rows = [_row(row) for row in self._run(self.raw.fetchall)]
+        else:
+            rows = [_row(row) for row in self._run(self.raw.fetchmany, size)]
+        self._fetched += len(rows)
+        packets = max(1, math.ceil(self._fetched / self.connection.rows_per_trip))
+        if packets > self._paid:
+            self.connection.latency.trip(packets - self._paid)
+            self._paid = packets
+        return rows
+    
+    def _reset(self):
+        self._rows = None
+        self._description = None
+        self._fetched = 0
+        self._paid = 0
+        self.rowcount = -1
+    
+    @staticmethod
+    def _run(func, *args):
+        return Connection._run(func, *args)
@@ -0,0 +1,274 @@
+"""
+Compact in-memory item store for SyncBazar
+
+Holds an item snapshot as column arrays instead of a list of pyodbc Rows.
+A Row costs a few hundred bytes once its ints, Decimal, datetime and
+strings are counted; here each numeric column is a typed array, the
+repeated category/location/supplier values are interned into small
+tables and stored as codes, and names and SKUs are packed as UTF-8 into
+one buffer per column. 500k items take tens of MB instead of hundreds.
+
+Rows read back as plain tuples in GET_ALL_ITEMS column order, so existing
+code that unpacks item rows keeps working. unit_price is held as a float.
+"""
+import threading
+from array import array
+from datetime import datetime, timedelta
+
+
+# Column positions in a GET_ALL_ITEMS row
+ITEM_COLUMNS = ('item_id', 'item_name', 'category', 'sku', 'quantity',
+                'reorder_level', 'unit_price', 'location', 'supplier', 'created_at')
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_TIME = -2 ** 63
+_NO_ID = -1
+
+
+class StringPool:
+    """Interns repeated strings; code 0 is reserved for None"""
+    
+    def __init__(self):
+        self.values = [None]
+        self._codes = {None: 0}
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def code(self, value):
+        """Return the code for value, adding it on first sight"""
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class PackedStrings:
+    """
+    A column of mostly unique strings packed as UTF-8 in one buffer
+    
+    Replacing a value appends the new text and leaves the old bytes behind;
+    compact() reclaims them.
+    """
+    
+    _NULL = 0xFFFF
+    
+    def __init__(self):
+        self._data = bytearray()
+        self._starts = array('I')
+        self._lengths = array('H')
+    
+    def __len__(self):
+        return len(self._starts)
+    
+    def __getitem__(self, index):
+        length = self._lengths[index]
+        if length == self._NULL:
+            return None
+        start = self._starts[index]
+        return self._data[start:start + length].decode('utf-8')
+    
+    def append(self, value):
+        self._starts.append(0)
+        self._lengths.append(self._NULL)
+        self[len(self._starts) - 1] = value
+    
+    def __setitem__(self, index, value):
+        if value is None:
+            self._lengths[index] = self._NULL
+            return
+        encoded = str(value).encode('utf-8')
+        if len(encoded) >= self._NULL:
+            # Columns are NVARCHAR(200) at most; anything longer is truncated
+            encoded = encoded[:self._NULL - 1].decode('utf-8', 'ignore').encode('utf-8')
+        self._starts[index] = len(self._data)
+        self._lengths[index] = len(encoded)
+        self._data += encoded
+    
+    def nbytes(self):
+        return (len(self._data) + self._starts.itemsize * len(self._starts)
+                + self._lengths.itemsize * len(self._lengths))
+    
+    def compact(self):
+        """Drop bytes left behind by replaced values"""
+        values = [self[i] for i in range(len(self))]
+        self.__init__()
+        for value in values:
+            self.append(value)
+
+
+class ItemStore:
+    """
+    Column-array snapshot of item rows
+    
+    Build one straight from cursor batches with from_batches() (e.g. the
+    batches of db.fetch_iter(GET_ALL_ITEMS)) and read rows back by position.
+    Lookups by item_id use a dense id -> position array when ids are dense,
+    which they are for an IDENTITY column, and a dict otherwise.
+    """
+    
+    def __init__(self):
+        self.item_ids = array('i')
+        self.quantities = array('i')
+        self.reorder_levels = array('i')
+        self.unit_prices = array('d')
+        self.created_at = array('q')
+        self.names = PackedStrings()
+        self.skus = PackedStrings()
+        self.categories = array('I')
+        self.locations = array('I')
+        self.suppliers = array('I')
+        self.category_pool = StringPool()
+        self.location_pool = StringPool()
+        self.supplier_pool = StringPool()
+        self._positions = None
+        self._lock = threading.RLock()
+    
+    @classmethod
+    def from_batches(cls, batches):
+        """Build a store from an iterable of row batches"""
+        store = cls()
+        for batch in batches:
+            store.extend(batch)
+        return store
+    
+    @classmethod
+    def from_cursor(cls, cursor, batch_size=500):
+        """Build a store by draining an executed cursor with fetchmany()"""
+        return cls.from_batches(iter(lambda: cursor.fetchmany(batch_size), []))
+    
+    def __len__(self):
+        return len(self.item_ids)
+    
+    def __getitem__(self, index):
+        return self.row(index)
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+    
+    def extend(self, rows):
+        """Append a batch of GET_ALL_ITEMS-shaped rows"""
+        with self._lock:
+            for row in rows:
+                self._append(row)
+    
+    def append(self, row):
+        """Append one item row"""
+        with self._lock:
+            self._append(row)
+    
+    def replace(self, index, row):
+        """Overwrite the item at a position with a new row for the same item_id"""
+        with self._lock:
+            if row[0] != self.item_ids[index]:
+                self._positions = None
+            self.item_ids[index] = row[0]
+            self.names[index] = row[1]
+            self.categories[index] = self.category_pool.code(row[2])
+            self.skus[index] = row[3]
+            self.quantities[index] = row[4] or 0
+            self.reorder_levels[index] = row[5] or 0
+            self.unit_prices[index] = float(row[6] or 0)
+            self.locations[index] = self.location_pool.code(row[7])
+            self.suppliers[index] = self.supplier_pool.code(row[8])
+            self.created_at[index] = _pack_time(row[9])
+    
+    def row(self, index):
+        """Return the item at a position as a GET_ALL_ITEMS-shaped tuple"""
+        return (
+            self.item_ids[index],
+            self.names[index],
+            self.category_pool.values[self.categories[index]],
+            self.skus[index],
+            self.quantities[index],
+            self.reorder_levels[index],
+            self.unit_prices[index],
+            self.location_pool.values[self.locations[index]],
+            self.supplier_pool.values[self.suppliers[index]],
+            _unpack_time(self.created_at[index]),
+        )
+    
+    def position(self, item_id):
+        """Return the position of an item, or None"""
+        with self._lock:
+            if self._positions is None:
+                self._positions = self._build_positions()
+            positions = self._positions
+            if isinstance(positions, dict):
+                return positions.get(item_id)
+            if 0 <= item_id < len(positions) and positions[item_id] != _NO_ID:
+                return positions[item_id]
+            return None
+    
+    def get(self, item_id):
+        """Return the row for item_id, or None"""
+        index = self.position(item_id)
+        return None if index is None else self.row(index)
+    
+    def nbytes(self):
+        """Approximate memory held by the columns, in bytes"""
+        arrays = (self.item_ids, self.quantities, self.reorder_levels, self.unit_prices,
+                  self.created_at, self.categories, self.locations, self.suppliers)
+        total = sum(column.itemsize * len(column) for column in arrays)
+        total += self.names.nbytes() + self.skus.nbytes()
+        for pool in (self.category_pool, self.location_pool, self.supplier_pool):
+            total += sum(len(value) for value in pool.values if value) + 16 * len(pool)
+        return total
+    
+    def _append(self, row):
+        """Append one row (lock held)"""
+        self.item_ids.append(row[0])
+        self.names.append(row[1])
+        self.categories.append(self.category_pool.code(row[2]))
+        self.skus.append(row[3])
+        self.quantities.append(row[4] or 0)
+        self.reorder_levels.append(row[5] or 0)
+        self.unit_prices.append(float(row[6] or 0))
+        self.locations.append(self.location_pool.code(row[7]))
+        self.suppliers.append(self.supplier_pool.code(row[8]))
+        self.created_at.append(_pack_time(row[9]))
+        if self._positions is not None:
+            self._set_position(row[0], len(self.item_ids) - 1)
+    
+    def _build_positions(self):
+        """Map item_id -> position, densely when the ids allow it (lock held)"""
+        largest = max(self.item_ids, default=0)
+        if largest > 4 * len(self.item_ids) + 1024:
+            return {item_id: index for index, item_id in enumerate(self.item_ids)}
+        positions = array('i', [_NO_ID]) * (largest + 1)
+        for index, item_id in enumerate(self.item_ids):
+            positions[item_id] = index
+        return positions
+    
+    def _set_position(self, item_id, index):
+        positions = self._positions
+        if isinstance(positions, dict):
+            positions[item_id] = index
+            return
+        if item_id >= len(positions):
+            if item_id > 4 * len(self.item_ids) + 1024:
+                # Too sparse now: rebuilt as a dict on the next lookup
+                self._positions = None
+                return
+            # Grown geometrically, so appending new ids stays O(1)
+            size = max(item_id + 1, 2 * len(positions))
+            positions.extend(array('i', [_NO_ID]) * (size - len(positions)))
+        positions[item_id] = index
+
+
+def _pack_time(value):
+    """datetime -> microseconds since 1970 (exact, no timezone involved)"""
+    if value is None:
+        return _NO_TIME
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _unpack_time(value):
+    if value == _NO_TIME:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
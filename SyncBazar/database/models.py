@@ -3,6 +3,8 @@ Data models for SyncBazar
 """
 
 class User:
+    __slots__ = ('user_id', 'username', 'full_name', 'role')
+    
     def __init__(self, user_id, username, full_name, role):
         self.user_id = user_id
         self.username = username
@@ -19,6 +21,9 @@ class User:
 
 
 class Item:
+    __slots__ = ('item_id', 'item_name', 'category', 'sku', 'quantity',
+                 'reorder_level', 'unit_price', 'location', 'supplier', 'created_at')
+    
     def __init__(self, item_id, item_name, category, sku, quantity, 
                  reorder_level, unit_price, location, supplier, created_at=None):
         self.item_id = item_id
@@ -32,6 +37,11 @@ class Item:
         self.supplier = supplier
         self.created_at = created_at
     
+    @classmethod
+    def from_row(cls, row):
+        """Build an Item from a GET_ALL_ITEMS row (or an ItemStore row)"""
+        return cls(*row)
+    
     def to_dict(self):
         return {
             'item_id': self.item_id,
@@ -56,6 +66,9 @@ class Item:
 
 
 class Shop:
+    __slots__ = ('shop_id', 'shop_name', 'location', 'manager_name',
+                 'phone', 'email', 'status')
+    
     def __init__(self, shop_id, shop_name, location, manager_name, 
                  phone, email, status):
         self.shop_id = shop_id
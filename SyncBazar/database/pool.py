@@ -0,0 +1,174 @@
+"""
+Connection pool for SyncBazar
+
+The pool is driver agnostic: it only needs a factory that opens a new
+DB-API connection, so it can be exercised with sqlite3 in tests.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolError(Exception):
+    """Raised when the pool cannot hand out a connection"""
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection became free within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections"""
+
+    def __init__(self, factory, size=5, idle_timeout=300, checkout_timeout=30,
+                 ping_after_idle=10, ping_query="SELECT 1", clock=time.monotonic):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.ping_after_idle = ping_after_idle
+        self.ping_query = ping_query
+        self.clock = clock
+
+        # Idle connections as (connection, last_used); most recent on the right
+        self._idle = deque()
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def checkout(self, timeout=None):
+        """Borrow a connection, opening a new one if the pool is not full"""
+        if timeout is None:
+            timeout = self.checkout_timeout
+        deadline = self.clock() + timeout
+        conn = None
+        last_used = None
+        stale = []
+
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolError("Connection pool is closed")
+
+                    stale.extend(self._evict_idle())
+
+                    if self._idle:
+                        # Reuse the most recently used connection (warmest)
+                        conn, last_used = self._idle.pop()
+                        break
+
+                    if self._created < self.size:
+                        self._created += 1
+                        break
+
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"No free connection after {timeout} seconds "
+                            f"(pool size {self.size})"
+                        )
+                    self._cond.wait(remaining)
+        finally:
+            # Close evicted connections outside the lock
+            self._close_all(stale)
+
+        if conn is not None:
+            idle_for = self.clock() - last_used
+            if idle_for < self.ping_after_idle or self._is_alive(conn):
+                return conn
+            # Dead connection: drop it and open a replacement in its slot
+            self._close_quietly(conn)
+
+        try:
+            return self.factory()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def checkin(self, conn, discard=False):
+        """Return a borrowed connection to the pool"""
+        with self._cond:
+            if discard or self._closed:
+                self._created -= 1
+            else:
+                self._idle.append((conn, self.clock()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection for the duration of a with-block"""
+        conn = self.checkout(timeout)
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def warm(self, count=1):
+        """Open up to ``count`` connections ahead of time"""
+        conns = [self.checkout() for _ in range(min(count, self.size))]
+        for conn in conns:
+            self.checkin(conn)
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._created -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_all(idle)
+
+    def stats(self):
+        """Return a snapshot of the pool counters"""
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+            }
+
+    def _evict_idle(self):
+        """Remove connections idle longer than idle_timeout (lock held)"""
+        if self.idle_timeout is None:
+            return []
+        cutoff = self.clock() - self.idle_timeout
+        stale = []
+        while self._idle and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            stale.append(conn)
+        self._created -= len(stale)
+        return stale
+
+    def _is_alive(self, conn):
+        """Run the ping query to check a connection is still usable"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.ping_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _close_all(self, conns):
+        for conn in conns:
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
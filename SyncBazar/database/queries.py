@@ -67,6 +67,42 @@ INSERT INTO items (item_name, category, sku, quantity, reorder_level, unit_price
 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
 """
 
+# Keyset pagination over (item_name, item_id); the leading item_name >= ?
+# lets SQL Server seek on IX_items_name instead of skipping OFFSET rows
+GET_ITEMS_FIRST_PAGE = """
+SELECT TOP (?) item_id, item_name, category, sku, quantity, 
+       reorder_level, unit_price, location, supplier, created_at
+FROM items 
+ORDER BY item_name, item_id
+"""
+
+GET_ITEMS_PAGE_AFTER = """
+SELECT TOP (?) item_id, item_name, category, sku, quantity, 
+       reorder_level, unit_price, location, supplier, created_at
+FROM items 
+WHERE item_name >= ? AND (item_name > ? OR item_id > ?)
+ORDER BY item_name, item_id
+"""
+
+GET_ITEM_TOTALS = """
+SELECT COUNT(*), SUM(quantity), SUM(quantity * unit_price)
+FROM items
+"""
+
+# Same as ADD_ITEM but returns the new item_id, for use inside a transaction
+ADD_ITEM_RETURNING_ID = """
+INSERT INTO items (item_name, category, sku, quantity, reorder_level, unit_price, location, supplier)
+OUTPUT INSERTED.item_id
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+GET_ITEM_BY_ID = """
+SELECT item_id, item_name, category, sku, quantity, 
+       reorder_level, unit_price, location, supplier, created_at
+FROM items 
+WHERE item_id = ?
+"""
+
 UPDATE_ITEM = """
 UPDATE items 
 SET item_name = ?, category = ?, sku = ?, quantity = ?,
@@ -77,6 +113,36 @@ WHERE item_id = ?
 
 DELETE_ITEM = "DELETE FROM items WHERE item_id = ?"
 
+# Change tracking: rows written, and ids deleted, at or after a high-water
+# mark taken from the server clock (see database/schema.py v3)
+GET_SERVER_TIME = "SELECT GETDATE()"
+
+# previous_id is the row before each one in (item_name, item_id) order and
+# past_page flags rows after the keyset key (?, ?) of the last loaded page,
+# both compared by the server so they follow its collation
+GET_ITEMS_CHANGED_SINCE = """
+SELECT i.item_id, i.item_name, i.category, i.sku, i.quantity, 
+       i.reorder_level, i.unit_price, i.location, i.supplier, i.created_at,
+       COALESCE(
+           (SELECT MAX(p.item_id) FROM items p
+            WHERE p.item_name = i.item_name AND p.item_id < i.item_id),
+           (SELECT MAX(p.item_id) FROM items p
+            WHERE p.item_name = (SELECT MAX(q.item_name) FROM items q
+                                 WHERE q.item_name < i.item_name))
+       ) AS previous_id,
+       CASE WHEN i.item_name > ? OR (i.item_name = ? AND i.item_id > ?)
+            THEN 1 ELSE 0 END AS past_page
+FROM items i 
+WHERE i.updated_at >= ?
+ORDER BY i.item_name, i.item_id
+"""
+
+GET_ITEM_TOMBSTONES_SINCE = """
+SELECT DISTINCT item_id FROM item_tombstones WHERE deleted_at >= ?
+"""
+
+PURGE_ITEM_TOMBSTONES = "DELETE FROM item_tombstones WHERE deleted_at < ?"
+
 SEARCH_ITEMS = """
 SELECT item_id, item_name, category, sku, quantity, unit_price, location, supplier
 FROM items 
@@ -84,6 +150,12 @@ WHERE item_name LIKE ? OR category LIKE ? OR sku LIKE ? OR supplier LIKE ?
 ORDER BY item_name
 """
 
+# Unfiltered SEARCH_ITEMS, used to build the client-side search index
+GET_SEARCH_SNAPSHOT = """
+SELECT item_id, item_name, category, sku, quantity, unit_price, location, supplier
+FROM items
+"""
+
 # Shop queries
 CREATE_SHOPS_TABLE = """
 IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='shops' AND xtype='U')
@@ -113,6 +185,11 @@ FROM shops
 ORDER BY shop_name
 """
 
+ADD_SHOP = """
+INSERT INTO shops (shop_name, location, manager_name, phone, email, status)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
 # Activity log
 CREATE_ACTIVITY_TABLE = """
 IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='activity_log' AND xtype='U')
@@ -127,13 +204,18 @@ CREATE TABLE activity_log (
 )
 """
 
+LOG_ACTIVITY = """
+INSERT INTO activity_log (activity_type, description, item_id, quantity_changed, user_id)
+VALUES (?, ?, ?, ?, ?)
+"""
+
 # Dashboard queries
 GET_DASHBOARD_STATS = """
 SELECT 
     (SELECT COUNT(*) FROM items) as total_items,
     (SELECT COUNT(*) FROM shops) as total_shops,
     (SELECT SUM(quantity * unit_price) FROM items) as total_value,
-    (SELECT COUNT(*) FROM items WHERE quantity < reorder_level AND quantity > 0) as low_stock,
+    (SELECT COUNT(*) FROM items WHERE is_low_stock = 1 AND quantity > 0) as low_stock,
     (SELECT COUNT(*) FROM items WHERE quantity = 0) as out_of_stock
 """
 
@@ -142,3 +224,156 @@ SELECT TOP 5 description, created_at
 FROM activity_log 
 ORDER BY created_at DESC
 """
+
+# Analysis queries: aggregated on the server, so only a few rows come back
+GET_INVENTORY_SUMMARY = """
+SELECT COUNT(*), SUM(quantity), SUM(quantity * unit_price),
+       SUM(CASE WHEN quantity <> 0 AND quantity >= reorder_level THEN 1 ELSE 0 END) as in_stock,
+       SUM(CASE WHEN quantity <> 0 AND quantity < reorder_level THEN 1 ELSE 0 END) as low_stock,
+       SUM(CASE WHEN quantity = 0 THEN 1 ELSE 0 END) as out_of_stock
+FROM items
+"""
+
+GET_VALUE_BY_CATEGORY = """
+SELECT category, COUNT(*), SUM(quantity), SUM(quantity * unit_price) as total_value
+FROM items
+GROUP BY category
+ORDER BY total_value DESC
+"""
+
+GET_VALUE_BY_LOCATION = """
+SELECT location, COUNT(*), SUM(quantity), SUM(quantity * unit_price) as total_value
+FROM items
+GROUP BY location
+ORDER BY total_value DESC
+"""
+
+GET_VALUE_BY_SUPPLIER = """
+SELECT supplier, COUNT(*), SUM(quantity), SUM(quantity * unit_price) as total_value
+FROM items
+GROUP BY supplier
+ORDER BY total_value DESC
+"""
+
+# Cheap "has anything changed" probe for live views: every part is an index
+# seek (updated_at, the tombstone and shop keys) except the small shops count
+GET_CHANGE_MARKER = """
+SELECT (SELECT MAX(updated_at) FROM items),
+       (SELECT MAX(item_id) FROM items),
+       (SELECT MAX(tombstone_id) FROM item_tombstones),
+       (SELECT MAX(shop_id) FROM shops),
+       (SELECT COUNT(*) FROM shops)
+"""
+
+GET_TOP_VALUE_ITEMS = """
+SELECT TOP (?) quantity * unit_price as item_value, item_id, item_name, quantity
+FROM items
+ORDER BY item_value DESC, item_id DESC
+"""
+
+# Report queries: streamed with fetch_iter, never loaded whole
+GET_INVENTORY_REPORT = """
+SELECT item_id, item_name, category, sku, quantity, reorder_level,
+       unit_price, quantity * unit_price as total_value, location, supplier, created_at
+FROM items
+ORDER BY item_name, item_id
+"""
+
+GET_STOCK_VALUATION_REPORT = """
+SELECT item_id, item_name, category, location, quantity, unit_price,
+       quantity * unit_price as total_value
+FROM items
+ORDER BY total_value DESC, item_id
+"""
+
+GET_LOW_STOCK_REPORT = """
+SELECT item_id, item_name, category, sku, quantity, reorder_level,
+       reorder_level - quantity as shortfall, location, supplier
+FROM items
+WHERE is_low_stock = 1
+ORDER BY quantity, item_name, item_id
+"""
+
+COUNT_ITEMS = """
+SELECT COUNT(*) FROM items
+"""
+
+COUNT_LOW_STOCK_ITEMS = """
+SELECT COUNT(*) FROM items WHERE is_low_stock = 1
+"""
+
+# Per-shop variants: items are stocked at a shop when their location is the shop name
+GET_INVENTORY_REPORT_BY_LOCATION = """
+SELECT item_id, item_name, category, sku, quantity, reorder_level,
+       unit_price, quantity * unit_price as total_value, location, supplier, created_at
+FROM items
+WHERE location = ?
+ORDER BY item_name, item_id
+"""
+
+GET_STOCK_VALUATION_REPORT_BY_LOCATION = """
+SELECT item_id, item_name, category, location, quantity, unit_price,
+       quantity * unit_price as total_value
+FROM items
+WHERE location = ?
+ORDER BY total_value DESC, item_id
+"""
+
+GET_LOW_STOCK_REPORT_BY_LOCATION = """
+SELECT item_id, item_name, category, sku, quantity, reorder_level,
+       reorder_level - quantity as shortfall, location, supplier
+FROM items
+WHERE location = ? AND is_low_stock = 1
+ORDER BY quantity, item_name, item_id
+"""
+
+COUNT_ITEMS_BY_LOCATION = """
+SELECT COUNT(*) FROM items WHERE location = ?
+"""
+
+COUNT_LOW_STOCK_ITEMS_BY_LOCATION = """
+SELECT COUNT(*) FROM items WHERE location = ? AND is_low_stock = 1
+"""
+
+# Stock alerts: the watcher reads the low-stock items once, then only rows
+# written since its last pass (updated_at index). The first load matches
+# stock_status(): below the reorder level (is_low_stock index) or out of
+# stock with no reorder level above zero (out-of-stock index)
+GET_LOW_STOCK_LEVELS = """
+SELECT item_id, item_name, location, quantity, reorder_level
+FROM items
+WHERE is_low_stock = 1
+UNION ALL
+SELECT item_id, item_name, location, quantity, reorder_level
+FROM items
+WHERE quantity = 0 AND is_low_stock = 0
+"""
+
+GET_STOCK_LEVELS_CHANGED_SINCE = """
+SELECT item_id, item_name, location, quantity, reorder_level
+FROM items
+WHERE updated_at >= ?
+"""
+
+GET_OPEN_STOCK_ALERTS = """
+SELECT item_id, item_name, location, quantity, reorder_level, level, raised_at
+FROM stock_alerts
+WHERE cleared_at IS NULL
+ORDER BY raised_at DESC, alert_id DESC
+"""
+
+# Parameters: the alert columns, then item_id and level again; a second
+# terminal raising the same alert is a no-op
+RAISE_STOCK_ALERT = """
+INSERT INTO stock_alerts (item_id, item_name, location, quantity, reorder_level, level)
+SELECT ?, ?, ?, ?, ?, ?
+WHERE NOT EXISTS (
+    SELECT 1 FROM stock_alerts WHERE item_id = ? AND level = ? AND cleared_at IS NULL
+)
+"""
+
+# Closes the item's open alerts other than one at the given level
+CLEAR_STOCK_ALERTS = """
+UPDATE stock_alerts SET cleared_at = GETDATE()
+WHERE item_id = ? AND level <> ? AND cleared_at IS NULL
+"""
@@ -0,0 +1,355 @@
+"""
+Versioned schema and migrations for SyncBazar
+
+Each migration is applied once, in order, and recorded in schema_version.
+Statements are also written to be safe to re-run, so a migration that was
+interrupted part way can simply be applied again. Every migration has a
+SQL Server ('mssql') and a SQLite ('sqlite') variant so the same schema can
+be built offline for tests and benchmarks.
+
+Index design (v2):
+- items (item_name, item_id): GET_ALL_ITEMS ORDER BY item_name and keyset
+  paging seek on this instead of sorting the table
+- items (category), items (supplier): equality filters and group-bys;
+  leading-wildcard LIKE can still only scan, but scans the narrow index
+- items WHERE quantity = 0: filtered index for the out-of-stock count
+- items (is_low_stock): SQL Server filtered indexes cannot compare two
+  columns, so low stock is a persisted computed column with its own index
+  (SQLite gets a real partial index on the same column). The dashboard,
+  low-stock reports and the alert watcher filter on is_low_stock = 1, so
+  they need v2 (auto_migrate applies it at start-up)
+- activity_log (created_at DESC): GET_RECENT_ACTIVITY reads the first rows
+  of the index instead of sorting the whole log
+
+Change tracking (v3):
+- items (updated_at): GET_ITEMS_CHANGED_SINCE seeks the rows written after
+  a high-water mark
+- item_tombstones: an AFTER DELETE trigger records deleted item ids so
+  clients can drop them without reloading the list. Deletes purge the
+  ones older than QUERY_SETTINGS['tombstone_retention'] (a seek on
+  deleted_at); a poller whose mark is older than that reloads in full
+
+Per-shop reports (v4):
+- items (location, item_name, item_id): batch reports filter items by the
+  shop they are stocked at and list them by name, one seek per shop
+
+Stock alerts (v5):
+- stock_alerts: persistent list of low/out-of-stock alerts; an alert is
+  open until cleared_at is set
+- stock_alerts (item_id) WHERE cleared_at IS NULL: the open alerts are a
+  small slice of the history, looked up per item on every status change
+"""
+from database.queries import (CREATE_USERS_TABLE, CREATE_ITEMS_TABLE,
+                              CREATE_SHOPS_TABLE, CREATE_ACTIVITY_TABLE)
+
+
+CREATE_SCHEMA_VERSION_TABLE = {
+    'mssql': """
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='schema_version' AND xtype='U')
+CREATE TABLE schema_version (
+    version INT PRIMARY KEY,
+    description VARCHAR(200),
+    applied_at DATETIME DEFAULT GETDATE()
+)
+""",
+    'sqlite': """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(200),
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+""",
+}
+
+GET_SCHEMA_VERSION = "SELECT MAX(version) FROM schema_version"
+
+RECORD_SCHEMA_VERSION = "INSERT INTO schema_version (version, description) VALUES (?, ?)"
+
+SEED_DEFAULT_USER = {
+    'mssql': """
+IF NOT EXISTS (SELECT 1 FROM users WHERE username = 'admin')
+INSERT INTO users (username, password, full_name, email, role)
+VALUES ('admin', 'admin123', 'Administrator', 'admin@syncbazar.com', 'admin')
+""",
+    'sqlite': """
+INSERT OR IGNORE INTO users (username, password, full_name, email, role)
+VALUES ('admin', 'admin123', 'Administrator', 'admin@syncbazar.com', 'admin')
+""",
+}
+
+
+def _mssql_index(name, table, definition):
+    """CREATE INDEX guarded so it is skipped when the index already exists"""
+    return (
+        f"IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = '{name}' "
+        f"AND object_id = OBJECT_ID('{table}'))\n"
+        f"CREATE INDEX {name} ON {table} {definition}"
+    )
+
+
+# (version, description, {dialect: [statements]})
+MIGRATIONS = [
+    (1, "Base tables", {
+        'mssql': [
+            CREATE_USERS_TABLE,
+            CREATE_ITEMS_TABLE,
+            CREATE_SHOPS_TABLE,
+            CREATE_ACTIVITY_TABLE,
+            SEED_DEFAULT_USER['mssql'],
+        ],
+        'sqlite': [
+            """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(100) UNIQUE NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    full_name VARCHAR(200),
+    email VARCHAR(100),
+    role VARCHAR(50) DEFAULT 'staff',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_active BIT DEFAULT 1
+)
+""",
+            """
+CREATE TABLE IF NOT EXISTS items (
+    item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_name VARCHAR(200) NOT NULL,
+    category VARCHAR(100),
+    sku VARCHAR(50) UNIQUE,
+    quantity INT NOT NULL DEFAULT 0,
+    reorder_level INT DEFAULT 10,
+    unit_price DECIMAL(10,2) NOT NULL,
+    location VARCHAR(100),
+    supplier VARCHAR(200),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+""",
+            """
+CREATE TABLE IF NOT EXISTS shops (
+    shop_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shop_name VARCHAR(200) NOT NULL,
+    location VARCHAR(300),
+    manager_name VARCHAR(100),
+    phone VARCHAR(20),
+    email VARCHAR(100),
+    status VARCHAR(20) DEFAULT 'Active',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+""",
+            """
+CREATE TABLE IF NOT EXISTS activity_log (
+    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    activity_type VARCHAR(50),
+    description VARCHAR(500),
+    item_id INT,
+    quantity_changed INT,
+    user_id INT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+""",
+            SEED_DEFAULT_USER['sqlite'],
+        ],
+    }),
+    (2, "Indexes for hot queries", {
+        'mssql': [
+            """
+IF COL_LENGTH('items', 'is_low_stock') IS NULL
+ALTER TABLE items ADD is_low_stock AS
+    CAST(CASE WHEN quantity < reorder_level THEN 1 ELSE 0 END AS BIT) PERSISTED
+""",
+            _mssql_index('IX_items_name', 'items', "(item_name, item_id)"),
+            _mssql_index('IX_items_category', 'items', "(category)"),
+            _mssql_index('IX_items_supplier', 'items', "(supplier)"),
+            _mssql_index('IX_items_out_of_stock', 'items',
+                         "(item_id) INCLUDE (unit_price) WHERE quantity = 0"),
+            _mssql_index('IX_items_low_stock', 'items',
+                         "(is_low_stock) INCLUDE (quantity, reorder_level, unit_price)"),
+            _mssql_index('IX_activity_log_created_at', 'activity_log',
+                         "(created_at DESC) INCLUDE (description)"),
+        ],
+        'sqlite': [
+            """
+ALTER TABLE items ADD COLUMN is_low_stock INTEGER
+    GENERATED ALWAYS AS (CASE WHEN quantity < reorder_level THEN 1 ELSE 0 END) VIRTUAL
+""",
+            "CREATE INDEX IF NOT EXISTS IX_items_name ON items (item_name, item_id)",
+            "CREATE INDEX IF NOT EXISTS IX_items_category ON items (category)",
+            "CREATE INDEX IF NOT EXISTS IX_items_supplier ON items (supplier)",
+            "CREATE INDEX IF NOT EXISTS IX_items_out_of_stock ON items (item_id) "
+            "WHERE quantity = 0",
+            "CREATE INDEX IF NOT EXISTS IX_items_low_stock ON items (is_low_stock) "
+            "WHERE is_low_stock = 1",
+            "CREATE INDEX IF NOT EXISTS IX_activity_log_created_at "
+            "ON activity_log (created_at DESC)",
+        ],
+    }),
+    (3, "Item change tracking", {
+        'mssql': [
+            """
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='item_tombstones' AND xtype='U')
+CREATE TABLE item_tombstones (
+    tombstone_id INT IDENTITY(1,1) PRIMARY KEY,
+    item_id INT NOT NULL,
+    deleted_at DATETIME DEFAULT GETDATE()
+)
+""",
+            """
+IF OBJECT_ID('TR_items_tombstone', 'TR') IS NULL
+EXEC('CREATE TRIGGER TR_items_tombstone ON items AFTER DELETE AS
+      INSERT INTO item_tombstones (item_id) SELECT item_id FROM deleted')
+""",
+            _mssql_index('IX_items_updated_at', 'items', "(updated_at)"),
+            _mssql_index('IX_item_tombstones_deleted_at', 'item_tombstones',
+                         "(deleted_at) INCLUDE (item_id)"),
+        ],
+        'sqlite': [
+            """
+CREATE TABLE IF NOT EXISTS item_tombstones (
+    tombstone_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INT NOT NULL,
+    deleted_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+""",
+            """
+CREATE TRIGGER IF NOT EXISTS TR_items_tombstone AFTER DELETE ON items
+BEGIN
+    INSERT INTO item_tombstones (item_id) VALUES (OLD.item_id);
+END
+""",
+            "CREATE INDEX IF NOT EXISTS IX_items_updated_at ON items (updated_at)",
+            "CREATE INDEX IF NOT EXISTS IX_item_tombstones_deleted_at "
+            "ON item_tombstones (deleted_at)",
+        ],
+    }),
+    (4, "Per-shop report index", {
+        'mssql': [
+            _mssql_index('IX_items_location', 'items',
+                         "(location, item_name, item_id) INCLUDE (quantity, reorder_level)"),
+        ],
+        'sqlite': [
+            "CREATE INDEX IF NOT EXISTS IX_items_location "
+            "ON items (location, item_name, item_id)",
+        ],
+    }),
+    (5, "Stock alerts", {
+        'mssql': [
+            """
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='stock_alerts' AND xtype='U')
+CREATE TABLE stock_alerts (
+    alert_id INT IDENTITY(1,1) PRIMARY KEY,
+    item_id INT NOT NULL,
+    item_name VARCHAR(200),
+    location VARCHAR(100),
+    quantity INT,
+    reorder_level INT,
+    level TINYINT NOT NULL,
+    raised_at DATETIME DEFAULT GETDATE(),
+    cleared_at DATETIME NULL
+)
+""",
+            _mssql_index('IX_stock_alerts_open', 'stock_alerts',
+                         "(item_id) INCLUDE (level) WHERE cleared_at IS NULL"),
+        ],
+        'sqlite': [
+            """
+CREATE TABLE IF NOT EXISTS stock_alerts (
+    alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INT NOT NULL,
+    item_name VARCHAR(200),
+    location VARCHAR(100),
+    quantity INT,
+    reorder_level INT,
+    level TINYINT NOT NULL,
+    raised_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    cleared_at DATETIME NULL
+)
+""",
+            "CREATE INDEX IF NOT EXISTS IX_stock_alerts_open ON stock_alerts (item_id) "
+            "WHERE cleared_at IS NULL",
+        ],
+    }),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn, dialect='mssql'):
+    """Return the highest applied migration version (0 for a new database)"""
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SCHEMA_VERSION_TABLE[dialect])
+    _commit(conn)
+    cursor.execute(GET_SCHEMA_VERSION)
+    row = cursor.fetchone()
+    cursor.close()
+    return (row[0] or 0) if row else 0
+
+
+def migrate(conn, dialect='mssql', target=None):
+    """
+    Apply every pending migration up to ``target`` (default: latest).
+    
+    Works on any DB-API connection. Each migration runs in its own
+    transaction together with its schema_version row. Returns the list of
+    versions applied by this call.
+    """
+    if dialect not in CREATE_SCHEMA_VERSION_TABLE:
+        raise ValueError(f"Unknown schema dialect: {dialect}")
+    if target is None:
+        target = LATEST_VERSION
+    
+    applied = []
+    version = current_version(conn, dialect)
+    for number, description, statements in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        autocommit = _begin(conn)
+        try:
+            cursor = conn.cursor()
+            for statement in statements[dialect]:
+                if dialect == 'sqlite' and _sqlite_column_exists(cursor, statement):
+                    continue
+                cursor.execute(statement)
+            cursor.execute(RECORD_SCHEMA_VERSION, (number, description))
+            cursor.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            _end(conn, autocommit)
+        applied.append(number)
+    return applied
+
+
+def _begin(conn):
+    """Start an explicit transaction; returns the previous autocommit state"""
+    autocommit = getattr(conn, 'autocommit', None)
+    if autocommit is True:
+        conn.autocommit = False
+    elif autocommit is not False and not getattr(conn, 'in_transaction', True):
+        # sqlite3 does not open transactions for DDL on its own
+        conn.execute("BEGIN")
+    return autocommit
+
+
+def _end(conn, autocommit):
+    """Restore autocommit after _begin()"""
+    if autocommit is True:
+        conn.autocommit = True
+
+
+def _commit(conn):
+    """Commit unless the connection is already in autocommit mode"""
+    if getattr(conn, 'autocommit', None) is not True:
+        conn.commit()
+
+
+def _sqlite_column_exists(cursor, statement):
+    """SQLite has no ADD COLUMN IF NOT EXISTS, so check the table first"""
+    words = statement.split()
+    if words[:2] != ['ALTER', 'TABLE'] or words[3:5] != ['ADD', 'COLUMN']:
+        return False
+    table, column = words[2], words[5]
+    cursor.execute(f"SELECT name FROM pragma_table_xinfo('{table}')")
+    return any(row[0] == column for row in cursor.fetchall())
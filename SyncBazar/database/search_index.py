@@ -0,0 +1,178 @@
+"""
+In-memory trigram search index for SyncBazar
+
+Answers the same question as SEARCH_ITEMS -- "does the term appear anywhere
+in item_name, category, sku or supplier", case-insensitively -- without a
+full table scan on the server. Each field is split into overlapping
+three-character grams; a search looks up the rarest gram of the term and
+verifies only those candidates with a real substring test, so results are
+exact.
+
+Rows are held in an ItemStore and their folded text packed as UTF-8, so
+the index costs tens of bytes per item rather than a pyodbc Row and a
+string each. Posting lists are compact int arrays of store positions that
+are only ever appended to. When an item changes, its old postings are left
+behind and filtered out by the verification step; the index compacts
+itself once too many are stale.
+"""
+import threading
+from array import array
+from database.item_store import ItemStore, PackedStrings
+
+
+# Column positions in a SEARCH_ITEMS row
+SEARCH_FIELDS = (1, 2, 3, 7)   # item_name, category, sku, supplier
+NAME_FIELD = 1
+
+# Characters that are wildcards in a LIKE pattern
+LIKE_WILDCARDS = ('%', '_', '[')
+
+# Separates fields in the folded text so a match cannot span two fields
+_FIELD_SEP = '\x00'
+
+
+def trigrams(text):
+    """Return the set of three-character grams in text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def has_wildcards(term):
+    """True if term would behave differently as a LIKE pattern"""
+    return any(char in term for char in LIKE_WILDCARDS)
+
+
+def row_matches(row, needle, fields=SEARCH_FIELDS):
+    """True if the lowercase needle occurs in any search field of row"""
+    return any(row[i] is not None and needle in str(row[i]).lower() for i in fields)
+
+
+class TrigramIndex:
+    """Substring index over item rows, keyed by item_id"""
+    
+    def __init__(self, fields=SEARCH_FIELDS, name_field=NAME_FIELD):
+        self.fields = fields
+        self.name_field = name_field
+        self._store = ItemStore()
+        self._texts = PackedStrings()  # folded text by store position; None once removed
+        self._postings = {}
+        self._count = 0
+        self._entries = 0
+        self._stale = 0
+        self._lock = threading.RLock()
+    
+    def __len__(self):
+        return self._count
+    
+    def add_rows(self, rows):
+        """Index a batch of rows (e.g. one fetch_iter batch)"""
+        with self._lock:
+            for row in rows:
+                self._index(row)
+    
+    def upsert(self, row):
+        """Add a new row or replace the row with the same item_id"""
+        with self._lock:
+            self._drop(row[0])
+            self._index(row)
+            self._maybe_compact()
+    
+    def remove(self, item_id):
+        """Remove an item from the index"""
+        with self._lock:
+            if self._drop(item_id):
+                self._maybe_compact()
+    
+    def search(self, term):
+        """
+        Return rows whose fields contain term, ordered by item name.
+        
+        Matches SEARCH_ITEMS for plain terms. LIKE wildcards in the term are
+        treated literally here, so callers should send such terms to the
+        server instead.
+        """
+        needle = term.lower()
+        with self._lock:
+            if len(needle) < 3:
+                # Too short for a gram lookup; a scan of the folded text is
+                # still far cheaper than a server round trip
+                candidates = range(len(self._texts))
+            else:
+                postings = [self._postings.get(gram) for gram in trigrams(needle)]
+                if not all(postings):
+                    return []
+                candidates = set(min(postings, key=len))
+            
+            matches = []
+            for position in candidates:
+                text = self._texts[position]
+                if text is not None and needle in text:
+                    matches.append(self._row(position))
+        
+        matches.sort(key=lambda row: ((row[self.name_field] or '').lower(), row[0]))
+        return matches
+    
+    def stats(self):
+        """Return index size counters"""
+        with self._lock:
+            return {
+                'items': self._count,
+                'trigrams': len(self._postings),
+                'postings': self._entries,
+                'stale_postings': self._stale,
+            }
+    
+    def _row(self, position):
+        """Read a SEARCH_ITEMS-shaped row back from the store (lock held)"""
+        item_id, name, category, sku, quantity, _, price, location, supplier, _ = \
+            self._store.row(position)
+        return (item_id, name, category, sku, quantity, price, location, supplier)
+    
+    def _index(self, row):
+        """Add one row's postings (lock held)"""
+        item_id, name, category, sku, quantity, price, location, supplier = row
+        values = [str(row[i]).lower() for i in self.fields if row[i] is not None]
+        grams = set()
+        for value in values:
+            grams |= trigrams(value)
+        
+        stored = (item_id, name, category, sku, quantity, None, price, location, supplier, None)
+        position = self._store.position(item_id)
+        if position is None:
+            position = len(self._store)
+            self._store.append(stored)
+            self._texts.append(_FIELD_SEP.join(values))
+        else:
+            self._store.replace(position, stored)
+            self._texts[position] = _FIELD_SEP.join(values)
+        self._count += 1
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array('i')
+            posting.append(position)
+        self._entries += len(grams)
+    
+    def _drop(self, item_id):
+        """Forget a row; its postings become stale. Returns False if absent (lock held)"""
+        position = self._store.position(item_id)
+        text = self._texts[position] if position is not None else None
+        if text is None:
+            return False
+        self._texts[position] = None
+        self._count -= 1
+        grams = set()
+        for value in text.split(_FIELD_SEP):
+            grams |= trigrams(value)
+        self._stale += len(grams)
+        return True
+    
+    def _maybe_compact(self):
+        """Rebuild once more than half of the postings are stale (lock held)"""
+        if self._stale * 2 <= self._entries or self._entries < 1024:
+            return
+        rows = [self._row(position) for position in range(len(self._texts))
+                if self._texts[position] is not None]
+        self._store, self._texts, self._postings = ItemStore(), PackedStrings(), {}
+        self._count = self._entries = self._stale = 0
+        for row in rows:
+            self._index(row)
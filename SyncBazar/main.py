@@ -1,6 +1,7 @@
 """
 Main entry point for SyncBazar our inventory management system
 """
+from utils.startup import startup  # first, so the start-up clock starts here
 import tkinter as tk
 from views.login_window import LoginWindow
 
@@ -11,8 +12,8 @@ def main():
         # Create main window
         root = tk.Tk()
         
-        # Create login window
-        app = LoginWindow(root)
+        # Create login window; it connects in the background
+        app = LoginWindow(root, timer=startup)
         
         # Start the application
         root.mainloop()
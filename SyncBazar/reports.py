@@ -0,0 +1,88 @@
+"""
+Headless report export for SyncBazar (e.g. from a nightly scheduled task)
+
+Usage:
+    python reports.py inventory                 # reports/inventory_YYYYMMDD.csv
+    python reports.py all --format xlsx
+    python reports.py low_stock --output low_stock.csv
+    python reports.py batch --workers 4         # every report for every shop
+"""
+import argparse
+import datetime
+import os
+import sys
+from config import REPORT_SETTINGS
+from database.connection import db
+from controllers.report_controller import ReportController, REPORTS
+from utils.reports import available_formats
+
+
+def print_progress(done, total, unit="rows"):
+    """Progress on one line of stderr"""
+    if total:
+        sys.stderr.write(f"\r  {done:,} / {total:,} {unit} ({done / total * 100:.0f}%)")
+    else:
+        sys.stderr.write(f"\r  {done:,} {unit}")
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    """Export the requested reports; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Export SyncBazar reports without the GUI")
+    parser.add_argument('report', choices=sorted(REPORTS) + ['all', 'batch'])
+    parser.add_argument('--format', choices=available_formats(), default='csv')
+    parser.add_argument('--output', help="output file (single report only)")
+    parser.add_argument('--output-dir', help="output folder (default: reports/)")
+    parser.add_argument('--workers', type=int, help="batch worker processes (default: one per core)")
+    parser.add_argument('--quiet', action='store_true', help="no progress output")
+    args = parser.parse_args(argv)
+    
+    names = sorted(REPORTS) if args.report in ('all', 'batch') else [args.report]
+    if args.output and len(names) > 1:
+        parser.error("--output needs a single report; use --output-dir for 'all' and 'batch'")
+    
+    if not db.connect():
+        return 1
+    try:
+        if args.report == 'batch':
+            return run_batch(args)
+        return export_reports(args, names)
+    finally:
+        db.close()
+
+
+def export_reports(args, names):
+    """Export the named reports one after another"""
+    stamp = datetime.date.today().strftime("%Y%m%d")
+    failed = 0
+    for name in names:
+        path = args.output or ReportController.default_path(name, args.format,
+                                                             args.output_dir, stamp)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        
+        success, message = ReportController.export(
+            name, path, args.format, progress=None if args.quiet else print_progress)
+        if not args.quiet:
+            sys.stderr.write("\n")
+        print(f"{'✅' if success else '❌'} {message}")
+        failed += not success
+    return 1 if failed else 0
+
+
+def run_batch(args):
+    """Month-end batch: every report for every shop, in parallel"""
+    stamp = datetime.date.today().strftime("%Y%m%d")
+    folder = os.path.join(args.output_dir or REPORT_SETTINGS['output_dir'], f"batch_{stamp}")
+    summary = ReportController.run_batch(
+        folder, args.format, args.workers,
+        progress=None if args.quiet else lambda done, total: print_progress(done, total, "reports"))
+    if not args.quiet:
+        sys.stderr.write("\n")
+    print(ReportController.format_summary(summary))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
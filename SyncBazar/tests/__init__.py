@@ -0,0 +1,14 @@
+"""
+Tests run offline on the fake SQLite driver (database/fake_odbc.py) unless
+SYNCBAZAR_DB_BACKEND=pyodbc is set to test against a live SQL Server.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+if 'SYNCBAZAR_DB_BACKEND' not in os.environ:
+    os.environ['SYNCBAZAR_DB_BACKEND'] = 'fake'
+    _folder = tempfile.mkdtemp(prefix='syncbazar-tests-')
+    atexit.register(shutil.rmtree, _folder, ignore_errors=True)
+    os.environ.setdefault('SYNCBAZAR_FAKE_DB', os.path.join(_folder, 'syncbazar_tests.db'))
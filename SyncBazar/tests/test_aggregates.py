@@ -0,0 +1,106 @@
+"""
+Unit tests for the incrementally maintained dashboard aggregates
+"""
+import random
+import sqlite3
+import unittest
+from database import schema
+from database.aggregates import AggregateStore
+from database.queries import GET_DASHBOARD_STATS
+
+
+class TestAggregateStore(unittest.TestCase):
+    """Test deltas keep the store equal to a full GET_DASHBOARD_STATS recompute"""
+    
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        schema.migrate(self.conn, 'sqlite')
+        self.store = AggregateStore()
+        self.store.load(self.recompute())
+    
+    def tearDown(self):
+        self.conn.close()
+    
+    def recompute(self):
+        return self.conn.execute(GET_DASHBOARD_STATS).fetchone()
+    
+    def assert_matches_recompute(self):
+        items, shops, value, low, out = self.recompute()
+        stats = self.store.snapshot()
+        self.assertEqual(stats[:2] + stats[3:], (items, shops, low, out))
+        self.assertAlmostEqual(stats[2], value or 0, places=2)
+    
+    def test_random_writes_match_recompute(self):
+        """Inserts, updates and deletes applied as deltas match the query"""
+        rng = random.Random(7)
+        ids = []
+        for step in range(300):
+            action = rng.choice(['add', 'add', 'update', 'delete'] if ids else ['add'])
+            new = (rng.choice([0, 0, 3, 9, 10, 50]), 10, round(rng.uniform(1, 100), 2))
+            if action == 'add':
+                cursor = self.conn.execute(
+                    "INSERT INTO items (item_name, quantity, reorder_level, unit_price) "
+                    "VALUES (?, ?, ?, ?)", (f"Item {step}",) + new)
+                ids.append(cursor.lastrowid)
+                self.store.apply_item(new=new)
+                continue
+            
+            item_id = rng.choice(ids)
+            old = self.conn.execute(
+                "SELECT quantity, reorder_level, unit_price FROM items WHERE item_id = ?",
+                (item_id,)).fetchone()
+            if action == 'update':
+                self.conn.execute(
+                    "UPDATE items SET quantity = ?, reorder_level = ?, unit_price = ? "
+                    "WHERE item_id = ?", new + (item_id,))
+                self.store.apply_item(old=old, new=new)
+            else:
+                self.conn.execute("DELETE FROM items WHERE item_id = ?", (item_id,))
+                ids.remove(item_id)
+                self.store.apply_item(old=old)
+        
+        self.conn.execute("INSERT INTO shops (shop_name) VALUES ('Main Store')")
+        self.store.apply_shops(1)
+        self.assert_matches_recompute()
+    
+    def add_item(self, item):
+        self.conn.execute("INSERT INTO items (item_name, quantity, reorder_level, unit_price) "
+                          "VALUES ('Pen', ?, ?, ?)", item)
+        self.store.apply_item(new=item)
+    
+    def test_recompute_replays_deltas_since_it_started(self):
+        """Writes made while a recompute ran are applied on top of it"""
+        self.add_item((5, 10, 2.0))
+        generation = self.store.generation()
+        stale = self.recompute()
+        self.add_item((0, 10, 3.0))
+        self.store.apply_shops(1)
+        self.conn.execute("INSERT INTO shops (shop_name) VALUES ('Main Store')")
+        self.assertTrue(self.store.load(stale, generation))
+        self.assert_matches_recompute()
+    
+    def test_recompute_discarded_after_invalidate_or_overflow(self):
+        """A recompute is dropped when the writes since it cannot be replayed"""
+        generation = self.store.generation()
+        stale = self.recompute()
+        self.store.invalidate()
+        self.assertFalse(self.store.load(stale, generation))
+        
+        store = AggregateStore(max_replay=2)
+        generation = store.generation()
+        for _ in range(3):
+            store.apply_item(new=(5, 10, 2.0))
+        self.assertFalse(store.load(stale, generation))
+        self.assertTrue(store.load(stale, store.generation()))
+    
+    def test_invalidate_requires_reload(self):
+        """After invalidate() there is nothing to serve until the next load"""
+        self.store.invalidate()
+        self.assertIsNone(self.store.snapshot())
+        self.store.apply_item(new=(5, 10, 2.0))
+        self.assertIsNone(self.store.snapshot())
+        self.assertTrue(self.store.load(self.recompute(), self.store.generation()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Unit tests for low-stock alerts (state, persistent list and watcher)
+"""
+import datetime
+import sqlite3
+import threading
+import unittest
+from unittest import mock
+from database import schema
+from database.alerts import StockLevels, StockAlert
+from database.analytics import IN_STOCK, LOW_STOCK, OUT_OF_STOCK
+from database.queries import (GET_LOW_STOCK_LEVELS, GET_OPEN_STOCK_ALERTS,
+                              RAISE_STOCK_ALERT, CLEAR_STOCK_ALERTS)
+from controllers.alert_controller import AlertController, StockWatcher
+
+
+def level_row(item_id, quantity, reorder_level=10):
+    return (item_id, f'Item {item_id}', 'Main Store', quantity, reorder_level)
+
+
+class TestStockLevels(unittest.TestCase):
+    """Test that only real status changes raise alerts"""
+    
+    def setUp(self):
+        self.levels = StockLevels([level_row(1, 3), level_row(2, 0)])
+    
+    def test_load_tracks_low_items(self):
+        """Loaded rows are tracked with their status"""
+        self.assertEqual(len(self.levels), 2)
+        self.assertEqual(self.levels.level(1), LOW_STOCK)
+        self.assertEqual(self.levels.level(2), OUT_OF_STOCK)
+        self.assertEqual(self.levels.level(3), IN_STOCK)
+    
+    def test_crossings(self):
+        """Dropping below, running out and restocking each raise one alert"""
+        alerts = self.levels.update([level_row(3, 4), level_row(1, 0), level_row(2, 50)])
+        self.assertEqual([(a.item_id, a.previous, a.level) for a in alerts], [
+            (3, IN_STOCK, LOW_STOCK),
+            (1, LOW_STOCK, OUT_OF_STOCK),
+            (2, OUT_OF_STOCK, IN_STOCK),
+        ])
+        self.assertNotIn(2, self.levels)
+    
+    def test_unchanged_rows_are_silent(self):
+        """Rows re-read by the overlap or edited without a status change raise nothing"""
+        self.assertEqual(self.levels.update([level_row(1, 5), level_row(2, 0),
+                                             level_row(4, 80)]), [])
+        self.assertEqual(self.levels.alerts()[0].quantity, 5)
+    
+    def test_delete_clears(self):
+        """Deleting a tracked item clears its alert; other deletes are ignored"""
+        alerts = self.levels.update([], [1, 99])
+        self.assertEqual([(a.item_id, a.level) for a in alerts], [(1, IN_STOCK)])
+        self.assertEqual(len(self.levels), 1)
+
+
+class TestAlertQueries(unittest.TestCase):
+    """Test the persistent alert list on the SQLite schema"""
+    
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        schema.migrate(self.conn, 'sqlite')
+        self.conn.executemany(
+            "INSERT INTO items (item_id, item_name, location, quantity, reorder_level, "
+            "unit_price) VALUES (?, ?, ?, ?, ?, 1)",
+            [level_row(1, 3), level_row(2, 0), level_row(3, 40)])
+    
+    def tearDown(self):
+        self.conn.close()
+    
+    def record(self, alert):
+        # Mirrors AlertController.record(); SQLite spells GETDATE() differently
+        self.conn.execute(CLEAR_STOCK_ALERTS.replace("GETDATE()", "CURRENT_TIMESTAMP"),
+                          (alert.item_id, alert.level))
+        if alert.level != IN_STOCK:
+            self.conn.execute(RAISE_STOCK_ALERT, alert[:6] + (alert.item_id, alert.level))
+    
+    def open_alerts(self):
+        return [(row[0], row[5]) for row in self.conn.execute(GET_OPEN_STOCK_ALERTS)]
+    
+    def test_low_stock_levels_use_index(self):
+        """The watcher's first load reads only the low-stock rows, by index"""
+        rows = self.conn.execute(GET_LOW_STOCK_LEVELS).fetchall()
+        self.assertEqual(sorted(row[0] for row in rows), [1, 2])
+        plan = self.conn.execute("EXPLAIN QUERY PLAN " + GET_LOW_STOCK_LEVELS).fetchall()
+        self.assertIn('IX_items_low_stock', str(plan))
+    
+    def test_low_stock_levels_match_stock_status(self):
+        """The first load and the incremental feed agree on every item"""
+        self.conn.executemany(
+            "INSERT INTO items (item_id, item_name, location, quantity, reorder_level, "
+            "unit_price) VALUES (?, ?, ?, ?, ?, 1)",
+            [level_row(4, 0, 0), level_row(5, 0, None), level_row(6, 2, 0)])
+        loaded = StockLevels(self.conn.execute(GET_LOW_STOCK_LEVELS).fetchall())
+        fed = StockLevels()
+        fed.update(self.conn.execute(
+            "SELECT item_id, item_name, location, quantity, reorder_level FROM items"))
+        self.assertEqual(sorted(alert.item_id for alert in loaded.alerts()), [1, 2, 4, 5])
+        self.assertEqual(loaded.alerts(), fed.alerts())
+    
+    def test_raise_is_idempotent_and_level_changes_replace(self):
+        """Re-raising is a no-op; a new level closes the old alert"""
+        levels = StockLevels(self.conn.execute(GET_LOW_STOCK_LEVELS).fetchall())
+        for alert in levels.alerts() * 2:
+            self.record(alert)
+        self.assertEqual(sorted(self.open_alerts()), [(1, LOW_STOCK), (2, OUT_OF_STOCK)])
+        
+        for alert in levels.update([level_row(1, 0), level_row(2, 25)]):
+            self.record(alert)
+        self.assertEqual(self.open_alerts(), [(1, OUT_OF_STOCK)])
+        history = self.conn.execute("SELECT COUNT(*) FROM stock_alerts").fetchone()[0]
+        self.assertEqual(history, 3)
+    
+    def test_reconcile(self):
+        """Start-up fixes alerts that changed while no watcher ran"""
+        levels = StockLevels([level_row(1, 3), level_row(2, 0)])
+        recorded = [StockAlert(2, 'Item 2', '', 4, 10, LOW_STOCK, IN_STOCK),
+                    StockAlert(7, 'Item 7', '', 1, 10, LOW_STOCK, IN_STOCK)]
+        changes = AlertController.reconcile(levels, recorded)
+        self.assertEqual(sorted((a.item_id, a.level) for a in changes),
+                         [(1, LOW_STOCK), (2, OUT_OF_STOCK), (7, IN_STOCK)])
+
+
+class TestStockWatcher(unittest.TestCase):
+    """Test one watcher pass: seed, then changes only"""
+    
+    def test_check_publishes_changes(self):
+        now = datetime.datetime(2024, 1, 31, 12, 0, 0)
+        received = []
+        watcher = StockWatcher(interval=1, overlap=5)
+        unsubscribe = watcher.subscribe(received.append)
+        
+        with mock.patch.object(AlertController, 'get_low_stock_levels',
+                               return_value=(now, [level_row(1, 3)])), \
+                mock.patch.object(AlertController, 'get_open_alerts', return_value=[]), \
+                mock.patch.object(AlertController, 'get_stock_changes',
+                                  return_value=(now, [level_row(1, 3), level_row(5, 0)], [])) \
+                as changes, \
+                mock.patch.object(AlertController, 'record', return_value=True) as record:
+            self.assertEqual([a.item_id for a in watcher.check()], [1])
+            self.assertEqual(watcher.mark, now - datetime.timedelta(seconds=5))
+            
+            self.assertEqual([a.item_id for a in watcher.check()], [5])
+            changes.assert_called_once_with(now - datetime.timedelta(seconds=5))
+            
+            changes.return_value = None
+            self.assertEqual(watcher.check(), [])
+        
+        self.assertEqual(record.call_count, 2)
+        self.assertEqual([[a.item_id for a in batch] for batch in received], [[1], [5]])
+        unsubscribe()
+        watcher.publish([level_row(9, 0)])
+        self.assertEqual(len(received), 2)
+    
+    def test_stop_waits_for_the_pass_in_progress(self):
+        """stop() returns only once the thread is done with the connection"""
+        started, release = threading.Event(), threading.Event()
+        
+        def check():
+            started.set()
+            release.wait(5)
+            return []
+        
+        watcher = StockWatcher(interval=60)
+        with mock.patch.object(watcher, 'check', side_effect=check):
+            watcher.start()
+            self.assertTrue(started.wait(5))
+            self.assertFalse(watcher.stop(timeout=0.05))
+            release.set()
+            self.assertTrue(watcher.stop(timeout=5))
+        self.assertTrue(StockWatcher().stop())
+    
+    def test_failed_pass_keeps_the_thread_running(self):
+        """An unexpected error in one pass is logged and the next pass still runs"""
+        passes = threading.Semaphore(0)
+        calls = []
+        
+        def check():
+            calls.append(1)
+            passes.release()
+            if len(calls) == 1:
+                raise TypeError("bad row")
+            return []
+        
+        watcher = StockWatcher(interval=0.01)
+        with mock.patch.object(watcher, 'check', side_effect=check), \
+                mock.patch('builtins.print') as printed:
+            watcher.start()
+            self.assertTrue(passes.acquire(timeout=5) and passes.acquire(timeout=5))
+            self.assertTrue(watcher.stop(timeout=5))
+        printed.assert_any_call("❌ Stock watcher pass failed: bad row")
+
+
+if __name__ == '__main__':
+    unittest.main()
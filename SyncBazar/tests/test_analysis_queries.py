@@ -0,0 +1,112 @@
+"""
+Unit tests for the server-side inventory analysis queries (SQLite stand-in)
+"""
+import sqlite3
+import threading
+import unittest
+from unittest import mock
+from database import schema
+from database.analytics import analyze_rows
+from database.queries import (GET_ALL_ITEMS, GET_INVENTORY_SUMMARY, GET_TOP_VALUE_ITEMS,
+                              GET_CHANGE_MARKER)
+from controllers.analysis_controller import AnalysisController, GROUP_QUERIES
+from tests.test_analytics import random_rows
+
+
+class TestAnalysisQueries(unittest.TestCase):
+    """Test the aggregate queries give the same analysis as reading every row"""
+    
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        schema.migrate(self.conn, 'sqlite')
+        self.conn.executemany(
+            "INSERT INTO items (item_id, item_name, category, sku, quantity, reorder_level, "
+            "unit_price, location, supplier) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [row[:9] for row in random_rows(500)])
+    
+    def tearDown(self):
+        self.conn.close()
+    
+    def test_pushdown_matches_full_scan(self):
+        """Summary, group-bys and top items agree with analyze_rows()"""
+        summary = self.conn.execute(GET_INVENTORY_SUMMARY).fetchone()
+        groups = {column: self.conn.execute(query).fetchall()
+                  for column, query in GROUP_QUERIES.items()}
+        # SQLite spells TOP (n) as LIMIT n
+        top_query = GET_TOP_VALUE_ITEMS.replace("TOP (?) ", "") + "LIMIT ?"
+        top_items = self.conn.execute(top_query, (10,)).fetchall()
+        
+        actual = AnalysisController.build_analysis(summary, groups, top_items)
+        expected = analyze_rows([self.conn.execute(GET_ALL_ITEMS).fetchall()], 10)
+        
+        self.assertEqual(actual[:2] + actual[3:7], expected[:2] + expected[3:7])
+        self.assertAlmostEqual(actual.total_value, expected.total_value, places=6)
+        self.assertEqual([item[1:] for item in actual.top_items],
+                         [item[1:] for item in expected.top_items])
+        for column, rows in expected.groups.items():
+            self.assertEqual([row[:3] for row in actual.groups[column]],
+                             [row[:3] for row in rows])
+    
+    
+    def marker(self):
+        row = self.conn.execute(GET_CHANGE_MARKER).fetchone()
+        return {'items': tuple(row[:3]), 'shops': tuple(row[3:])}
+    
+    def test_change_marker_detects_each_kind_of_write(self):
+        """Inserts, updates, deletes and new shops each move their part only"""
+        changed = AnalysisController.changed_parts
+        writes = [
+            ("INSERT INTO items (item_id, item_name, unit_price) VALUES (1000, 'Ink', 2)", 'items'),
+            ("UPDATE items SET quantity = 99, updated_at = '2999-01-01' WHERE item_id = 1",
+             'items'),
+            ("DELETE FROM items WHERE item_id = 2", 'items'),
+            ("INSERT INTO shops (shop_name) VALUES ('Branch 9')", 'shops'),
+        ]
+        for statement, part in writes:
+            before = self.marker()
+            self.conn.execute(statement)
+            self.assertEqual(changed(before, self.marker()), {part}, statement)
+        self.assertEqual(changed(None, self.marker()), set())
+
+
+class TestSharedRefresh(unittest.TestCase):
+    """Test open windows share one recompute per change marker"""
+    
+    def setUp(self):
+        AnalysisController._refreshes.clear()
+    
+    def test_windows_share_one_refresh_per_marker(self):
+        marker = {'items': (1, 2, 3), 'shops': (4,)}
+        release = threading.Event()
+        
+        def slow_stats():
+            release.wait(5)
+            return ('stats',)
+        
+        with mock.patch('controllers.analysis_controller.DashboardController') as dashboard, \
+                mock.patch.object(AnalysisController, 'analyze_inventory',
+                                  return_value='analysis') as analyze:
+            dashboard.recompute.side_effect = slow_stats
+            results = []
+            windows = [threading.Thread(target=lambda: results.append(
+                AnalysisController.refresh({'items'}, marker, top=5))) for _ in range(3)]
+            for window in windows:
+                window.start()
+            release.set()
+            for window in windows:
+                window.join()
+            self.assertEqual(results, [(('stats',), 'analysis')] * 3)
+            self.assertEqual((dashboard.recompute.call_count, analyze.call_count), (1, 1))
+            
+            # A new marker recomputes; a failed recompute is not kept
+            dashboard.recompute.side_effect = None
+            dashboard.recompute.return_value = None
+            marker = {'items': (1, 2, 4), 'shops': (4,)}
+            self.assertEqual(AnalysisController.refresh({'items'}, marker, top=5),
+                             (None, 'analysis'))
+            AnalysisController.refresh({'shops'}, marker, top=5)
+            self.assertEqual((dashboard.recompute.call_count, analyze.call_count), (3, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
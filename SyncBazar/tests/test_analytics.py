@@ -0,0 +1,47 @@
+"""
+Unit tests for the vectorized inventory analytics
+"""
+import random
+import unittest
+from database.analytics import InventoryAnalytics, analyze_rows, load_numpy
+from database.item_store import ItemStore
+
+
+def random_rows(count, seed=3):
+    """Rows with many zero/low quantities and tied values"""
+    rng = random.Random(seed)
+    return [(item_id, f'Item {item_id}', rng.choice(['A', 'B', None]), f'SKU-{item_id}',
+             rng.choice([0, 0, 2, 5, 10, 40]), 5, rng.choice([1.0, 2.5, 10.0]),
+             rng.choice(['Main Store', 'Branch 1']), rng.choice(['Acme', None]), None)
+            for item_id in range(1, count + 1)]
+
+
+@unittest.skipIf(load_numpy() is None, "numpy is not installed")
+class TestInventoryAnalytics(unittest.TestCase):
+    """Test the NumPy engine gives the same analysis as the streaming pass"""
+    
+    def assert_same_analysis(self, rows, top=5):
+        expected = analyze_rows([rows], top)
+        actual = InventoryAnalytics(ItemStore.from_batches([rows])).analyze(top)
+        self.assertEqual(actual[:2], expected[:2])
+        self.assertAlmostEqual(actual.total_value, expected.total_value, places=6)
+        self.assertEqual(actual[3:7], expected[3:7])
+        for column, groups in expected.groups.items():
+            self.assertEqual([group[:3] for group in actual.groups[column]],
+                             [group[:3] for group in groups])
+    
+    def test_matches_streaming_analysis(self):
+        """Totals, statuses, groups and a tie-heavy top-K all agree"""
+        self.assert_same_analysis(random_rows(2000))
+        self.assert_same_analysis(random_rows(2000, seed=4), top=50)
+    
+    def test_small_and_empty_inputs(self):
+        """Fewer items than K, and no items at all"""
+        self.assert_same_analysis(random_rows(3))
+        analysis = InventoryAnalytics(ItemStore()).analyze()
+        self.assertEqual(analysis.total_items, 0)
+        self.assertEqual(analysis.top_items, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Unit tests for the offline benchmark suite and its synthetic catalog
+"""
+import unittest
+from collections import Counter
+from config import DB_CONFIG
+from benchmarks import catalog, suite
+
+
+class TestCatalog(unittest.TestCase):
+    """Test the generator is deterministic and skewed"""
+    
+    def test_same_seed_same_rows(self):
+        first = [row for batch in catalog.generate_items(500, seed=4) for row in batch]
+        again = [row for batch in catalog.generate_items(500, seed=4) for row in batch]
+        other = [row for batch in catalog.generate_items(500, seed=5) for row in batch]
+        self.assertEqual(first, again)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len({row[2] for row in first}), 500)
+    
+    def test_category_and_stock_mix(self):
+        rows = [row for batch in catalog.generate_items(5000) for row in batch]
+        categories = Counter(row[1] for row in rows).most_common()
+        self.assertEqual(categories[0][0], catalog.CATEGORIES[0])
+        self.assertGreater(categories[0][1], 4 * categories[-1][1])
+        out_of_stock = sum(1 for row in rows if row[3] == 0)
+        low_stock = sum(1 for row in rows if 0 < row[3] < row[4])
+        self.assertTrue(200 < out_of_stock < 400)
+        self.assertTrue(500 < low_stock < 900)
+    
+    def test_populate(self):
+        conn = catalog.open_catalog(300, shops=5, activity=100)
+        counts = [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('items', 'shops', 'activity_log')]
+        self.assertEqual(counts, [300, 5, 100])
+        conn.close()
+
+
+@unittest.skipUnless(DB_CONFIG['backend'] == 'fake', "needs the offline driver")
+class TestSuite(unittest.TestCase):
+    """Test a small run covers every scenario and comparisons flag regressions"""
+    
+    def test_run_small_catalog(self):
+        results = suite.run(items=400, shops=4, activity=50, bulk=100, repeat=1,
+                            echo=lambda text: None)
+        expected = set(suite.SCENARIOS)
+        if suite.load_numpy() is None:
+            expected.discard('analysis_numpy')
+        self.assertEqual(set(results['scenarios']), expected)
+        self.assertEqual(results['scenarios']['load_items']['rows'], 400)
+        self.assertEqual(results['scenarios']['load_items_page']['rows'], 200)
+        self.assertEqual(results['scenarios']['search_items']['rows'],
+                         results['scenarios']['search_index']['rows'])
+    
+    def test_run_restores_the_database(self):
+        """The suite leaves the application's db closed and pointed back at its file"""
+        database = suite.FAKE_DB_SETTINGS['database']
+        results = suite.run(items=50, shops=2, bulk=20, repeat=2, only=['bulk_insert'],
+                            echo=lambda text: None)
+        self.assertEqual(results['scenarios']['bulk_insert']['rows'], 20)
+        self.assertEqual(suite.FAKE_DB_SETTINGS['database'], database)
+        self.assertIsNone(suite.db.conn)
+        self.assertIsNone(suite.db.pool)
+    
+    def test_compare(self):
+        meta = {'items': 1}
+        baseline = {'meta': meta, 'scenarios': {
+            'slow': {'seconds': 0.100}, 'fast': {'seconds': 0.100},
+            'noise': {'seconds': 0.0010}, 'gone': {'seconds': 0.1}}}
+        current = {'meta': meta, 'scenarios': {
+            'slow': {'seconds': 0.150}, 'fast': {'seconds': 0.050},
+            'noise': {'seconds': 0.0025}, 'added': {'seconds': 0.1}}}
+        statuses = {row[0]: row[4] for row in suite.compare(baseline, current, tolerance=0.25)}
+        self.assertEqual(statuses, {'slow': 'regression', 'fast': 'improved', 'noise': 'ok',
+                                    'gone': 'missing', 'added': 'new'})
+        text = suite.format_comparison(suite.compare(baseline, current), baseline, current)
+        self.assertIn("slower", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
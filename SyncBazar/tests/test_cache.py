@@ -0,0 +1,83 @@
+"""
+Unit tests for the query result cache
+"""
+import unittest
+from database.cache import QueryCache, tables_read, tables_written
+from database.queries import (GET_ALL_ITEMS, GET_ALL_SHOPS, GET_DASHBOARD_STATS,
+                              ADD_ITEM, UPDATE_ITEM, DELETE_ITEM)
+
+
+class FakeClock:
+    """Manually advanced clock so TTLs can be tested instantly"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestQueryCache(unittest.TestCase):
+    """Test TTL expiry, LRU bound and table invalidation"""
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = QueryCache(max_rows=10, default_ttl=30, clock=self.clock)
+    
+    def test_table_extraction(self):
+        """Read and write tables are parsed from the app's queries"""
+        self.assertEqual(tables_read(GET_DASHBOARD_STATS), {'items', 'shops'})
+        self.assertEqual(tables_read(GET_ALL_SHOPS), {'shops'})
+        for query in (ADD_ITEM, UPDATE_ITEM, DELETE_ITEM):
+            self.assertEqual(tables_written(query), {'items'})
+        self.assertEqual(tables_written(GET_ALL_ITEMS), frozenset())
+        self.assertIsNone(tables_written("CREATE TABLE t (id INT)"))
+    
+    def test_hit_and_miss_counters(self):
+        """Lookups are counted as hits or misses"""
+        self.assertEqual(self.cache.get(GET_ALL_SHOPS), (False, None))
+        self.cache.put(GET_ALL_SHOPS, None, [('Main Store',)])
+        self.assertEqual(self.cache.get(GET_ALL_SHOPS), (True, [('Main Store',)]))
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+    
+    def test_ttl_expiry(self):
+        """Entries expire after their per-query TTL"""
+        cache = QueryCache(default_ttl=30, ttls={GET_ALL_SHOPS: 300}, clock=self.clock)
+        cache.put(GET_ALL_SHOPS, None, [1])
+        cache.put(GET_ALL_ITEMS, None, [2])
+        self.clock.now += 60
+        self.assertTrue(cache.get(GET_ALL_SHOPS)[0])
+        self.assertFalse(cache.get(GET_ALL_ITEMS)[0])
+    
+    def test_lru_row_budget(self):
+        """Least recently used entries are evicted past max_rows"""
+        self.cache.put("SELECT a FROM t1", None, list(range(6)))
+        self.cache.put("SELECT b FROM t2", None, list(range(3)))
+        self.cache.get("SELECT a FROM t1")
+        self.cache.put("SELECT c FROM t3", None, list(range(3)))
+        self.assertTrue(self.cache.get("SELECT a FROM t1")[0])
+        self.assertFalse(self.cache.get("SELECT b FROM t2")[0])
+        self.cache.put("SELECT d FROM t4", None, list(range(11)))
+        self.assertFalse(self.cache.get("SELECT d FROM t4")[0])
+    
+    def test_write_invalidates_dependent_reads(self):
+        """An item write drops item reads but keeps shop reads"""
+        self.cache.put(GET_ALL_ITEMS, None, [1])
+        self.cache.put(GET_DASHBOARD_STATS, None, (1, 1, 1, 0, 0))
+        self.cache.put(GET_ALL_SHOPS, None, [1])
+        self.cache.invalidate_query(UPDATE_ITEM)
+        self.assertFalse(self.cache.get(GET_ALL_ITEMS)[0])
+        self.assertFalse(self.cache.get(GET_DASHBOARD_STATS)[0])
+        self.assertTrue(self.cache.get(GET_ALL_SHOPS)[0])
+    
+    def test_stale_result_not_cached(self):
+        """A result read before a concurrent write is not stored"""
+        generation = self.cache.generation(GET_ALL_ITEMS)
+        self.cache.invalidate_query(ADD_ITEM)
+        self.cache.put(GET_ALL_ITEMS, None, [1], generation)
+        self.assertFalse(self.cache.get(GET_ALL_ITEMS)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for item change tracking (delta refresh of the item list)
+"""
+import sqlite3
+import unittest
+from database import schema
+from controllers.inventory_controller import ItemChangeTracker, ItemList
+
+
+def row(item_id, name, quantity=5):
+    return (item_id, name, 'General', f'SKU-{item_id}', quantity, 10, 1.0,
+            'Main Store', '', None)
+
+
+def change(item, previous_id, past_page=0):
+    """A GET_ITEMS_CHANGED_SINCE row"""
+    return item + (previous_id, past_page)
+
+
+class TestChangeTracking(unittest.TestCase):
+    """Test merging changed rows and tombstones into an ItemList"""
+    
+    def setUp(self):
+        self.items = ItemList()
+        self.items.add_page([row(1, 'Apple'), row(2, 'Banana'), row(3, 'Cherry'),
+                             row(4, 'Date')], ('Date', 4), False)
+    
+    def replay(self, view, operations):
+        """Apply merge() operations to a copy, as the treeview does"""
+        for operation in operations:
+            if operation[0] == 'delete':
+                view[:] = [item for item in view if item[0] != operation[1]]
+            elif operation[0] == 'insert':
+                view.insert(operation[1], operation[2])
+            else:
+                view[operation[1]] = operation[2]
+        return view
+    
+    def test_update_in_place(self):
+        """A row that keeps its position is updated, not moved"""
+        changed = row(2, 'Banana', quantity=0)
+        operations = ItemChangeTracker.merge(self.items, [change(changed, 1)], [])
+        self.assertEqual(operations, [('update', 1, changed)])
+        self.assertEqual(self.items[1], changed)
+    
+    def test_rename_insert_and_delete(self):
+        """Renamed, new and deleted rows are placed after their server predecessor"""
+        view = list(self.items)
+        changed = [change(row(5, 'blueberry'), 2), change(row(1, 'Elderberry'), 4)]
+        operations = ItemChangeTracker.merge(self.items, changed, [3, 99])
+        expected = [row(2, 'Banana'), row(5, 'blueberry'), row(4, 'Date'), row(1, 'Elderberry')]
+        self.assertEqual(list(self.items), expected)
+        self.assertEqual(self.replay(view, operations), expected)
+        self.assertEqual([self.items.index(item[0]) for item in expected], [0, 1, 2, 3])
+    
+    def test_rows_past_loaded_page_are_left_for_paging(self):
+        """Changes the server flags past_page are not inserted"""
+        view = list(self.items)
+        operations = ItemChangeTracker.merge(
+            self.items, [change(row(2, 'Yam'), 4, 1), change(row(5, 'Zucchini'), 2, 1)], [])
+        self.assertEqual([item[0] for item in self.items], [1, 3, 4])
+        self.assertEqual(self.replay(view, operations), list(self.items))
+    
+    def test_missing_predecessor_needs_reload(self):
+        """A predecessor the list does not have means it is out of date"""
+        self.assertIsNone(ItemChangeTracker.merge(self.items, [change(row(5, 'Fig'), 42)], []))
+    
+    def test_merge_is_idempotent(self):
+        """Rows re-read because of the mark overlap change nothing"""
+        changed = [change(row(5, 'Blueberry'), 2)]
+        ItemChangeTracker.merge(self.items, changed, [3])
+        snapshot = list(self.items)
+        ItemChangeTracker.merge(self.items, changed, [3])
+        self.assertEqual(list(self.items), snapshot)
+    
+    def test_inserts_renumber_ordinals(self):
+        """Repeated inserts at one spot stay findable by id"""
+        for item_id in range(100, 200):
+            self.items.insert(1, row(item_id, 'Apricot'))
+        self.assertEqual(self.items[1][0], 199)
+        for index, item in enumerate(self.items):
+            self.assertEqual(self.items.index(item[0]), index)
+    
+    def test_delete_trigger_records_tombstones(self):
+        """Deleting items leaves tombstones that can be read since a mark"""
+        conn = sqlite3.connect(":memory:")
+        schema.migrate(conn, 'sqlite')
+        conn.execute("INSERT INTO items (item_name, unit_price) VALUES ('Pen', 1), ('Ink', 2)")
+        mark = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+        conn.execute("DELETE FROM items WHERE item_name = 'Ink'")
+        deleted = conn.execute(
+            "SELECT item_id FROM item_tombstones WHERE deleted_at >= ?", (mark,)).fetchall()
+        changed = conn.execute(
+            "SELECT item_name FROM items WHERE updated_at >= ?", (mark,)).fetchall()
+        conn.close()
+        self.assertEqual(deleted, [(2,)])
+        self.assertEqual(changed, [('Pen',)])
+
+
+if __name__ == '__main__':
+    unittest.main()
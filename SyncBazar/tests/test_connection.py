@@ -0,0 +1,118 @@
+"""
+Unit tests for DatabaseConnection on the offline driver
+
+Covers execute_query, fetch_iter, execute_many and transaction() without a
+SQL Server; see tests/__init__.py for how the fake driver is selected.
+"""
+import threading
+import unittest
+from config import DB_CONFIG
+from database import connection
+from database.connection import DatabaseConnection
+
+
+CREATE_TABLE = "CREATE TABLE conn_test (id INT PRIMARY KEY, name VARCHAR(50))"
+INSERT = "INSERT INTO conn_test (id, name) VALUES (?, ?)"
+SELECT = "SELECT id, name FROM conn_test ORDER BY id"
+
+
+@unittest.skipUnless(DB_CONFIG['backend'] == 'fake', "needs the offline driver")
+class TestDatabaseConnection(unittest.TestCase):
+    """Test the connection helpers in pooled and single-connection mode"""
+    
+    def setUp(self):
+        self.db = DatabaseConnection(pooled=True)
+        self.assertTrue(self.db.connect())
+        self.db.execute_query("DROP TABLE IF EXISTS conn_test")
+        self.db.execute_query(CREATE_TABLE)
+    
+    def tearDown(self):
+        self.db.execute_query("DROP TABLE IF EXISTS conn_test")
+        self.db.close()
+    
+    def insert(self, count):
+        written, errors = self.db.execute_many(INSERT, [(n, f'row {n}') for n in range(count)])
+        self.assertEqual((written, errors), (count, []))
+    
+    def test_execute_query_returns_connection(self):
+        result = self.db.execute_query(INSERT, (1, 'one'))
+        self.assertEqual(result.rowcount, 1)
+        self.assertEqual(self.db.pool.stats()['in_use'], 0)
+        
+        result = self.db.execute_query(SELECT)
+        self.assertEqual([tuple(row) for row in result.rows], [(1, 'one')])
+        self.assertIsNone(self.db.execute_query("SELECT * FROM missing_table"))
+    
+    def test_fetch_iter(self):
+        self.insert(5)
+        batches = list(self.db.fetch_iter(SELECT, batch_size=2, cached=True))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(self.db.pool.stats()['in_use'], 0)
+        
+        # The replay comes from the cache until a write to the table
+        replay = list(self.db.fetch_iter(SELECT, batch_size=3, cached=True))
+        self.assertEqual([len(batch) for batch in replay], [3, 2])
+        self.db.execute_query(INSERT, (9, 'nine'))
+        rows = [row for batch in self.db.fetch_iter(SELECT, cached=True) for row in batch]
+        self.assertEqual(len(rows), 6)
+        
+        self.assertEqual(list(self.db.fetch_iter("SELECT * FROM missing_table")), [])
+        with self.assertRaises(connection.pyodbc.Error):
+            list(self.db.fetch_iter("SELECT * FROM missing_table", raise_errors=True))
+    
+    def test_execute_many_replays_failed_chunk(self):
+        rows = [(1, 'a'), (2, 'b'), (2, 'duplicate'), (3, 'c'), (4, 'd')]
+        written, errors = self.db.execute_many(INSERT, rows, chunk_size=2)
+        self.assertEqual(written, 4)
+        self.assertEqual([index for index, _ in errors], [2])
+        self.assertEqual(len(self.db.fetch_all(SELECT)), 4)
+        self.assertEqual(self.db.execute_many(INSERT, []), (0, []))
+    
+    def test_transaction(self):
+        with self.db.transaction():
+            self.db.execute_query(INSERT, (1, 'one'))
+            with self.db.transaction():
+                self.db.execute_many(INSERT, [(2, 'two'), (3, 'three')])
+        self.assertEqual(len(self.db.fetch_all(SELECT)), 3)
+        
+        with self.assertRaises(connection.pyodbc.Error):
+            with self.db.transaction():
+                self.db.execute_query(INSERT, (4, 'four'))
+                self.db.execute_many(INSERT, [(5, 'five'), (1, 'duplicate')])
+        self.assertEqual(len(self.db.fetch_all(SELECT)), 3)
+        self.assertFalse(self.db.in_transaction())
+        self.assertEqual(self.db.pool.stats()['in_use'], 0)
+    
+    def test_single_connection_mode(self):
+        self.db.close()
+        self.db = DatabaseConnection(pooled=False)
+        self.assertTrue(self.db.connect())
+        self.insert(3)
+        result = self.db.execute_query("DELETE FROM conn_test WHERE id > ?", (0,))
+        self.assertEqual(result.rowcount, 2)
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) FROM conn_test")[0], 1)
+    
+    def test_single_connection_stream_leaves_connection_free(self):
+        """Queries between streamed batches run, on this thread and others"""
+        self.db.close()
+        self.db = DatabaseConnection(pooled=False)
+        self.assertTrue(self.db.connect())
+        self.insert(3)
+        
+        stream = self.db.fetch_iter(SELECT, batch_size=1)
+        try:
+            self.assertEqual(len(next(stream)), 1)
+            self.assertEqual(self.db.fetch_one("SELECT COUNT(*) FROM conn_test")[0], 3)
+            counts = []
+            other = threading.Thread(target=lambda: counts.append(
+                self.db.fetch_one("SELECT COUNT(*) FROM conn_test")[0]), daemon=True)
+            other.start()
+            other.join(5)
+            self.assertEqual(counts, [3])
+            self.assertEqual(sum(len(batch) for batch in stream), 2)
+        finally:
+            stream.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,6 +41,39 @@ class TestDatabase(unittest.TestCase):
         result = self.db.fetch_one("SELECT 42 as answer")
         self.assertIsNotNone(result, "Should fetch one row")
         self.assertEqual(result[0], 42, "Should return correct value")
+    
+    
+    def test_fetch_iter(self):
+        """Test streaming results in batches"""
+        self.db.connect()
+        batches = list(self.db.fetch_iter(
+            "SELECT 1 as num UNION SELECT 2 UNION SELECT 3", batch_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 1],
+                         "Should stream 3 rows in batches of 2")
+
+    
+    def test_execute_many(self):
+        """Test bulk execution reports failing rows without aborting"""
+        self.db.connect()
+        self.db.execute_query("CREATE TABLE #bulk_test (id INT PRIMARY KEY)")
+        written, errors = self.db.execute_many(
+            "INSERT INTO #bulk_test (id) VALUES (?)",
+            [(1,), (2,), (2,), (3,)], chunk_size=2)
+        self.assertEqual(written, 3, "Should insert the 3 unique rows")
+        self.assertEqual([index for index, _ in errors], [2],
+                         "Should report only the duplicate row")
+
+    
+    def test_transaction_rollback(self):
+        """Test a failed transaction leaves no partial writes"""
+        self.db.connect()
+        self.db.execute_query("CREATE TABLE #tx_test (id INT PRIMARY KEY)")
+        with self.assertRaises(Exception):
+            with self.db.transaction():
+                self.db.execute_query("INSERT INTO #tx_test (id) VALUES (1)")
+                self.db.execute_query("INSERT INTO #tx_test (id) VALUES (1)")
+        result = self.db.fetch_one("SELECT COUNT(*) FROM #tx_test")
+        self.assertEqual(result[0], 0, "Rolled back insert should not persist")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,142 @@
+"""
+Unit tests for the fake SQLite-backed pyodbc driver
+"""
+import unittest
+from datetime import datetime
+from database import fake_odbc, schema
+from database.queries import (CREATE_ITEMS_TABLE, ADD_ITEM, ADD_ITEM_RETURNING_ID,
+                              GET_ITEMS_FIRST_PAGE, GET_ITEMS_PAGE_AFTER, GET_RECENT_ACTIVITY)
+
+
+ROWS = [(f'Item {n}', 'Grocery', f'SKU-{n}', n, 10, 1.5, 'Main Store', 'Supplier 1')
+        for n in range(1, 8)]
+
+
+class FakeSleep:
+    def __init__(self):
+        self.slept = 0.0
+    
+    def __call__(self, seconds):
+        self.slept += seconds
+
+
+def open_fake(**kwargs):
+    conn = fake_odbc.connect(database=':memory:', latency_ms=0, jitter_ms=0, **kwargs)
+    conn.autocommit = True
+    schema.migrate(conn, fake_odbc.SCHEMA_DIALECT)
+    return conn
+
+
+class TestTranslate(unittest.TestCase):
+    """Test the T-SQL rewrites"""
+    
+    def test_top_becomes_limit(self):
+        sql, params, _ = fake_odbc.translate(GET_ITEMS_PAGE_AFTER, (200, 'a', 'a', 5))
+        self.assertNotIn('TOP', sql)
+        self.assertTrue(sql.endswith('LIMIT ?'))
+        self.assertEqual(params, ('a', 'a', 5, 200))
+        sql, params, _ = fake_odbc.translate(GET_RECENT_ACTIVITY)
+        self.assertTrue(sql.endswith('LIMIT 5'))
+        self.assertEqual(params, ())
+    
+    def test_getdate_identity_and_output(self):
+        sql, _, returning = fake_odbc.translate(ADD_ITEM_RETURNING_ID)
+        self.assertEqual(returning, 'item_id')
+        self.assertNotIn('OUTPUT', sql)
+        _, check, statement = fake_odbc.split_condition(CREATE_ITEMS_TABLE)
+        sql, _, _ = fake_odbc.translate(statement)
+        self.assertIn('INTEGER PRIMARY KEY AUTOINCREMENT', sql)
+        self.assertNotIn('GETDATE', sql)
+        self.assertIn('sqlite_master', fake_odbc.translate(check)[0])
+    
+    def test_temp_tables(self):
+        sql, _, _ = fake_odbc.translate("CREATE TABLE #bulk_test (id INT PRIMARY KEY)")
+        self.assertEqual(sql, "CREATE TEMP TABLE bulk_test (id INT PRIMARY KEY)")
+        sql, _, _ = fake_odbc.translate("SELECT COUNT(*) FROM #bulk_test WHERE note <> '#1'")
+        self.assertEqual(sql, "SELECT COUNT(*) FROM bulk_test WHERE note <> '#1'")
+    
+    def test_unknown_condition_is_refused(self):
+        with self.assertRaises(fake_odbc.NotSupportedError):
+            fake_odbc.split_condition("IF COL_LENGTH('items', 'x') IS NULL ALTER TABLE items")
+
+
+class TestConnection(unittest.TestCase):
+    """Test the driver runs the application's queries like pyodbc would"""
+    
+    def setUp(self):
+        self.conn = open_fake()
+    
+    def tearDown(self):
+        self.conn.close()
+    
+    def test_guarded_create_runs_once(self):
+        cursor = self.conn.cursor()
+        cursor.execute(CREATE_ITEMS_TABLE)
+        cursor.execute(CREATE_ITEMS_TABLE)
+        self.conn.execute("DROP TABLE items")
+        cursor.execute(CREATE_ITEMS_TABLE)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM items").fetchone(), (0,))
+    
+    def test_paging_output_and_dates(self):
+        cursor = self.conn.cursor()
+        cursor.fast_executemany = True
+        cursor.executemany(ADD_ITEM, ROWS)
+        page = cursor.execute(GET_ITEMS_FIRST_PAGE, (3,)).fetchall()
+        self.assertEqual([row[1] for row in page], ['Item 1', 'Item 2', 'Item 3'])
+        self.assertIsInstance(page[0][9], datetime)
+        
+        last = page[-1]
+        page = cursor.execute(GET_ITEMS_PAGE_AFTER, 3, last[1], last[1], last[0]).fetchall()
+        self.assertEqual(page[0][1], 'Item 4')
+        
+        new_id = cursor.execute(ADD_ITEM_RETURNING_ID, ROWS[0][:2] + ('SKU-X',) + ROWS[0][3:])
+        self.assertEqual(new_id.fetchone(), (8,))
+        now = cursor.execute("SELECT GETDATE()").fetchone()[0]
+        self.assertIsInstance(now, datetime)
+    
+    def test_manual_commit_and_errors(self):
+        self.conn.autocommit = False
+        self.conn.execute(ADD_ITEM, ROWS[0])
+        self.conn.rollback()
+        self.conn.execute(ADD_ITEM, ROWS[1])
+        self.conn.commit()
+        self.conn.autocommit = True
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM items").fetchone(), (1,))
+        with self.assertRaises(fake_odbc.IntegrityError):
+            self.conn.execute(ADD_ITEM, ROWS[1])
+        self.assertTrue(issubclass(fake_odbc.IntegrityError, fake_odbc.Error))
+
+
+class TestLatency(unittest.TestCase):
+    """Test round trips are counted the way a network driver pays for them"""
+    
+    def test_round_trips(self):
+        conn = open_fake(rows_per_trip=3, connect_trips=0)
+        sleep = FakeSleep()
+        conn.latency = fake_odbc.Latency(10, sleep=sleep)
+        
+        cursor = conn.cursor()
+        cursor.executemany(ADD_ITEM, ROWS)
+        self.assertEqual(conn.latency.trips, 7)
+        cursor.fast_executemany = True
+        cursor.executemany(ADD_ITEM, [row[:2] + ('B' + row[2],) + row[3:] for row in ROWS])
+        self.assertEqual(conn.latency.trips, 8)
+        
+        # 14 rows in packets of 3: the execute carries the first, 4 more follow
+        self.assertEqual(len(cursor.execute("SELECT * FROM items").fetchall()), 14)
+        self.assertEqual(conn.latency.trips, 13)
+        self.assertAlmostEqual(sleep.slept, 0.13)
+        conn.close()
+    
+    def test_jitter_is_seeded(self):
+        delays = []
+        for _ in range(2):
+            sleep = FakeSleep()
+            fake_odbc.Latency(5, 20, seed=3, sleep=sleep).trip(10)
+            delays.append(sleep.slept)
+        self.assertEqual(delays[0], delays[1])
+        self.assertTrue(0.05 <= delays[0] <= 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
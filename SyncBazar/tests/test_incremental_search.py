@@ -0,0 +1,69 @@
+"""
+Unit tests for search-as-you-type refinement
+"""
+import unittest
+from controllers.search_controller import IncrementalSearch
+from database.search_index import row_matches
+
+
+ROWS = [
+    (1, 'Blue Pen', 'Stationery', 'SKU-10001', 120, 1.5, 'Main Store', 'Acme'),
+    (2, 'Desk Lamp', 'Furniture', 'SKU-10002', 4, 25.0, 'Main Store', 'Lumen Co'),
+    (3, 'Notebook', 'Stationery', 'SKU-20001', 0, 3.0, 'Branch 1', None),
+]
+
+
+class FakeClock:
+    """Manually advanced clock so result ages can be tested instantly"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestIncrementalSearch(unittest.TestCase):
+    """Test extended terms are answered from the previous results"""
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        self.session = IncrementalSearch(search=self.server_search, max_age=30, clock=self.clock)
+    
+    def server_search(self, term):
+        return [row for row in ROWS if row_matches(row, term.lower())]
+    
+    def test_typing_a_sku_searches_once(self):
+        """Each keystroke that extends the term is filtered locally"""
+        sku = 'SKU-10002'
+        for length in range(1, len(sku) + 1):
+            results = self.session.search(sku[:length])
+            self.assertEqual(results, self.server_search(sku[:length]))
+        self.assertEqual(self.session.searches, 1)
+        self.assertEqual([row[0] for row in results], [2])
+    
+    def test_new_term_goes_to_server(self):
+        """A term that does not extend the previous one is searched again"""
+        self.session.search('pen')
+        self.session.search('lamp')
+        self.session.search('pe')
+        self.assertEqual(self.session.searches, 3)
+    
+    def test_old_results_and_wildcards_not_refined(self):
+        """Expired result sets and LIKE wildcards force a real search"""
+        self.session.search('sku')
+        self.clock.now += 31
+        self.session.search('sku-1')
+        self.session.search('sku-1%')
+        self.assertEqual(self.session.searches, 3)
+    
+    def test_reset(self):
+        """reset() forgets the previous results"""
+        self.session.search('s')
+        self.session.reset()
+        self.session.search('st')
+        self.assertEqual(self.session.searches, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Unit tests for InventoryController on the offline driver
+"""
+import datetime
+import unittest
+from config import DB_CONFIG
+from database.connection import db
+from database.queries import ADD_ITEM
+from controllers.inventory_controller import InventoryController, ItemChangeTracker, ItemList
+
+
+def add(name):
+    db.execute_query(ADD_ITEM, (name, 'General', name.upper(), 3, 10, 1.5,
+                                'Main Store', 'Supplier 1'))
+    return db.fetch_one("SELECT item_id FROM items WHERE sku = ?", (name.upper(),))[0]
+
+
+@unittest.skipUnless(DB_CONFIG['backend'] == 'fake', "needs the offline driver")
+class TestInventoryController(unittest.TestCase):
+    """Test item lookups against a migrated offline database"""
+    
+    @classmethod
+    def setUpClass(cls):
+        db.connect()
+        db.migrate()
+    
+    @classmethod
+    def tearDownClass(cls):
+        db.execute_query("DELETE FROM items")
+        db.close()
+    
+    def setUp(self):
+        db.execute_query("DELETE FROM items")
+        db.execute_query("DELETE FROM item_tombstones")
+    
+    def load(self, page_size):
+        """Load the first page into an ItemList and take a change mark"""
+        tracker = ItemChangeTracker()
+        self.assertTrue(tracker.start())
+        rows = InventoryController.get_items_page(None, page_size)
+        items = ItemList()
+        last = rows[-1]
+        items.add_page(rows, (last[1], last[0]), len(rows) < page_size)
+        return tracker, items
+    
+    def test_get_item(self):
+        db.execute_query(ADD_ITEM, ('Pen', 'Stationery', 'PEN-1', 3, 10, 1.5,
+                                    'Main Store', 'Supplier 1'))
+        item_id = db.fetch_one("SELECT item_id FROM items WHERE sku = 'PEN-1'")[0]
+        item = InventoryController.get_item(item_id)
+        self.assertEqual((item[0], item[1], item[4]), (item_id, 'Pen', 3))
+        self.assertIsNone(InventoryController.get_item(item_id + 1000))
+    
+    def test_changes_follow_server_order(self):
+        """Merged changes land where the server's collation puts them"""
+        ids = {name: add(name) for name in ('apple', 'Banana', 'cherry', 'Date')}
+        tracker, items = self.load(page_size=10)
+        
+        item = InventoryController.get_item(ids['cherry'])
+        InventoryController.update_item(ids['cherry'], {'name': 'avocado', 'quantity': item[4]})
+        add('Fig')
+        InventoryController.delete_item(ids['Date'])
+        changed, deleted = tracker.poll()
+        self.assertIsNotNone(ItemChangeTracker.merge(items, changed, deleted))
+        
+        reloaded = InventoryController.get_items_page(None, 10)
+        self.assertEqual([row[:2] for row in items], [(row[0], row[1]) for row in reloaded])
+    
+    def test_changes_past_loaded_page(self):
+        """Rows after the last loaded one are left for the next page"""
+        ids = {name: add(name) for name in ('Apple', 'Banana', 'Cherry', 'Date')}
+        tracker, items = self.load(page_size=2)
+        InventoryController.update_item(ids['Apple'], {'name': 'Elderberry', 'quantity': 3})
+        add('Avocado')
+        
+        changed, deleted = tracker.poll(items.after)
+        ItemChangeTracker.merge(items, changed, deleted)
+        self.assertEqual([row[1] for row in items], ['Avocado', 'Banana'])
+    
+    def test_purge_tombstones(self):
+        """Old tombstones are purged and a mark older than them reloads"""
+        InventoryController.delete_item(add('Pen'))
+        db.execute_query("UPDATE item_tombstones SET deleted_at = ?",
+                         (datetime.datetime(2000, 1, 1),))
+        self.assertEqual(InventoryController.purge_tombstones(), 1)
+        
+        tracker = ItemChangeTracker()
+        tracker.mark = datetime.datetime(2000, 1, 1)
+        self.assertIsNone(tracker.poll())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Unit tests for the compact item store
+"""
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from database.item_store import ItemStore
+from benchmarks.item_store_memory import generate_batches, run
+
+
+ROWS = [
+    (1, 'Blue Pen', 'Stationery', 'PEN-001', 120, 10, Decimal('1.50'), 'Main Store', 'Acme',
+     datetime(2024, 3, 1, 9, 30, 15, 123000)),
+    (2, 'Café Table', 'Furniture', 'TBL-002', 4, 5, Decimal('99.99'), 'Branch 1', None, None),
+    (5, 'Notebook', 'Stationery', None, 0, 10, Decimal('3'), 'Main Store', 'Acme',
+     datetime(2023, 12, 31, 23, 59, 59)),
+]
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+    
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+class TestItemStore(unittest.TestCase):
+    """Test rows round-trip through the column arrays"""
+    
+    def test_rows_round_trip(self):
+        """Rows read back equal to what was stored (prices as floats)"""
+        store = ItemStore.from_cursor(FakeCursor(ROWS), batch_size=2)
+        self.assertEqual(len(store), 3)
+        for original, stored in zip(ROWS, store):
+            expected = original[:6] + (float(original[6]),) + original[7:]
+            self.assertEqual(stored, expected)
+    
+    def test_repeated_strings_are_interned(self):
+        """Each distinct category is stored once"""
+        store = ItemStore.from_batches([ROWS, ROWS])
+        self.assertEqual(store.category_pool.values, [None, 'Stationery', 'Furniture'])
+        self.assertEqual(store.supplier_pool.values, [None, 'Acme'])
+    
+    def test_lookup_and_replace(self):
+        """Items are found by id, and replacing one keeps the others intact"""
+        store = ItemStore.from_batches([ROWS])
+        self.assertIsNone(store.get(3))
+        self.assertEqual(store.position(5), 2)
+        changed = (5, 'Spiral Notebook', 'Paper', 'NB-005', 7, 10, 4.25, 'Branch 2', None, None)
+        store.replace(2, changed)
+        store.append((9, 'Ink', None, 'INK-9', 1, 1, 2.0, None, None, None))
+        self.assertEqual(store.get(5), changed)
+        self.assertEqual(store.get(9)[1], 'Ink')
+        self.assertEqual(store.get(1)[1], 'Blue Pen')
+        store.names.compact()
+        self.assertEqual(store.get(5)[1], 'Spiral Notebook')
+    
+    def test_appended_ids_stay_indexed(self):
+        """Appending ids past the position array grows it instead of rebuilding"""
+        store = ItemStore.from_batches([ROWS])
+        store.position(1)
+        for item_id in range(6, 3000):
+            store.append((item_id,) + ROWS[0][1:])
+        self.assertNotIsInstance(store._positions, dict)
+        self.assertEqual(store.position(2999), 2996)
+    
+    def test_sparse_ids(self):
+        """Very sparse ids fall back to a dict lookup"""
+        store = ItemStore.from_batches([[(10 ** 9,) + ROWS[0][1:]]])
+        self.assertEqual(store.position(10 ** 9), 0)
+    
+    def test_memory_is_a_fraction_of_rows(self):
+        """The store holds far less than the equivalent list of rows"""
+        result = run(5000)
+        # About 5x at any size (per-row costs dominate even at 5k items);
+        # 4x leaves room for allocator differences between Python builds
+        self.assertLess(result['store_bytes'] * 4, result['rows_bytes'])
+        self.assertEqual(len(ItemStore.from_batches(generate_batches(1234, 100))), 1234)
+
+
+if __name__ == '__main__':
+    unittest.main()
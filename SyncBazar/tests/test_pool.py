@@ -0,0 +1,106 @@
+"""
+Unit tests for the connection pool
+"""
+import sqlite3
+import threading
+import unittest
+from database.pool import ConnectionPool, PoolError, PoolTimeout
+
+
+class FakeClock:
+    """Manually advanced clock so idle timeouts can be tested instantly"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test pool checkout/checkin against in-memory SQLite connections"""
+
+    def setUp(self):
+        self.opened = []
+        self.clock = FakeClock()
+
+    def factory(self):
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.opened.append(conn)
+        return conn
+
+    def make_pool(self, **kwargs):
+        kwargs.setdefault('clock', self.clock)
+        return ConnectionPool(self.factory, **kwargs)
+
+    def test_reuses_connections(self):
+        """A returned connection is handed out again instead of a new one"""
+        pool = self.make_pool(size=2)
+        conn = pool.checkout()
+        pool.checkin(conn)
+        self.assertIs(pool.checkout(), conn)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_bounded_size(self):
+        """Checkout times out once every connection is in use"""
+        pool = self.make_pool(size=2, checkout_timeout=0)
+        pool.checkout()
+        pool.checkout()
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        self.assertEqual(pool.stats()['in_use'], 2)
+
+    def test_waiting_checkout_gets_returned_connection(self):
+        """A blocked checkout wakes up when another thread checks in"""
+        pool = ConnectionPool(self.factory, size=1, checkout_timeout=5)
+        conn = pool.checkout()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(pool.checkout()))
+        waiter.start()
+        pool.checkin(conn)
+        waiter.join(5)
+        self.assertEqual(result, [conn])
+
+    def test_idle_eviction(self):
+        """Connections idle past idle_timeout are closed and replaced"""
+        pool = self.make_pool(size=2, idle_timeout=60)
+        first = pool.checkout()
+        pool.checkin(first)
+        self.clock.now += 61
+        second = pool.checkout()
+        self.assertIsNot(first, second)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            first.execute("SELECT 1")
+
+    def test_dead_connection_replaced_on_checkout(self):
+        """A connection that fails the liveness ping is discarded"""
+        pool = self.make_pool(size=1, ping_after_idle=5)
+        first = pool.checkout()
+        pool.checkin(first)
+        first.close()
+        self.clock.now += 10
+        second = pool.checkout()
+        self.assertIsNot(first, second)
+        self.assertEqual(second.execute("SELECT 1").fetchone(), (1,))
+
+    def test_failed_factory_frees_slot(self):
+        """A factory error does not leak a pool slot"""
+        def broken():
+            raise sqlite3.OperationalError("server unreachable")
+
+        pool = ConnectionPool(broken, size=1)
+        with self.assertRaises(sqlite3.OperationalError):
+            pool.checkout()
+        self.assertEqual(pool.stats()['open'], 0)
+
+    def test_closed_pool_refuses_checkout(self):
+        """Checkout after close raises PoolError"""
+        pool = self.make_pool(size=1)
+        pool.warm()
+        pool.close()
+        with self.assertRaises(PoolError):
+            pool.checkout()
+
+
+if __name__ == '__main__':
+    unittest.main()
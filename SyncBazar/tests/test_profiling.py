@@ -0,0 +1,76 @@
+"""
+Unit tests for per-action profiling
+"""
+import os
+import pstats
+import tempfile
+import unittest
+from utils.profiling import ActionProfiler, task_name
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+class TestActionProfiler(unittest.TestCase):
+    """Test one .prof file and one log entry per outermost action"""
+    
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.folder.name, 'profiles')
+    
+    def tearDown(self):
+        self.folder.cleanup()
+    
+    def profiles(self):
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(name for name in os.listdir(self.output_dir) if name.endswith('.prof'))
+    
+    def test_disabled_writes_nothing(self):
+        profiler = ActionProfiler(enabled=False, output_dir=self.output_dir)
+        self.assertEqual(profiler.call('open_inventory', busy, 1000), busy(1000))
+        self.assertEqual(self.profiles(), [])
+    
+    def test_action_profile_and_log(self):
+        profiler = ActionProfiler(enabled=True, output_dir=self.output_dir, top=5)
+        # The nested action is part of the outer profile, not a file of its own
+        result = profiler.call('DashboardWindow.open_inventory',
+                               lambda: profiler.call('InventoryWindow.load_items', busy, 20000))
+        self.assertEqual(result, busy(20000))
+        
+        files = self.profiles()
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith('-DashboardWindow.open_inventory.prof'))
+        stats = pstats.Stats(os.path.join(self.output_dir, files[0]))
+        self.assertTrue(any(func[2] == 'busy' for func in stats.stats))
+        
+        with open(profiler.log_path, encoding='utf-8') as f:
+            log = f.read()
+        self.assertEqual(log.count('=== '), 1)
+        self.assertIn('DashboardWindow.open_inventory', log)
+        self.assertIn('busy', log)
+    
+    def test_fast_actions_and_errors(self):
+        profiler = ActionProfiler(enabled=True, output_dir=self.output_dir, min_ms=60000)
+        profiler.call('quick', busy, 10)
+        self.assertEqual(self.profiles(), [])
+        
+        profiler.min_ms = 0
+        with self.assertRaises(ZeroDivisionError):
+            profiler.call('failing', lambda: 1 / 0)
+        self.assertEqual(len(self.profiles()), 1)
+        # The thread is free to profile again after a failure
+        profiler.call('again', busy, 10)
+        self.assertEqual(len(self.profiles()), 2)
+    
+    def test_task_name(self):
+        def fetch_first_page():
+            pass
+        self.assertEqual(task_name(fetch_first_page),
+                         'task.TestActionProfiler.test_task_name.fetch_first_page')
+        self.assertEqual(task_name(busy), 'task.busy')
+
+
+if __name__ == '__main__':
+    unittest.main()
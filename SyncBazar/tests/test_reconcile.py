@@ -0,0 +1,133 @@
+"""
+Unit tests for diff-based Treeview refreshes
+"""
+import unittest
+from views.widgets import TreeReconciler, VirtualTreeview
+
+
+class FakeTree:
+    """Minimal ttk.Treeview stand-in that counts the calls made on it"""
+    
+    def __init__(self):
+        self.children = []
+        self.items = {}
+        self.calls = []
+    
+    def get_children(self, item=""):
+        return tuple(self.children)
+    
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        self.calls.append(('insert', iid))
+        position = len(self.children) if index == 'end' else index
+        self.children.insert(position, iid)
+        self.items[iid] = {'values': values, 'tags': tags}
+        return iid
+    
+    def item(self, iid, **options):
+        self.calls.append(('tags' if 'tags' in options else 'values', iid))
+        self.items[iid].update(options)
+    
+    def delete(self, *iids):
+        self.calls.append(('delete',) + iids)
+        for iid in iids:
+            self.children.remove(iid)
+            del self.items[iid]
+    
+    def set_children(self, parent, *iids):
+        self.calls.append(('reorder',))
+        self.children = list(iids)
+
+
+def shop(shop_id, name, status='Active'):
+    return (shop_id, name, status)
+
+
+def shop_values(row):
+    return row, ('flagged',) if row[2] != 'Active' else ()
+
+
+class TestTreeReconciler(unittest.TestCase):
+    """Test only changed rows are touched and the final tree matches the data"""
+    
+    def setUp(self):
+        self.tree = FakeTree()
+        self.reconciler = TreeReconciler(self.tree, shop_values)
+        self.shops = [shop(1, 'North'), shop(2, 'South'), shop(3, 'East')]
+        self.reconciler.apply(self.shops)
+        self.tree.calls = []
+    
+    def assert_shows(self, rows):
+        self.assertEqual(self.tree.children, [str(row[0]) for row in rows])
+        for row in rows:
+            self.assertEqual(self.tree.items[str(row[0])]['values'], row)
+    
+    def test_unchanged_refresh_touches_nothing(self):
+        """Re-applying the same rows makes no tree calls"""
+        self.assertEqual(self.reconciler.apply(list(self.shops)), (0, 0, 0))
+        self.assertEqual(self.tree.calls, [])
+    
+    def test_tags_only_rewritten_on_status_change(self):
+        """A renamed shop rewrites values; a status change also rewrites tags"""
+        rows = [shop(1, 'North Mall'), shop(2, 'South', 'Inactive'), shop(3, 'East')]
+        self.assertEqual(self.reconciler.apply(rows), (0, 2, 0))
+        self.assertEqual(self.tree.calls, [('values', '1'), ('tags', '2')])
+        self.assertEqual(self.tree.items['2']['tags'], ('flagged',))
+        self.assert_shows(rows)
+    
+    def test_insert_and_remove_in_place(self):
+        """New rows go straight to their index when the order is unchanged"""
+        rows = [shop(1, 'North'), shop(4, 'Central'), shop(3, 'East')]
+        self.assertEqual(self.reconciler.apply(rows), (1, 0, 1))
+        self.assertEqual(self.tree.calls, [('delete', '2'), ('insert', '4')])
+        self.assert_shows(rows)
+    
+    def test_reorder(self):
+        """Rows that moved are reordered in a single call"""
+        rows = [shop(3, 'East'), shop(5, 'West'), shop(1, 'North')]
+        self.reconciler.apply(rows)
+        self.assertEqual(self.tree.calls[-1], ('reorder',))
+        self.assert_shows(rows)
+
+
+
+class NoScanRows(list):
+    """Row list that fails the test if it is iterated end to end"""
+    
+    def __iter__(self):
+        raise AssertionError("rows were scanned")
+
+
+class TestVirtualTreeviewLookup(unittest.TestCase):
+    """Test cursor and selection lookups go through locate() when given"""
+    
+    def make_view(self):
+        # Only the row bookkeeping is exercised; drawing needs a display
+        view = VirtualTreeview.__new__(VirtualTreeview)
+        view.key = lambda row: row[0]
+        view.formatter = None
+        view.rows = []
+        view.locate = None
+        view.top = view.cursor = None
+        view.selected = set()
+        view.render = lambda: None
+        return view
+    
+    def rows(self, ids):
+        rows = NoScanRows((item_id, f'Item {item_id}') for item_id in ids)
+        where = {row[0]: index for index, row in enumerate(list.__iter__(rows))}
+        return rows, where.get
+    
+    def test_keep_position_and_selection(self):
+        view = self.make_view()
+        rows, locate = self.rows(range(1000))
+        view.set_rows(rows, locate=locate)
+        view.top, view.cursor, view.selected = 490, 500, {500, 20, 7000}
+        
+        rows, locate = self.rows([-3, -2, -1] + list(range(1000)))
+        view.set_rows(rows, keep_position=True, locate=locate)
+        self.assertEqual((view.top, view.cursor), (493, 503))
+        self.assertEqual([row[0] for row in view.selected_rows()], [20, 500])
+
+
+if __name__ == '__main__':
+    unittest.main()
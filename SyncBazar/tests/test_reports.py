@@ -0,0 +1,176 @@
+"""
+Unit tests for streaming report export (SQLite stand-in)
+"""
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from config import DB_CONFIG
+from database import schema
+from database.connection import db
+from database.queries import ADD_ITEM
+from controllers.report_controller import REPORTS, ReportController, JobResult
+from utils import reports
+from utils.reports import write_report, load_openpyxl
+from tests.test_analytics import random_rows
+
+
+def batches(cursor, size):
+    return iter(lambda: cursor.fetchmany(size), [])
+
+
+class TestReports(unittest.TestCase):
+    """Test reports stream every row and never leave partial files"""
+    
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        schema.migrate(self.conn, 'sqlite')
+        self.conn.executemany(
+            "INSERT INTO items (item_id, item_name, category, sku, quantity, reorder_level, "
+            "unit_price, location, supplier) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [row[:9] for row in random_rows(250)])
+        self.folder = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.conn.close()
+        self.folder.cleanup()
+    
+    def read_csv(self, path):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return list(csv.reader(f))
+    
+    def test_every_report_streams_to_csv(self):
+        """Each report writes its headers and one line per row, with progress"""
+        for name, (title, query, count_query, headers, formatter, *_) in REPORTS.items():
+            path = os.path.join(self.folder.name, f"{name}.csv")
+            total = self.conn.execute(count_query).fetchone()[0]
+            progress = []
+            rows = write_report(path, headers, batches(self.conn.execute(query), 40),
+                                formatter=formatter, total=total,
+                                progress=lambda done, total: progress.append(done))
+            lines = self.read_csv(path)
+            self.assertEqual(rows, total, name)
+            self.assertEqual(lines[0], list(headers))
+            self.assertEqual(len(lines), total + 1)
+            self.assertTrue(all(len(line) == len(headers) for line in lines))
+            self.assertEqual(progress[-1], total)
+    
+    def test_failed_export_leaves_no_file(self):
+        """An error mid-stream removes the partial output"""
+        path = os.path.join(self.folder.name, "broken.csv")
+        
+        def failing():
+            yield [(1, 'Pen')]
+            raise RuntimeError("connection lost")
+        
+        with self.assertRaises(RuntimeError):
+            write_report(path, ("Item ID", "Item Name"), failing())
+        self.assertEqual(os.listdir(self.folder.name), [])
+    
+    def test_shop_reports_only_include_that_shop(self):
+        """Per-shop queries filter on the shop's location"""
+        for name, report in REPORTS.items():
+            everything = self.conn.execute(report.count_query).fetchone()[0]
+            per_shop = [self.conn.execute(report.shop_count_query, (shop,)).fetchone()[0]
+                        for shop in ('Main Store', 'Branch 1')]
+            self.assertEqual(sum(per_shop), everything, name)
+            rows = self.conn.execute(report.shop_query, ('Branch 1',)).fetchall()
+            self.assertEqual(len(rows), per_shop[1])
+            self.assertTrue(all('Branch 1' in row for row in rows))
+    
+    def test_batch_jobs_and_summary(self):
+        """A batch has every report once overall and once per shop"""
+        jobs = ReportController.batch_jobs("out", [(1, 'Main Store'), (2, 'Branch/A')])
+        self.assertEqual(len(jobs), 3 * len(REPORTS))
+        self.assertIn(('inventory', 'Branch/A', os.path.join("out", "2_Branch_A", "inventory.csv")),
+                      jobs)
+        self.assertEqual(len({path for _, _, path in jobs}), len(jobs))
+        
+        results = [JobResult(report, shop, path, True, 10, 0.5, "") for report, shop, path in jobs]
+        text = ReportController.format_summary({
+            'jobs': results, 'failed': 0, 'elapsed': 1.5, 'job_seconds': 4.5, 'workers': 4})
+        self.assertIn("9 reports (0 failed)", text)
+        self.assertIn("3.0x", text)
+    
+    @unittest.skipIf(load_openpyxl() is None, "openpyxl is not installed")
+    def test_xlsx(self):
+        """XLSX output has the same rows"""
+        path = os.path.join(self.folder.name, "items.xlsx")
+        write_report(path, ("Item ID", "Item Name"), [[(1, 'Pen'), (2, 'Ink')]])
+        sheet = load_openpyxl().load_workbook(path).active
+        self.assertEqual(sheet.max_row, 3)
+    
+    def test_without_openpyxl(self):
+        """CSV reports work without openpyxl; XLSX fails with a clear error"""
+        with mock.patch.dict(sys.modules, {'openpyxl': None}), \
+                mock.patch.object(reports, 'openpyxl', None), \
+                mock.patch.object(reports, '_openpyxl_loaded', False), \
+                mock.patch('importlib.util.find_spec', return_value=None):
+            self.assertEqual(reports.available_formats(), ['csv'])
+            self.assertEqual(write_report(os.path.join(self.folder.name, "items.csv"),
+                                          ("Item ID",), [[(1,)]]), 1)
+            with self.assertRaisesRegex(RuntimeError, "require openpyxl"):
+                write_report(os.path.join(self.folder.name, "items.xlsx"), ("Item ID",), [])
+        self.assertFalse(os.path.exists(os.path.join(self.folder.name, "items.xlsx.part")))
+
+
+@unittest.skipUnless(DB_CONFIG['backend'] == 'fake', "needs the offline driver")
+class TestReportBatch(unittest.TestCase):
+    """Test a month-end batch in worker processes on the offline database"""
+    
+    @classmethod
+    def setUpClass(cls):
+        db.connect()
+        db.migrate()
+        db.execute_query("DELETE FROM items")
+        db.execute_many(ADD_ITEM, [(f'Item {n}', 'General', f'BATCH-{n}', n % 15, 10, 2.5,
+                                    'Main Store' if n % 3 else 'Branch 1', 'Supplier 1')
+                                   for n in range(60)])
+    
+    @classmethod
+    def tearDownClass(cls):
+        db.execute_query("DELETE FROM items")
+        db.close()
+    
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.folder.cleanup()
+    
+    def run_batch(self, shops=((1, 'Main Store'), (2, 'Branch 1'))):
+        return ReportController.run_batch(self.folder.name, workers=2, shops=shops)
+    
+    def test_run_batch_with_two_workers(self):
+        """Every job succeeds, and each shop's rows add up to the catalog"""
+        summary = self.run_batch()
+        self.assertEqual((summary['workers'], summary['failed']), (2, 0))
+        rows = {(job.report, job.shop): job.rows for job in summary['jobs']}
+        self.assertEqual(rows[('inventory', None)], 60)
+        for report in REPORTS:
+            self.assertEqual(rows[(report, 'Main Store')] + rows[(report, 'Branch 1')],
+                             rows[(report, None)], report)
+        self.assertTrue(os.path.exists(os.path.join(self.folder.name, 'summary.txt')))
+        self.assertEqual(summary['unmatched'], [])
+    
+    def test_shop_matching_no_items_is_flagged(self):
+        """A shop name no item location matches is reported, not silently empty"""
+        summary = self.run_batch([(1, 'Main Store'), (3, 'main store ')])
+        self.assertEqual(summary['unmatched'], ['main store '])
+        with open(os.path.join(self.folder.name, 'summary.txt'), encoding='utf-8') as f:
+            self.assertIn("No items have location 'main store '", f.read())
+    
+    def test_worker_without_connection_fails_its_jobs(self):
+        """A worker that cannot connect reports why instead of failing silently"""
+        missing = os.path.join(self.folder.name, 'missing', 'offline.db')
+        with mock.patch.dict(os.environ, {'SYNCBAZAR_FAKE_DB': missing}):
+            summary = self.run_batch()
+        self.assertEqual(summary['failed'], len(summary['jobs']))
+        self.assertIn("could not connect to the database", summary['jobs'][0].message)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Unit tests for schema migrations (SQLite stand-in)
+"""
+import sqlite3
+import unittest
+from database import schema
+from database.queries import (GET_DASHBOARD_STATS, GET_LOW_STOCK_REPORT, COUNT_LOW_STOCK_ITEMS,
+                              COUNT_LOW_STOCK_ITEMS_BY_LOCATION)
+
+
+class TestSchema(unittest.TestCase):
+    """Test migrations build the schema and indexes idempotently"""
+    
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+    
+    def tearDown(self):
+        self.conn.close()
+    
+    def index_names(self):
+        rows = self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'IX_%'")
+        return {row[0] for row in rows}
+    
+    def test_migrate_is_idempotent(self):
+        """Running migrate twice applies each version once"""
+        self.assertEqual(schema.migrate(self.conn, 'sqlite'),
+                         [number for number, _, _ in schema.MIGRATIONS])
+        self.assertEqual(schema.migrate(self.conn, 'sqlite'), [])
+        self.assertEqual(schema.current_version(self.conn, 'sqlite'), schema.LATEST_VERSION)
+    
+    def test_indexes_created(self):
+        """Every designed index exists after migration"""
+        schema.migrate(self.conn, 'sqlite')
+        self.assertTrue({
+            'IX_items_name', 'IX_items_category', 'IX_items_supplier',
+            'IX_items_out_of_stock', 'IX_items_low_stock', 'IX_activity_log_created_at',
+        } <= self.index_names())
+    
+    def test_low_stock_query_uses_index(self):
+        """The low-stock predicate is answered from its partial index"""
+        schema.migrate(self.conn, 'sqlite')
+        self.conn.execute(
+            "INSERT INTO items (item_name, quantity, reorder_level, unit_price) "
+            "VALUES ('Pen', 3, 10, 1.5), ('Desk', 40, 10, 99)")
+        rows = self.conn.execute(
+            "SELECT item_name FROM items WHERE is_low_stock = 1").fetchall()
+        self.assertEqual(rows, [('Pen',)])
+        plan = self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM items WHERE is_low_stock = 1").fetchall()
+        self.assertIn('IX_items_low_stock', str(plan))
+    
+    def test_partial_upgrade(self):
+        """Migrating to an older target then to latest applies the rest"""
+        self.assertEqual(schema.migrate(self.conn, 'sqlite', target=1), [1])
+        self.assertNotIn('IX_items_name', self.index_names())
+        self.assertEqual(schema.migrate(self.conn, 'sqlite')[0], 2)
+        self.assertIn('IX_items_name', self.index_names())
+    
+    def test_low_stock_reads_use_index(self):
+        """Dashboard and report low-stock reads go through IX_items_low_stock"""
+        schema.migrate(self.conn, 'sqlite')
+        self.conn.execute(
+            "INSERT INTO items (item_name, location, quantity, reorder_level, unit_price) "
+            "VALUES ('Pen', 'Main', 3, 10, 1.5), ('Desk', 'Main', 40, 10, 99), "
+            "('Ink', 'Annex', 0, 5, 4)")
+        self.assertEqual(self.conn.execute(GET_DASHBOARD_STATS).fetchone()[3:], (1, 1))
+        self.assertEqual(len(self.conn.execute(GET_LOW_STOCK_REPORT).fetchall()), 2)
+        self.assertEqual(self.conn.execute(COUNT_LOW_STOCK_ITEMS).fetchone(), (2,))
+        self.assertEqual(self.conn.execute(COUNT_LOW_STOCK_ITEMS_BY_LOCATION,
+                                           ('Annex',)).fetchone(), (1,))
+        for query in (GET_LOW_STOCK_REPORT, COUNT_LOW_STOCK_ITEMS):
+            plan = self.conn.execute("EXPLAIN QUERY PLAN " + query).fetchall()
+            self.assertIn('IX_items_low_stock', str(plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Unit tests for the in-memory trigram search index
+"""
+import unittest
+from unittest import mock
+from controllers.search_controller import SearchController
+from database.search_index import TrigramIndex
+
+
+ROWS = [
+    (1, 'Blue Pen', 'Stationery', 'PEN-001', 120, 1.5, 'Main Store', 'Acme'),
+    (2, 'desk lamp', 'Furniture', 'LMP-002', 4, 25.0, 'Main Store', 'Lumen Co'),
+    (3, 'Notebook', 'Stationery', 'NB-003', 0, 3.0, 'Branch 1', None),
+    (4, 'Pencil Case', 'Stationery', 'PC-004', 30, 4.5, 'Branch 1', 'Acme'),
+]
+
+
+def naive_search(rows, term):
+    """Reference semantics of SEARCH_ITEMS: LIKE '%term%' on four columns"""
+    needle = term.lower()
+    matches = [row for row in rows
+               if any(row[i] is not None and needle in str(row[i]).lower()
+                      for i in (1, 2, 3, 7))]
+    return sorted(matches, key=lambda row: (row[1].lower(), row[0]))
+
+
+class TestTrigramIndex(unittest.TestCase):
+    """Test the index returns exactly what the server query would"""
+    
+    def setUp(self):
+        self.index = TrigramIndex()
+        self.index.add_rows(ROWS)
+    
+    def test_matches_naive_search(self):
+        """Every term gives the same rows as a substring scan"""
+        for term in ('pen', 'PEN', 'stat', 'acme', 'lamp', 'nb-0', 'co', 'e', 'zzz', 'Blue Pen'):
+            self.assertEqual(self.index.search(term), naive_search(ROWS, term), term)
+    
+    def test_match_does_not_span_fields(self):
+        """A term made of the end of one field and the start of the next does not match"""
+        self.assertEqual(self.index.search('penstat'), [])
+    
+    def test_upsert_and_remove(self):
+        """Changed rows are found by their new values only"""
+        self.index.upsert((1, 'Red Marker', 'Stationery', 'MRK-001', 50, 2.0, 'Main Store', 'Acme'))
+        self.index.remove(3)
+        rows = [row for row in ROWS if row[0] not in (1, 3)]
+        rows.append((1, 'Red Marker', 'Stationery', 'MRK-001', 50, 2.0, 'Main Store', 'Acme'))
+        for term in ('pen', 'marker', 'note', 'stat'):
+            self.assertEqual(self.index.search(term), naive_search(rows, term), term)
+        self.assertEqual(len(self.index), 3)
+    
+    def test_compaction_drops_stale_postings(self):
+        """Repeated updates compact the postings instead of growing forever"""
+        for version in range(200):
+            self.index.upsert((2, f'desk lamp mk{version}', 'Furniture', 'LMP-002',
+                               4, 25.0, 'Main Store', 'Lumen Co'))
+        stats = self.index.stats()
+        self.assertLessEqual(stats['stale_postings'] * 2, max(stats['postings'], 1024))
+        self.assertEqual([row[0] for row in self.index.search('mk199')], [2])
+        self.assertEqual(self.index.search('mk198'), [])
+
+
+
+class TestIndexBuild(unittest.TestCase):
+    """Test a build never installs a snapshot older than an invalidation"""
+    
+    def setUp(self):
+        SearchController.invalidate()
+    
+    def tearDown(self):
+        SearchController.invalidate()
+    
+    def build(self, snapshot):
+        with SearchController._lock:
+            SearchController._building = True
+            SearchController._pending = []
+            generation = SearchController._generation
+        with mock.patch('controllers.search_controller.db') as db:
+            db.fetch_iter.side_effect = lambda *args, **kwargs: snapshot()
+            SearchController._build(generation)
+    
+    def test_build_installs_index(self):
+        self.build(lambda: iter([ROWS]))
+        self.assertEqual(len(SearchController._index), len(ROWS))
+        self.assertFalse(SearchController._building)
+    
+    def test_invalidation_during_build_discards_it(self):
+        def snapshot():
+            yield ROWS
+            SearchController.invalidate()  # a bulk write lands mid-build
+        
+        self.build(snapshot)
+        self.assertIsNone(SearchController._index)
+        self.assertFalse(SearchController._building)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Unit tests for start-up timing and lazy imports
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from utils.startup import StartupTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestStartup(unittest.TestCase):
+    """Test milestones are recorded once and logged once"""
+    
+    def test_marks_and_log(self):
+        clock = FakeClock()
+        timer = StartupTimer(clock)
+        clock.now = 100.25
+        self.assertEqual(timer.mark('window'), 0.25)
+        clock.now = 101.5
+        timer.mark('connected')
+        timer.mark('window')
+        self.assertEqual(timer.summary(), "window=0.250s connected=1.500s")
+        
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'startup.log')
+            timer.finish(path)
+            timer.finish(path)
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].rstrip().endswith("window=0.250s connected=1.500s"))
+    
+    def test_login_window_imports_stay_light(self):
+        """The login window and stock helpers load neither the database driver nor NumPy"""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = ("import sys, views.login_window, database.alerts; "
+                "print(sorted(m for m in ('pyodbc', 'database.connection', 'numpy') "
+                "if m in sys.modules))")
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, check=True,
+                                capture_output=True, text=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Unit tests for the background task runner
+"""
+import threading
+import time
+import unittest
+from utils.task_runner import TaskRunner, Debouncer
+
+
+class FakeWidget:
+    """Records after() callbacks so the test can play the Tk event loop"""
+    
+    def __init__(self):
+        self.callbacks = []
+        self.bindings = {}
+    
+    def after(self, ms, func):
+        self.callbacks.append(func)
+        return func
+    
+    def after_cancel(self, after_id):
+        self.callbacks.remove(after_id)
+    
+    def bind(self, sequence, func, add=None):
+        self.bindings[sequence] = func
+    
+    def pump(self, timeout=2.0):
+        """Run after() callbacks until none are scheduled"""
+        deadline = time.monotonic() + timeout
+        while self.callbacks and time.monotonic() < deadline:
+            callback = self.callbacks.pop(0)
+            callback()
+            time.sleep(0.005)
+
+
+class TestTaskRunner(unittest.TestCase):
+    """Test results, errors and cancellation are delivered on the polling thread"""
+    
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.busy = []
+        self.runner = TaskRunner(self.widget, on_busy=self.busy.append, poll_interval=1)
+    
+    def test_result_delivered_on_calling_thread(self):
+        """on_success runs from after(), not on the worker"""
+        results = []
+        self.runner.submit(lambda x: (x * 2, threading.current_thread()), 21,
+                           on_success=results.append)
+        self.widget.pump()
+        self.assertEqual(results[0][0], 42)
+        self.assertIsNot(results[0][1], threading.current_thread())
+        self.assertEqual(self.busy, [True, False])
+    
+    def test_error_propagation(self):
+        """Exceptions raised on the worker reach on_error"""
+        errors = []
+        self.runner.submit(lambda: 1 / 0, on_error=errors.append)
+        self.widget.pump()
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+    
+    def test_same_key_replaces_previous_task(self):
+        """Only the latest task for a key delivers its result"""
+        results = []
+        release = threading.Event()
+        self.runner.submit(lambda: release.wait(1) and 'old', on_success=results.append,
+                           key='search')
+        self.runner.submit(lambda: 'new', on_success=results.append, key='search')
+        release.set()
+        self.widget.pump()
+        time.sleep(0.05)
+        self.widget.pump()
+        self.assertEqual(results, ['new'])
+        self.assertFalse(self.runner.busy)
+    
+    def test_cancel_all(self):
+        """Cancelled tasks never call back"""
+        results = []
+        self.runner.submit(time.sleep, 0.01, on_success=results.append)
+        self.runner.cancel_all()
+        time.sleep(0.05)
+        self.widget.pump()
+        self.assertEqual(results, [])
+        self.assertEqual(self.busy, [True, False])
+    
+    def test_progress_reported_then_result(self):
+        """Progress reaches on_progress in order, before the result"""
+        events = []
+        
+        def job(progress):
+            for done in (1, 2, 3):
+                progress(done, 3)
+            return 'done'
+        
+        self.runner.submit(job, on_progress=lambda done, total: events.append((done, total)),
+                           on_success=events.append)
+        self.widget.pump()
+        self.assertEqual(events, [(1, 3), (2, 3), (3, 3), 'done'])
+    
+    def test_cancelled_task_stops_at_next_progress(self):
+        """progress() raises once the task is cancelled"""
+        started, stopped = threading.Event(), threading.Event()
+        
+        def job(progress):
+            started.set()
+            try:
+                while True:
+                    progress()
+                    time.sleep(0.001)
+            finally:
+                stopped.set()
+        
+        self.runner.submit(job, on_progress=lambda: None, key='report')
+        started.wait(1)
+        self.runner.cancel('report')
+        self.assertTrue(stopped.wait(1))
+    
+    def test_debouncer_runs_once_per_burst(self):
+        """Only the last call in a burst fires"""
+        calls = []
+        debouncer = Debouncer(self.widget, 250, lambda: calls.append(1))
+        for _ in range(10):
+            debouncer.call()
+        self.assertEqual(len(self.widget.callbacks), 1)
+        self.widget.pump()
+        self.assertEqual(calls, [1])
+        debouncer.call()
+        debouncer.flush()
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(self.widget.callbacks, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Opt-in cProfile capture for UI actions
+
+With PROFILE_SETTINGS enabled (or SYNCBAZAR_PROFILE=1 in the environment)
+every action wrapped with @profiled -- the dashboard's open_* buttons and
+the views' load and search handlers -- and every background task run by a
+TaskRunner is profiled on its own. Each run slower than min_ms leaves one
+.prof file in output_dir (open it with pstats or snakeviz) and appends the
+top functions to the profile log, so a field machine can send back real
+profiles without code changes.
+
+Only the outermost action on a thread is profiled; nested ones are part of
+its profile. On Python 3.12+ only one profiler can be active at a time, so
+an action starting while another is profiled runs unprofiled.
+"""
+import cProfile
+import datetime
+import functools
+import io
+import os
+import pstats
+import re
+import threading
+import time
+
+from config import PROFILE_SETTINGS
+
+
+# Characters not kept in .prof file names
+_UNSAFE = re.compile(r'[^\w.-]+')
+
+
+class ActionProfiler:
+    """Profiles named actions and saves one .prof file per run"""
+    
+    def __init__(self, enabled=False, output_dir='profiles', top=25, sort='cumulative',
+                 log_path=None, min_ms=0):
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.top = top
+        self.sort = sort
+        self.log_path = log_path or os.path.join(output_dir, 'profile.log')
+        self.min_ms = min_ms
+        self._local = threading.local()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_settings(cls, settings=PROFILE_SETTINGS):
+        """Build the profiler from PROFILE_SETTINGS and the environment"""
+        enabled = os.environ.get('SYNCBAZAR_PROFILE', '').lower()
+        return cls(enabled=settings['enabled'] or enabled not in ('', '0', 'false', 'no'),
+                   output_dir=settings['output_dir'], top=settings['top'],
+                   sort=settings['sort'], log_path=settings['log'], min_ms=settings['min_ms'])
+    
+    def call(self, name, func, *args, **kwargs):
+        """Return func(*args, **kwargs), profiled as name when enabled"""
+        if not self.enabled or getattr(self._local, 'active', False):
+            return func(*args, **kwargs)
+        
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another thread's profile is running (Python 3.12+)
+            return func(*args, **kwargs)
+        self._local.active = True
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._local.active = False
+            self.save(name, profile, time.perf_counter() - started)
+    
+    def save(self, name, profile, seconds):
+        """Write the .prof file and log its summary; returns the path or None"""
+        if seconds * 1000 < self.min_ms:
+            return None
+        stamp = datetime.datetime.now()
+        filename = f"{stamp:%Y%m%d-%H%M%S-%f}-{_UNSAFE.sub('_', name)}.prof"
+        path = os.path.join(self.output_dir, filename)
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            profile.dump_stats(path)
+            with self._lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(f"=== {stamp.isoformat(timespec='seconds')} {name} "
+                        f"{seconds:.3f}s {path}\n{self.summary(profile)}\n")
+        except OSError as e:
+            print(f"❌ Failed to save profile for {name}: {e}")
+            return None
+        return path
+    
+    def summary(self, profile):
+        """Return the top functions of a profile as text"""
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats(self.sort).print_stats(self.top)
+        return stream.getvalue().strip('\n')
+
+
+def task_name(func):
+    """Profile name for a background task, e.g. 'task.ItemPager.next_page'"""
+    name = getattr(func, '__qualname__', None) or type(func).__name__
+    return f"task.{name.replace('<locals>.', '')}"
+
+
+def profiled(name=None):
+    """Decorator: profile each call as name (default: the function's qualname)"""
+    def decorate(func):
+        label = name or func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return profiler.call(label, func, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# The process-wide profiler used by @profiled and TaskRunner
+profiler = ActionProfiler.from_settings()
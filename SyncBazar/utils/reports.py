@@ -0,0 +1,117 @@
+"""
+Streaming report writers for SyncBazar
+
+write_report() copies row batches (e.g. from db.fetch_iter, which pulls
+them with fetchmany) straight into a file, so only one batch is in memory
+however large the report is. CSV is always available; XLSX needs openpyxl,
+whose write-only workbook also streams rows to disk. openpyxl is imported
+on first use (load_openpyxl), so CSV reports never touch it.
+
+Reports are written to a temporary file next to the target and renamed
+into place when complete, so a failed or cancelled export never leaves a
+half-written report behind.
+"""
+import csv
+import importlib.util
+import os
+
+
+# Set by load_openpyxl(); stays None if openpyxl is not installed
+openpyxl = None
+_openpyxl_loaded = False
+
+
+def load_openpyxl():
+    """Import openpyxl if it has not been yet; returns the module or None"""
+    global openpyxl, _openpyxl_loaded
+    if not _openpyxl_loaded:
+        try:
+            import openpyxl as module
+            openpyxl = module
+        except ImportError:  # optional; only needed for .xlsx reports
+            pass
+        _openpyxl_loaded = True
+    return openpyxl
+
+
+class CsvReportWriter:
+    """Writes rows to a CSV file (UTF-8 with BOM so Excel detects it)"""
+    
+    def __init__(self, path, title=None):
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+    
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+    
+    def close(self):
+        self.file.close()
+
+
+class XlsxReportWriter:
+    """Writes rows to an XLSX sheet with openpyxl's write-only workbook"""
+    
+    def __init__(self, path, title=None):
+        if load_openpyxl() is None:
+            raise RuntimeError("XLSX reports require openpyxl (pip install openpyxl)")
+        self.path = path
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title=(title or "Report")[:31])
+    
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+    
+    def close(self):
+        self.workbook.save(self.path)
+
+
+WRITERS = {
+    'csv': CsvReportWriter,
+    'xlsx': XlsxReportWriter,
+}
+
+
+def available_formats():
+    """Return the report formats that can be written here (without importing openpyxl)"""
+    has_openpyxl = openpyxl is not None or importlib.util.find_spec('openpyxl') is not None
+    return [fmt for fmt in WRITERS if fmt != 'xlsx' or has_openpyxl]
+
+
+def format_for(path):
+    """Pick the report format from a file name (CSV if unknown)"""
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return extension if extension in WRITERS else 'csv'
+
+
+def write_report(path, headers, batches, fmt=None, formatter=None, title=None,
+                 total=None, progress=None):
+    """
+    Stream row batches into a report file and return the number of rows
+    
+    formatter(row) may turn each database row into the output row.
+    progress(done, total) is called after every batch; total may be None.
+    """
+    fmt = fmt or format_for(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    
+    temp_path = f"{path}.part"
+    done = 0
+    try:
+        writer = WRITERS[fmt](temp_path, title)
+        try:
+            writer.write_rows([headers])
+            for batch in batches:
+                writer.write_rows(batch if formatter is None else map(formatter, batch))
+                done += len(batch)
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            writer.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return done
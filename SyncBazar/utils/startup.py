@@ -0,0 +1,68 @@
+"""
+Start-up timing for SyncBazar
+
+main.py imports this module before anything else, so its clock starts as
+close to process start as Python code can get. The login window marks the
+milestones of a cold start:
+
+- window: the login form has been drawn
+- connected: the database connection is open (and migrated, pool warmed)
+- interactive: both of the above, so the user can log in
+
+With STARTUP_SETTINGS timing_log set (or the SYNCBAZAR_STARTUP_LOG
+environment variable) one line per start is appended to that file, so
+start-up times on store terminals can be collected and compared.
+"""
+import datetime
+import os
+import platform
+import time
+
+from config import STARTUP_SETTINGS
+
+
+class StartupTimer:
+    """Records named milestones in seconds since the timer was created"""
+    
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.marks = {}
+        self.finished = False
+    
+    def mark(self, name):
+        """Record a milestone (the first time only) and return its time"""
+        if name not in self.marks:
+            self.marks[name] = self.clock() - self.started
+        return self.marks[name]
+    
+    def summary(self):
+        """Return e.g. 'window=0.182s connected=0.940s interactive=0.940s'"""
+        return " ".join(f"{name}={seconds:.3f}s" for name, seconds in self.marks.items())
+    
+    def finish(self, log_path=None):
+        """
+        Report the start-up once it is complete
+        
+        Prints the milestones when report_timing is on and appends them to
+        the timing log, if any. Later calls do nothing.
+        """
+        if self.finished:
+            return
+        self.finished = True
+        if log_path is None:
+            log_path = os.environ.get('SYNCBAZAR_STARTUP_LOG') or STARTUP_SETTINGS['timing_log']
+        
+        if STARTUP_SETTINGS['report_timing']:
+            print(f"✅ Start-up: {self.summary()}")
+        if log_path:
+            try:
+                with open(log_path, 'a', encoding='utf-8') as f:
+                    f.write(f"{datetime.datetime.now().isoformat(timespec='seconds')} "
+                            f"{platform.node()} {self.summary()}\n")
+            except OSError as e:
+                print(f"❌ Failed to write start-up timing: {e}")
+
+
+# The process-wide timer; main.py imports this module first
+startup = StartupTimer()
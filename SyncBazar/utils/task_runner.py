@@ -0,0 +1,212 @@
+"""
+Background task runner for SyncBazar windows
+
+Tkinter widgets may only be touched from the thread running mainloop, so
+database and controller calls are run on a shared worker pool and their
+results are handed back to the Tk thread by polling a queue with after().
+Callbacks therefore always run on the Tk thread and may update widgets.
+With profiling on (utils/profiling.py) each task is profiled on its worker.
+"""
+import queue
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from utils.profiling import profiler, task_name
+
+
+# Shared by every window; database access is serialized by the connection
+# (or pool) underneath, so a handful of workers is plenty
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='tk-task')
+
+
+class Task:
+    """Handle for a submitted call"""
+    
+    def __init__(self, key=None):
+        self.key = key
+        self.cancelled = False
+        self.future = None
+    
+    def cancel(self):
+        """Drop the task's result; it is not started if still queued"""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class TaskRunner:
+    """
+    Runs callables off the Tk thread and delivers results back through after()
+    
+    Each window owns a runner bound to its toplevel. Submitting with a key
+    cancels the previous task with the same key, so a reload or a new search
+    replaces the one still in flight. on_busy(True/False) is called when the
+    runner starts or stops having work, for loading indicators. Everything
+    outstanding is cancelled when the widget is destroyed.
+    """
+    
+    def __init__(self, widget, on_busy=None, poll_interval=30):
+        self.widget = widget
+        self.on_busy = on_busy
+        self.poll_interval = poll_interval
+        self._results = queue.Queue()
+        self._tasks = set()
+        self._keys = {}
+        self._polling = False
+        self._closed = False
+        widget.bind('<Destroy>', self._on_destroy, add='+')
+    
+    def submit(self, func, *args, on_success=None, on_error=None, on_progress=None,
+               key=None, **kwargs):
+        """
+        Run func(*args, **kwargs) on a worker thread
+        
+        on_success(result) or on_error(exception) is then called on the Tk
+        thread, unless the task was cancelled first. Errors without an
+        on_error handler are printed.
+        
+        With on_progress, func also gets a progress keyword argument; each
+        progress(*values) call on the worker reaches on_progress(*values) on
+        the Tk thread. Once the task is cancelled progress() raises
+        CancelledError, so long jobs stop at their next report.
+        """
+        task = Task(key)
+        if self._closed:
+            task.cancelled = True
+            return task
+        if on_progress is not None:
+            kwargs['progress'] = lambda *values: self._progress(task, on_progress, values)
+        
+        if key is not None:
+            previous = self._keys.get(key)
+            if previous is not None:
+                self._finish(previous)
+                previous.cancel()
+            self._keys[key] = task
+        
+        was_idle = not self._tasks
+        self._tasks.add(task)
+        task.future = _executor.submit(self._run, task, func, args, kwargs,
+                                       on_success, on_error)
+        if was_idle and self.on_busy:
+            self.on_busy(True)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+        return task
+    
+    def cancel(self, key):
+        """Cancel the outstanding task submitted with key, if any"""
+        task = self._keys.get(key)
+        if task is not None:
+            self._finish(task)
+            task.cancel()
+    
+    def cancel_all(self):
+        """Cancel every outstanding task"""
+        for task in list(self._tasks):
+            self._finish(task)
+            task.cancel()
+    
+    @property
+    def busy(self):
+        """True while any task is outstanding"""
+        return bool(self._tasks)
+    
+    def _run(self, task, func, args, kwargs, on_success, on_error):
+        """Worker thread: call func and queue the outcome for the Tk thread"""
+        if task.cancelled:
+            return
+        try:
+            result = profiler.call(task_name(func), func, *args, **kwargs)
+        except Exception as e:
+            self._results.put((task, on_error, e, 'error'))
+        else:
+            self._results.put((task, on_success, result, 'done'))
+    
+    def _progress(self, task, on_progress, values):
+        """Worker thread: queue a progress report for the Tk thread"""
+        if task.cancelled:
+            raise CancelledError()
+        self._results.put((task, on_progress, values, 'progress'))
+    
+    def _poll(self):
+        """Tk thread: deliver finished results, then poll again while busy"""
+        if self._closed:
+            return
+        while True:
+            try:
+                task, callback, value, kind = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if task.cancelled:
+                continue
+            if kind == 'progress':
+                try:
+                    callback(*value)
+                except Exception as e:
+                    print(f"❌ Progress callback failed: {e}")
+                continue
+            self._finish(task)
+            try:
+                if callback is not None:
+                    callback(value)
+                elif kind == 'error':
+                    print(f"❌ Background task failed: {value}")
+            except Exception as e:
+                # Keep polling for the other tasks
+                print(f"❌ Task callback failed: {e}")
+        
+        if self._tasks:
+            self.widget.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+    
+    def _finish(self, task):
+        """Forget a task; reports idle once nothing is outstanding"""
+        if task not in self._tasks:
+            return
+        self._tasks.discard(task)
+        if task.key is not None and self._keys.get(task.key) is task:
+            del self._keys[task.key]
+        if not self._tasks and self.on_busy and not self._closed:
+            self.on_busy(False)
+    
+    def _on_destroy(self, event):
+        # <Destroy> also fires for every child widget
+        if event.widget is self.widget:
+            self.cancel_all()
+            self._closed = True
+
+
+class Debouncer:
+    """
+    Calls func once its input has been quiet for delay milliseconds
+    
+    Used for search-as-you-type: every keystroke calls call(), and only the
+    last one in a burst actually runs func on the Tk thread.
+    """
+    
+    def __init__(self, widget, delay, func):
+        self.widget = widget
+        self.delay = delay
+        self.func = func
+        self._pending = None
+    
+    def call(self):
+        """(Re)start the quiet period"""
+        self.cancel()
+        self._pending = self.widget.after(self.delay, self._fire)
+    
+    def flush(self):
+        """Run func now instead of waiting (e.g. on Enter)"""
+        self.cancel()
+        self.func()
+    
+    def cancel(self):
+        """Drop a pending call"""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+    
+    def _fire(self):
+        self._pending = None
+        self.func()
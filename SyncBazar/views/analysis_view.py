@@ -2,17 +2,30 @@
 Real-time analysis window
 """
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import datetime
-from database.connection import db
-from database.queries import GET_DASHBOARD_STATS, GET_ALL_ITEMS
+import os
+from controllers.dashboard_controller import DashboardController
+from controllers.analysis_controller import AnalysisController
+from controllers.report_controller import ReportController
 from utils.helpers import format_currency
+from utils.task_runner import TaskRunner
+from utils.profiling import profiled
+from utils.reports import available_formats
+from config import ANALYSIS_SETTINGS
 
 
 class AnalysisWindow:
     def __init__(self, parent, user_id):
         self.parent = parent
         self.user_id = user_id
+        self.runner = TaskRunner(parent)
+        self.overview_labels = []
+        self.summary_label = None
+        self.inventory_tab = None
+        self.analysis_text = None
+        self.marker = None
+        self.live_var = tk.BooleanVar(value=ANALYSIS_SETTINGS['live'])
         
         self.setup_ui()
         self.load_analysis_data()
@@ -46,6 +59,28 @@ class AnalysisWindow:
         )
         self.time_label.pack(side=tk.RIGHT, padx=30, pady=15)
         
+        # Live updates
+        tk.Checkbutton(
+            header_frame,
+            text="Live",
+            variable=self.live_var,
+            font=("Arial", 11),
+            bg='#2c3e50',
+            fg='white',
+            selectcolor='#34495e',
+            activebackground='#2c3e50',
+            activeforeground='white'
+        ).pack(side=tk.RIGHT, pady=15)
+        
+        self.updated_label = tk.Label(
+            header_frame,
+            text="",
+            font=("Arial", 10),
+            bg='#2c3e50',
+            fg='#bdc3c7'
+        )
+        self.updated_label.pack(side=tk.RIGHT, padx=10, pady=15)
+        
         # Update time every second
         self.update_time()
         
@@ -73,16 +108,34 @@ class AnalysisWindow:
         self.time_label.config(text=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
         self.parent.after(1000, self.update_time)
     
-    def create_overview_tab(self, parent):
-        """Create overview tab"""
-        # Get stats from database
-        stats = db.fetch_one(GET_DASHBOARD_STATS)
+    @profiled()
+    def load_tab(self, parent, fetch, show):
+        """Show a loading label in a tab, run fetch in the background, then show(parent, result)"""
+        loading = tk.Label(
+            parent,
+            text="Loading...",
+            font=("Arial", 14),
+            bg='white',
+            fg='#7f8c8d'
+        )
+        loading.pack(pady=50)
         
-        if not stats:
-            stats = (0, 0, 0, 0, 0)
+        def on_success(result):
+            loading.destroy()
+            show(parent, result)
         
-        total_items, total_shops, total_value, low_stock, out_of_stock = stats
+        def on_error(error):
+            loading.config(text=f"Failed to load data: {error}", fg='#e74c3c')
         
+        self.runner.submit(fetch, on_success=on_success, on_error=on_error)
+    
+    def create_overview_tab(self, parent):
+        """Create overview tab"""
+        # Get stats from the aggregate store
+        self.load_tab(parent, DashboardController.get_stats, self.show_overview)
+    
+    def show_overview(self, parent, stats):
+        """Fill the overview tab (Tk thread)"""
         # Stats frame
         stats_frame = tk.Frame(parent, bg='white')
         stats_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -97,13 +150,9 @@ class AnalysisWindow:
         ).pack(pady=(0, 30))
         
         # Stats cards
-        stat_cards = [
-            ("Total Inventory Value", format_currency(total_value), "#27ae60"),
-            ("Total Items", f"{total_items:,}", "#3498db"),
-            ("Total Shops", f"{total_shops:,}", "#9b59b6"),
-            ("Low Stock Items", f"{low_stock}", "#f39c12"),
-            ("Out of Stock", f"{out_of_stock}", "#e74c3c"),
-        ]
+        colors = ["#27ae60", "#3498db", "#9b59b6", "#f39c12", "#e74c3c"]
+        stat_cards = [card + (color,) for card, color in zip(self.overview_cards(stats), colors)]
+        self.overview_labels = []
         
         # Grid container
         grid_container = tk.Frame(stats_frame, bg='white')
@@ -127,13 +176,15 @@ class AnalysisWindow:
                 fg='white'
             ).pack(pady=(15, 5))
             
-            tk.Label(
+            value_label = tk.Label(
                 card,
                 text=value,
                 font=("Arial", 24, "bold"),
                 bg=color,
                 fg='white'
-            ).pack(pady=(0, 15))
+            )
+            value_label.pack(pady=(0, 15))
+            self.overview_labels.append(value_label)
             
             # Make grid expandable
             grid_container.grid_rowconfigure(row, weight=1)
@@ -143,7 +194,31 @@ class AnalysisWindow:
         summary_frame = tk.Frame(parent, bg='white')
         summary_frame.pack(fill=tk.X, padx=20, pady=(0, 20))
         
-        summary_text = f"""
+        self.summary_label = tk.Label(
+            summary_frame,
+            text=self.overview_summary(stats),
+            font=("Courier", 11),
+            bg='white',
+            fg='#2c3e50',
+            justify=tk.LEFT
+        )
+        self.summary_label.pack(anchor='w')
+    
+    def overview_cards(self, stats):
+        """Return the (title, value) of each overview card"""
+        total_items, total_shops, total_value, low_stock, out_of_stock = stats
+        return [
+            ("Total Inventory Value", format_currency(total_value)),
+            ("Total Items", f"{total_items:,}"),
+            ("Total Shops", f"{total_shops:,}"),
+            ("Low Stock Items", f"{low_stock}"),
+            ("Out of Stock", f"{out_of_stock}"),
+        ]
+    
+    def overview_summary(self, stats):
+        """Return the overview summary text"""
+        total_items, total_shops, total_value, low_stock, out_of_stock = stats
+        return f"""
 📊 Inventory Summary:
 ───────────────────────
 • Total Inventory Value: {format_currency(total_value)}
@@ -151,40 +226,65 @@ class AnalysisWindow:
 • Connected Shops: {total_shops}
 • Items Needing Attention: {low_stock + out_of_stock}
         """
-        
-        tk.Label(
-            summary_frame,
-            text=summary_text,
-            font=("Courier", 11),
-            bg='white',
-            fg='#2c3e50',
-            justify=tk.LEFT
-        ).pack(anchor='w')
+    
+    def update_overview(self, stats):
+        """Update the overview cards and summary in place"""
+        if self.summary_label is None:
+            return
+        for label, (title, value) in zip(self.overview_labels, self.overview_cards(stats)):
+            if label.cget('text') != value:
+                label.config(text=value)
+        self.summary_label.config(text=self.overview_summary(stats))
     
     def create_inventory_tab(self, parent):
         """Create inventory analysis tab"""
-        # Get inventory data
-        items = db.fetch_all(GET_ALL_ITEMS)
-        
-        if not items:
+        self.load_tab(parent, AnalysisController.analyze_inventory, self.show_inventory_analysis)
+    
+    def show_inventory_analysis(self, parent, analysis):
+        """Fill the inventory analysis tab (Tk thread)"""
+        self.inventory_tab = parent
+        self.analysis_text = None
+        if analysis is None or not analysis.total_items:
             tk.Label(
                 parent,
-                text="No inventory data available",
+                text="No inventory data available" if analysis is not None
+                     else "Failed to load inventory data",
                 font=("Arial", 14),
                 bg='white',
                 fg='#7f8c8d'
             ).pack(pady=50)
             return
         
-        # Calculate statistics
-        total_items = len(items)
-        total_quantity = sum(item[4] for item in items)  # quantity at index 4
-        total_value = sum(item[4] * float(item[6]) for item in items)  # quantity * price
-        
         # Create text widget for analysis
-        text_widget = tk.Text(parent, wrap=tk.WORD, font=("Courier", 10), 
-                            height=25, bg='white', fg='#2c3e50')
-        text_widget.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        self.analysis_text = tk.Text(parent, wrap=tk.WORD, font=("Courier", 10), 
+                                     height=25, bg='white', fg='#2c3e50')
+        self.analysis_text.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        self.update_inventory_analysis(analysis)
+    
+    def update_inventory_analysis(self, analysis):
+        """Replace the analysis text in place, keeping the scroll position"""
+        if self.analysis_text is None or not analysis.total_items:
+            # Switching between the "no data" label and the report
+            for child in self.inventory_tab.winfo_children():
+                child.destroy()
+            self.show_inventory_analysis(self.inventory_tab, analysis)
+            return
+        
+        position = self.analysis_text.yview()[0]
+        self.analysis_text.config(state=tk.NORMAL)
+        self.analysis_text.delete(1.0, tk.END)
+        self.analysis_text.insert(1.0, self.inventory_report(analysis))
+        self.analysis_text.config(state=tk.DISABLED)
+        self.analysis_text.yview_moveto(position)
+    
+    def inventory_report(self, analysis):
+        """Return the inventory analysis report text"""
+        total_items = analysis.total_items
+        total_quantity = analysis.total_quantity
+        total_value = analysis.total_value
+        in_stock = analysis.in_stock
+        low_stock = analysis.low_stock
+        out_of_stock = analysis.out_of_stock
         
         # Analysis text
         analysis_text = f"""
@@ -201,22 +301,6 @@ Report Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 🏷️ Stock Status Analysis:
 """
         
-        # Stock status counts
-        out_of_stock = 0
-        low_stock = 0
-        in_stock = 0
-        
-        for item in items:
-            quantity = item[4]
-            reorder_level = item[5]
-            
-            if quantity == 0:
-                out_of_stock += 1
-            elif quantity < reorder_level:
-                low_stock += 1
-            else:
-                in_stock += 1
-        
         analysis_text += f"""
 • In Stock: {in_stock} items ({in_stock/total_items*100:.1f}%)
 • Low Stock: {low_stock} items ({low_stock/total_items*100:.1f}%)
@@ -236,29 +320,33 @@ Report Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
         
         # Top 5 most valuable items
         analysis_text += f"""
-💰 Top 5 Most Valuable Items:
+💰 Top {len(analysis.top_items)} Most Valuable Items:
 ─────────────────────────────
 """
         
-        # Calculate item values
-        item_values = []
-        for item in items:
-            item_id, name, category, sku, quantity, reorder_level, price, location, supplier, created_at = item
-            total_value = quantity * float(price)
-            item_values.append((name, total_value, quantity))
-        
-        # Sort by value
-        item_values.sort(key=lambda x: x[1], reverse=True)
-        
-        for i, (name, value, quantity) in enumerate(item_values[:5], 1):
+        for i, (value, item_id, name, quantity) in enumerate(analysis.top_items, 1):
             analysis_text += f"{i}. {name}: {quantity} units = {format_currency(value)}\n"
         
-        # Insert text
-        text_widget.insert(1.0, analysis_text)
-        text_widget.config(state=tk.DISABLED)
+        # Value breakdowns
+        for column, title, unnamed in (('category', "Category", "Uncategorized"),
+                                       ('location', "Location", "Not specified"),
+                                       ('supplier', "Supplier", "N/A")):
+            groups = analysis.groups.get(column, [])
+            analysis_text += f"""
+📦 Value by {title}:
+─────────────────────────────
+"""
+            for label, items, quantity, value in groups[:5]:
+                analysis_text += (f"• {label or unnamed}: {items:,} items, "
+                                  f"{quantity:,} units = {format_currency(value)}\n")
+            if len(groups) > 5:
+                analysis_text += f"• ... {len(groups) - 5} more\n"
+        
+        return analysis_text
     
     def create_reports_tab(self, parent):
         """Create reports tab"""
+        self.report_buttons = []
         tk.Label(
             parent,
             text="Generate Reports",
@@ -278,6 +366,8 @@ Report Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
              self.generate_stock_report),
             ("⚠️ Low Stock Alert", "Items that need immediate restocking", 
              self.generate_low_stock_report),
+            ("📦 Month-end Batch", "Every report for every shop, generated in parallel",
+             self.generate_batch_reports),
         ]
         
         for i, (title, description, command) in enumerate(reports):
@@ -304,7 +394,7 @@ Report Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
             ).pack(fill=tk.X, pady=(5, 10))
             
             # Generate button
-            tk.Button(
+            button = tk.Button(
                 report_frame,
                 text="Generate Report",
                 font=("Arial", 10),
@@ -312,25 +402,149 @@ Report Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
                 fg='white',
                 command=command,
                 cursor='hand2'
-            ).pack(anchor='e')
+            )
+            button.pack(anchor='e')
+            self.report_buttons.append(button)
             
             # Separator
             if i < len(reports) - 1:
                 ttk.Separator(reports_frame, orient='horizontal').pack(fill=tk.X, pady=5)
+        
+        # Export progress
+        self.report_progress = ttk.Progressbar(reports_frame, mode='determinate')
+        self.report_progress.pack(fill=tk.X, pady=(15, 5))
+        self.report_status = tk.Label(
+            reports_frame,
+            text="",
+            font=("Arial", 10),
+            bg='white',
+            fg='#7f8c8d',
+            anchor='w'
+        )
+        self.report_status.pack(fill=tk.X)
     
     def generate_inventory_report(self):
         """Generate inventory report"""
-        messagebox.showinfo("Report", "Inventory report generated successfully!")
+        self.generate_report('inventory')
     
     def generate_stock_report(self):
         """Generate stock valuation report"""
-        messagebox.showinfo("Report", "Stock valuation report generated successfully!")
+        self.generate_report('valuation')
     
     def generate_low_stock_report(self):
         """Generate low stock report"""
-        messagebox.showinfo("Report", "Low stock report generated successfully!")
+        self.generate_report('low_stock')
+    
+    def generate_report(self, report):
+        """Ask where to save a report, then export it in the background"""
+        filetypes = [(fmt.upper() + " files", f"*.{fmt}") for fmt in available_formats()]
+        path = filedialog.asksaveasfilename(
+            parent=self.parent,
+            title="Save Report",
+            defaultextension=".csv",
+            initialfile=os.path.basename(ReportController.default_path(
+                report, stamp=datetime.date.today().strftime("%Y%m%d"))),
+            filetypes=filetypes
+        )
+        if not path:
+            return
+        
+        for button in self.report_buttons:
+            button.config(state=tk.DISABLED)
+        self.report_progress.config(value=0, maximum=1)
+        self.report_status.config(text="Exporting...")
+        self.runner.submit(ReportController.export, report, path, key='report',
+                           on_progress=self.show_report_progress,
+                           on_success=self.report_finished,
+                           on_error=lambda error: self.report_finished((False, str(error))))
+    
+    def generate_batch_reports(self):
+        """Ask for a folder, then run the month-end batch in worker processes"""
+        folder = filedialog.askdirectory(parent=self.parent, title="Save Reports To")
+        if not folder:
+            return
+        folder = os.path.join(folder, f"batch_{datetime.date.today().strftime('%Y%m%d')}")
+        
+        for button in self.report_buttons:
+            button.config(state=tk.DISABLED)
+        self.report_progress.config(value=0, maximum=1)
+        self.report_status.config(text="Starting report workers...")
+        self.runner.submit(ReportController.run_batch, folder, key='report',
+                           on_progress=self.show_batch_progress,
+                           on_success=self.batch_finished,
+                           on_error=lambda error: self.report_finished((False, str(error))))
+    
+    def show_batch_progress(self, done, total):
+        """Advance the progress bar as batch jobs finish (Tk thread)"""
+        self.report_progress.config(maximum=total, value=done)
+        self.report_status.config(text=f"Generated {done} of {total} reports...")
+    
+    def batch_finished(self, summary):
+        """Report batch timings (Tk thread)"""
+        message = (f"{len(summary['jobs'])} reports ({summary['failed']} failed) written to "
+                   f"{summary['folder']} in {summary['elapsed']:.1f}s on "
+                   f"{summary['workers']} workers.\nTimings are in summary.txt.")
+        if summary['unmatched']:
+            message += ("\nNo items have their location set to: "
+                        f"{', '.join(summary['unmatched'])}.")
+        self.report_finished((not summary['failed'], message))
+    
+    def show_report_progress(self, done, total):
+        """Advance the export progress bar (Tk thread)"""
+        if total:
+            self.report_progress.config(maximum=total, value=min(done, total))
+            self.report_status.config(text=f"Exporting... {done:,} of {total:,} rows")
+        else:
+            self.report_status.config(text=f"Exporting... {done:,} rows")
+    
+    def report_finished(self, result):
+        """Re-enable the buttons and report the outcome (Tk thread)"""
+        success, message = result
+        for button in self.report_buttons:
+            button.config(state=tk.NORMAL)
+        self.report_status.config(text=message)
+        if success:
+            self.report_progress.config(value=self.report_progress.cget('maximum'))
+            messagebox.showinfo("Report", message, parent=self.parent)
+        else:
+            self.report_progress.config(value=0)
+            messagebox.showerror("Report", message, parent=self.parent)
     
     def load_analysis_data(self):
-        """Load analysis data"""
-        # Data is loaded in each tab separately
-        pass
+        """Start watching for changes (each tab loads its own data)"""
+        # Take the baseline marker right away, alongside the tab loads
+        self.poll_changes()
+    
+    def poll_changes(self):
+        """Probe the change marker in the background, then poll again later"""
+        if not self.parent.winfo_exists():
+            return
+        if not self.live_var.get() and self.marker is not None:
+            self.schedule_poll()
+            return
+        self.runner.submit(AnalysisController.get_change_marker, key='marker',
+                           on_success=self.check_marker,
+                           on_error=lambda error: self.schedule_poll())
+    
+    def schedule_poll(self):
+        self.parent.after(ANALYSIS_SETTINGS['refresh_interval'] * 1000, self.poll_changes)
+    
+    def check_marker(self, marker):
+        """Recompute the affected figures if the marker moved (Tk thread)"""
+        parts = AnalysisController.changed_parts(self.marker, marker)
+        if marker is not None:
+            self.marker = marker
+        if parts:
+            self.runner.submit(AnalysisController.refresh, parts, marker, key='refresh',
+                               on_success=self.apply_refresh)
+        self.schedule_poll()
+    
+    def apply_refresh(self, result):
+        """Update the open tabs in place with recomputed figures (Tk thread)"""
+        stats, analysis = result
+        if stats:
+            self.update_overview(stats)
+        if analysis is not None and self.inventory_tab is not None:
+            self.update_inventory_analysis(analysis)
+        self.updated_label.config(
+            text=f"Updated {datetime.datetime.now().strftime('%H:%M:%S')}")
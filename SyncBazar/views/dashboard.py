@@ -4,9 +4,17 @@ Main dashboard window for SyncBazar
 import tkinter as tk
 from tkinter import messagebox
 import datetime
+import queue
+from config import ALERT_SETTINGS
 from database.connection import db
-from database.queries import GET_DASHBOARD_STATS, GET_RECENT_ACTIVITY
+from database.queries import GET_RECENT_ACTIVITY
+from database.alerts import describe_alert
+from database.analytics import OUT_OF_STOCK
+from controllers.dashboard_controller import DashboardController
+from controllers.alert_controller import AlertController
 from utils.helpers import format_currency
+from utils.task_runner import TaskRunner
+from utils.profiling import profiled
 
 
 class DashboardWindow:
@@ -29,9 +37,17 @@ class DashboardWindow:
         self.user_id = user_id
         self.username = username
         self.role = role
+        self.runner = TaskRunner(root)
+        # Alerts arrive on the watcher thread and are drained on the Tk thread
+        self.alert_queue = queue.Queue()
         
         self.setup_ui()
         self.load_dashboard_data()
+        self.load_alerts()
+        self.unsubscribe_alerts = AlertController.subscribe(self.alert_queue.put)
+        if self.unsubscribe_alerts is not None:
+            self.root.bind('<Destroy>', self.on_destroy, add='+')
+            self.root.after(500, self.check_alerts)
     
     def setup_ui(self):
         """Setup dashboard UI"""
@@ -116,6 +132,10 @@ class DashboardWindow:
             fg='#2c3e50'
         ).pack(pady=30)
         
+        # Open stock alerts, newest first
+        self.alerts_frame = tk.Frame(right_panel, bg='#fdf2e9')
+        self.alerts_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=30, pady=(0, 20))
+        
         # Features grid
         features_frame = tk.Frame(right_panel, bg='white')
         features_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=(0, 30))
@@ -193,18 +213,46 @@ class DashboardWindow:
         ).pack(pady=15)
     
     def load_dashboard_data(self):
-        """Load dashboard statistics"""
-        # Clear existing stats
+        """Load dashboard statistics in the background"""
+        self.clear_stats()
+        tk.Label(
+            self.stats_frame,
+            text="Loading...",
+            font=("Arial", 12),
+            bg='white',
+            fg='#7f8c8d'
+        ).pack(pady=20)
+        
+        self.runner.submit(self.fetch_dashboard_data, key='dashboard',
+                           on_success=self.show_dashboard_data,
+                           on_error=self.show_load_error)
+    
+    def fetch_dashboard_data(self):
+        """Worker thread: stats from the aggregate store plus recent activity"""
+        return DashboardController.get_stats(), db.fetch_all(GET_RECENT_ACTIVITY)
+    
+    def clear_stats(self):
+        """Remove every widget from the stats panel"""
         for widget in self.stats_frame.winfo_children():
             widget.destroy()
+    
+    def show_load_error(self, error):
+        """Show a failed background load in the stats panel"""
+        self.clear_stats()
+        tk.Label(
+            self.stats_frame,
+            text=f"Failed to load statistics:\n{error}",
+            font=("Arial", 10),
+            bg='white',
+            fg='#e74c3c'
+        ).pack(pady=20)
+    
+    def show_dashboard_data(self, data):
+        """Display dashboard statistics (Tk thread)"""
+        stats, activities = data
+        self.clear_stats()
         
-        # Get stats from database
-        stats = db.fetch_one(GET_DASHBOARD_STATS)
-        
-        if stats:
-            total_items, total_shops, total_value, low_stock, out_of_stock = stats
-        else:
-            total_items = total_shops = total_value = low_stock = out_of_stock = 0
+        total_items, total_shops, total_value, low_stock, out_of_stock = stats
         
         # Display stats
         stat_cards = [
@@ -246,8 +294,6 @@ class DashboardWindow:
             fg='#2c3e50'
         ).pack(anchor='w', pady=(20, 10))
         
-        activities = db.fetch_all(GET_RECENT_ACTIVITY)
-        
         if activities:
             for desc, timestamp in activities[:3]:  # Show only 3
                 frame = tk.Frame(self.stats_frame, bg='white')
@@ -285,6 +331,70 @@ class DashboardWindow:
                 fg='#7f8c8d'
             ).pack(anchor='w', pady=5)
     
+    def load_alerts(self):
+        """Load the open stock alerts in the background"""
+        self.runner.submit(AlertController.get_open_alerts, key='alerts',
+                           on_success=self.show_alerts)
+    
+    def check_alerts(self):
+        """Tk thread: pick up alerts pushed by the stock watcher"""
+        pushed = []
+        while True:
+            try:
+                pushed.extend(self.alert_queue.get_nowait())
+            except queue.Empty:
+                break
+        if pushed:
+            # The counts move with the same writes; both reads are cheap
+            self.load_dashboard_data()
+            self.load_alerts()
+        self.root.after(500, self.check_alerts)
+    
+    def show_alerts(self, alerts):
+        """Display the open stock alerts (Tk thread)"""
+        for widget in self.alerts_frame.winfo_children():
+            widget.destroy()
+        if not alerts:
+            return
+        
+        shown = ALERT_SETTINGS['max_shown']
+        title = f"⚠️ Stock Alerts ({len(alerts)})"
+        tk.Label(
+            self.alerts_frame,
+            text=title,
+            font=("Arial", 12, "bold"),
+            bg='#fdf2e9',
+            fg='#d35400',
+            anchor='w'
+        ).pack(fill=tk.X, padx=10, pady=(8, 4))
+        
+        for alert in alerts[:shown]:
+            tk.Label(
+                self.alerts_frame,
+                text=f"• {describe_alert(alert)}",
+                font=("Arial", 10),
+                bg='#fdf2e9',
+                fg='#e74c3c' if alert.level == OUT_OF_STOCK else '#2c3e50',
+                anchor='w'
+            ).pack(fill=tk.X, padx=10)
+        if len(alerts) > shown:
+            tk.Label(
+                self.alerts_frame,
+                text=f"...and {len(alerts) - shown} more (see the Low Stock Alert report)",
+                font=("Arial", 9),
+                bg='#fdf2e9',
+                fg='#7f8c8d',
+                anchor='w'
+            ).pack(fill=tk.X, padx=10)
+        tk.Frame(self.alerts_frame, bg='#fdf2e9', height=8).pack()
+    
+    def on_destroy(self, event):
+        # <Destroy> also fires for every child widget
+        if event.widget is self.root and self.unsubscribe_alerts is not None:
+            self.unsubscribe_alerts()
+            self.unsubscribe_alerts = None
+    
+    @profiled()
     def open_inventory(self):
         """Open inventory management"""
         from views.inventory_view import InventoryWindow
@@ -295,6 +405,7 @@ class DashboardWindow:
         
         inventory_app = InventoryWindow(inventory_window, self.user_id)
     
+    @profiled()
     def open_shop_network(self):
         """Open shop network"""
         from views.shop_view import ShopWindow
@@ -305,6 +416,7 @@ class DashboardWindow:
         
         shop_app = ShopWindow(shop_window, self.user_id)
     
+    @profiled()
     def open_network_search(self):
         """Open network search"""
         from views.search_view import SearchWindow
@@ -315,6 +427,7 @@ class DashboardWindow:
         
         search_app = SearchWindow(search_window, self.user_id)
     
+    @profiled()
     def open_analysis(self):
         """Open real-time analysis"""
         from views.analysis_view import AnalysisWindow
@@ -328,6 +441,9 @@ class DashboardWindow:
     def logout(self):
         """Logout user"""
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
+            # Let a watcher pass in progress finish before its connection goes
+            if not AlertController.stop():
+                print("❌ Stock watcher did not stop in time; closing the connection anyway")
             db.close()
             self.root.destroy()
 
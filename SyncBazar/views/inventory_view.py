@@ -2,17 +2,28 @@
 Inventory management window
 """
 import tkinter as tk
-from tkinter import ttk, messagebox
-from database.connection import db
-from database.queries import GET_ALL_ITEMS, ADD_ITEM, UPDATE_ITEM, DELETE_ITEM, SEARCH_ITEMS
-from utils.validators import validate_item_data, validate_numeric
+from tkinter import messagebox
+from controllers.inventory_controller import (InventoryController, ItemPager,
+                                              ItemChangeTracker, ItemList)
+from config import SEARCH_SETTINGS
+from controllers.search_controller import IncrementalSearch
 from utils.helpers import format_currency
+from utils.task_runner import TaskRunner, Debouncer
+from utils.profiling import profiled
+from views.widgets import VirtualTreeview
 
 
 class InventoryWindow:
     def __init__(self, parent, user_id):
         self.parent = parent
         self.user_id = user_id
+        self.pager = ItemPager()
+        self.tracker = ItemChangeTracker()
+        self.items = ItemList()
+        self.page_pending = False
+        self.runner = TaskRunner(parent, on_busy=self.show_busy)
+        self.search_session = IncrementalSearch()
+        self.search_debouncer = Debouncer(parent, SEARCH_SETTINGS['debounce_ms'], self.search_items)
         
         self.setup_ui()
         self.load_items()
@@ -49,10 +60,11 @@ class InventoryWindow:
                 bg='#ecf0f1').pack(side=tk.LEFT, padx=(0, 10))
         
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', lambda *args: self.search_items())
+        self.search_var.trace('w', lambda *args: self.search_debouncer.call())
         search_entry = tk.Entry(search_frame, textvariable=self.search_var, 
                               width=30, font=("Arial", 11))
         search_entry.pack(side=tk.LEFT, padx=(0, 10))
+        search_entry.bind('<Return>', lambda e: self.search_debouncer.flush())
         
         # Action buttons
         action_frame = tk.Frame(control_frame, bg='#ecf0f1')
@@ -81,16 +93,7 @@ class InventoryWindow:
         content_frame = tk.Frame(self.parent, bg='white')
         content_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
-        # Create treeview
-        columns = ("ID", "Name", "Category", "Quantity", "Price", "Location", "Supplier", "Status")
-        self.tree = ttk.Treeview(
-            content_frame,
-            columns=columns,
-            show="headings",
-            height=20
-        )
-        
-        # Define headings
+        # Create treeview; only the rows in view are materialized
         column_configs = [
             ("ID", "ID", 50),
             ("Name", "Product Name", 150),
@@ -102,17 +105,13 @@ class InventoryWindow:
             ("Status", "Status", 100),
         ]
         
-        for col_name, heading, width in column_configs:
-            self.tree.heading(col_name, text=heading)
-            self.tree.column(col_name, width=width, minwidth=50)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(content_frame, orient=tk.VERTICAL, 
-                                 command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree = VirtualTreeview(content_frame, column_configs, self.item_values,
+                                    height=20, on_near_end=self.on_near_end)
         
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Configure tags for coloring
+        self.tree.tag_configure('out_of_stock', background='#ffebee')
+        self.tree.tag_configure('low_stock', background='#fff3e0')
+        self.tree.tag_configure('in_stock', background='#e8f5e9')
         
         # Bind double-click for editing
         self.tree.bind("<Double-1>", lambda e: self.edit_item())
@@ -127,108 +126,198 @@ class InventoryWindow:
         )
         self.stats_label.pack(side=tk.BOTTOM, pady=10)
     
+    def show_busy(self, busy):
+        """Show a busy cursor while background loads are running"""
+        self.parent.config(cursor='watch' if busy else '')
+    
+    def show_error(self, error):
+        """Report a failed background load in the stats bar"""
+        self.stats_label.config(text=f"Failed to load items: {error}")
+    
+    @profiled()
     def load_items(self):
-        """Load items from database"""
-        self.items = db.fetch_all(GET_ALL_ITEMS)
-        self.display_items()
+        """Load the first page of items; later pages load while scrolling"""
+        # Fresh pager/tracker so a load still in flight cannot touch the new list
+        self.pager = ItemPager()
+        self.tracker = ItemChangeTracker()
+        self.items = ItemList()
+        self.page_pending = True  # the first page is requested right below
+        self.runner.cancel('changes')
+        self.search_session.reset()
+        self.tree.set_rows(self.items, self.item_values, locate=self.items.index)
+        self.stats_label.config(text="Loading...")
+        
+        tracker = self.tracker
+        
+        def fetch_first_page(pager):
+            tracker.start()
+            return pager.next_page()
+        
+        pager = self.pager
+        self.runner.submit(fetch_first_page, pager, key='page', on_error=self.show_error,
+                           on_success=lambda rows: self.show_page(pager, rows))
     
-    def display_items(self):
-        """Display items in treeview"""
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        total_items = 0
-        total_quantity = 0
-        total_value = 0
-        
-        # Add items
-        for item in self.items:
-            item_id, name, category, sku, quantity, reorder_level, price, location, supplier, created_at = item
-            
-            # Calculate totals
-            total_items += 1
-            total_quantity += quantity
-            total_value += quantity * float(price)
-            
-            # Determine status
-            if quantity == 0:
-                status = "Out of Stock"
-                tags = ('out_of_stock',)
-            elif quantity < reorder_level:
-                status = "Low Stock"
-                tags = ('low_stock',)
-            else:
-                status = "In Stock"
-                tags = ('in_stock',)
-            
-            self.tree.insert("", tk.END, values=(
-                item_id,
-                name,
-                category or "Uncategorized",
-                quantity,
-                format_currency(price),
-                location or "Main Store",
-                supplier or "N/A",
-                status
-            ), tags=tags)
+    def refresh_changes(self):
+        """Patch in only the rows written since the last load or refresh"""
+        if not self.items.loaded:
+            self.load_items()
+            return
+        pager = self.pager
+        after = None if self.items.complete else self.items.after
+        self.runner.submit(self.tracker.poll, after, key='changes', on_error=self.show_error,
+                           on_success=lambda changes: self.apply_changes(pager, after, changes))
+    
+    def apply_changes(self, pager, after, changes):
+        """Merge polled changes into the list (Tk thread)"""
+        if pager is not self.pager:
+            return
+        # A page that arrived during the poll moved the bound past_page used
+        current = None if self.items.complete else self.items.after
+        operations = None
+        if changes is not None and after == current:
+            changed, deleted = changes
+            operations = ItemChangeTracker.merge(self.items, changed, deleted)
+        if operations is None:
+            self.load_items()
+            return
+        if operations:
+            self.pager.refetch()
         
-        # Configure tags for coloring
-        self.tree.tag_configure('out_of_stock', background='#ffebee')
-        self.tree.tag_configure('low_stock', background='#fff3e0')
-        self.tree.tag_configure('in_stock', background='#e8f5e9')
+        if self.search_var.get().strip():
+            self.search_session.reset()
+            self.search_items()
+            return
         
-        # Update stats
+        # Selection is kept by item_id, so the edited row stays selected
+        self.tree.refresh()
+        self.update_stats()
+    
+    def load_next_page(self):
+        """Request the next keyset page in the background"""
+        pager = self.pager
+        self.runner.submit(pager.next_page, key='page', on_error=self.show_error,
+                           on_success=lambda rows: self.show_page(pager, rows))
+    
+    def show_page(self, pager, rows):
+        """Append a loaded page to the treeview (Tk thread)"""
+        if pager is not self.pager:
+            return
+        self.page_pending = False
+        self.items.add_page(rows, pager.after, pager.exhausted)
+        if not self.search_var.get().strip():
+            self.tree.refresh()
+        self.update_stats()
+    
+    def on_near_end(self):
+        """Load more rows when the view scrolls near the bottom"""
+        if (not self.page_pending and not self.pager.exhausted
+                and not self.search_var.get().strip()):
+            self.page_pending = True
+            self.parent.after_idle(self.load_next_page)
+    
+    def display_items(self):
+        """Display items in treeview, keeping the selected item in view"""
+        self.tree.set_rows(self.items, self.item_values, keep_position=True,
+                           locate=self.items.index)
+        self.update_stats()
+    
+    def item_values(self, item):
+        """Return the treeview (values, tags) for an item row"""
+        item_id, name, category, sku, quantity, reorder_level, price, location, supplier, created_at = item
+        
+        # Determine status
+        if quantity == 0:
+            status = "Out of Stock"
+            tags = ('out_of_stock',)
+        elif quantity < reorder_level:
+            status = "Low Stock"
+            tags = ('low_stock',)
+        else:
+            status = "In Stock"
+            tags = ('in_stock',)
+        
+        return (
+            item_id,
+            name,
+            category or "Uncategorized",
+            quantity,
+            format_currency(price),
+            location or "Main Store",
+            supplier or "N/A",
+            status
+        ), tags
+    
+    def update_stats(self):
+        """Update the stats bar with catalog totals"""
+        if self.search_var.get().strip():
+            return
+        self.runner.submit(InventoryController.get_item_totals, key='stats',
+                           on_success=self.show_stats)
+    
+    def show_stats(self, totals):
+        """Show catalog totals in the stats bar (Tk thread)"""
+        if self.search_var.get().strip():
+            return
+        total_items, total_quantity, total_value = totals
         self.stats_label.config(
             text=f"Total: {total_items} items | Quantity: {total_quantity:,} | "
                  f"Value: {format_currency(total_value)} | "
                  f"Showing {len(self.items)} items"
         )
     
+    @profiled()
     def search_items(self):
         """Search items by name or category"""
         search_term = self.search_var.get().strip()
         
         if not search_term:
+            self.runner.cancel('search')
+            self.search_session.reset()
             self.display_items()
             return
         
-        results = db.fetch_all(SEARCH_ITEMS, 
-                             (f'%{search_term}%', f'%{search_term}%', 
-                              f'%{search_term}%', f'%{search_term}%'))
-        
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Narrows the previous results locally when the term was extended;
+        # a newer keystroke cancels delivery of an older search
+        self.runner.submit(self.search_session.search, search_term, key='search',
+                           on_error=self.show_error,
+                           on_success=lambda results: self.show_results(search_term, results))
+    
+    def show_results(self, search_term, results):
+        """Display search results (Tk thread)"""
+        if self.search_var.get().strip() != search_term:
+            return
         
-        # Display results
-        for item in results:
-            item_id, name, category, sku, quantity, price, location, supplier = item
-            
-            # Determine status
-            if quantity == 0:
-                status = "Out of Stock"
-                tags = ('out_of_stock',)
-            elif quantity < 10:  # Default reorder level
-                status = "Low Stock"
-                tags = ('low_stock',)
-            else:
-                status = "In Stock"
-                tags = ('in_stock',)
-            
-            self.tree.insert("", tk.END, values=(
-                item_id,
-                name,
-                category or "Uncategorized",
-                quantity,
-                format_currency(price),
-                location or "Main Store",
-                supplier or "N/A",
-                status
-            ), tags=tags)
+        # Rows are keyed by item_id, so a refined search keeps the selection
+        self.tree.set_rows(results, self.search_values, keep_position=True)
         
         self.stats_label.config(text=f"Found {len(results)} results for '{search_term}'")
     
+    def search_values(self, item):
+        """Return the treeview (values, tags) for a search result row"""
+        item_id, name, category, sku, quantity, price, location, supplier = item
+        
+        # Determine status
+        if quantity == 0:
+            status = "Out of Stock"
+            tags = ('out_of_stock',)
+        elif quantity < 10:  # Default reorder level
+            status = "Low Stock"
+            tags = ('low_stock',)
+        else:
+            status = "In Stock"
+            tags = ('in_stock',)
+        
+        return (
+            item_id,
+            name,
+            category or "Uncategorized",
+            quantity,
+            format_currency(price),
+            location or "Main Store",
+            supplier or "N/A",
+            status
+        ), tags
+    
     def add_item(self):
         """Add new item dialog"""
         dialog = tk.Toplevel(self.parent)
@@ -294,30 +383,19 @@ class InventoryWindow:
             location = entries["Location"].get().strip()
             supplier = entries["Supplier"].get().strip()
             
-            # Validate
-            if not name:
-                messagebox.showerror("Error", "Item name is required")
-                return
-            
-            quantity_valid, quantity_msg = validate_numeric(quantity, "Quantity")
-            if not quantity_valid:
-                messagebox.showerror("Error", quantity_msg)
-                return
+            # Validate and save through the controller
+            success, message = InventoryController.add_item({
+                'name': name, 'category': category, 'sku': sku,
+                'quantity': quantity, 'price': price,
+                'location': location, 'supplier': supplier
+            }, self.user_id)
             
-            price_valid, price_msg = validate_numeric(price, "Price")
-            if not price_valid:
-                messagebox.showerror("Error", price_msg)
-                return
-            
-            # Save to database
-            if db.execute_query(ADD_ITEM, (name, category, sku, 
-                                         int(float(quantity)), 10, 
-                                         float(price), location, supplier)):
+            if success:
                 messagebox.showinfo("Success", "Item added successfully!")
                 dialog.destroy()
-                self.load_items()  # Refresh list
+                self.refresh_changes()  # Patch in the changed row
             else:
-                messagebox.showerror("Error", "Failed to add item")
+                messagebox.showerror("Error", message)
         
         tk.Button(button_frame, text="Save", command=save_item, 
                  bg='#27ae60', fg='white', width=10).pack(side=tk.RIGHT, padx=5)
@@ -326,20 +404,20 @@ class InventoryWindow:
     
     def edit_item(self):
         """Edit selected item"""
-        selected = self.tree.selection()
+        selected = self.tree.selected_rows()
         if not selected:
             messagebox.showwarning("Warning", "Please select an item to edit")
             return
         
-        item_id = int(self.tree.item(selected[0])['values'][0])
-        
-        # Find item details
-        item_details = None
-        for item in self.items:
-            if item[0] == item_id:
-                item_details = item
-                break
+        item_id = int(selected[0][0])
         
+        # Load the row by id: the selection may be a search hit or a row
+        # outside the pages loaded so far
+        self.runner.submit(InventoryController.get_item, item_id, key='edit',
+                           on_error=self.show_error, on_success=self.show_edit_dialog)
+    
+    def show_edit_dialog(self, item_details):
+        """Open the edit form for a loaded item (Tk thread)"""
         if not item_details:
             messagebox.showerror("Error", "Item not found")
             return
@@ -409,31 +487,19 @@ class InventoryWindow:
             location = entries["Location"].get().strip()
             supplier = entries["Supplier"].get().strip()
             
-            # Validate
-            if not name:
-                messagebox.showerror("Error", "Item name is required")
-                return
-            
-            quantity_valid, quantity_msg = validate_numeric(quantity, "Quantity")
-            if not quantity_valid:
-                messagebox.showerror("Error", quantity_msg)
-                return
-            
-            price_valid, price_msg = validate_numeric(price, "Price")
-            if not price_valid:
-                messagebox.showerror("Error", price_msg)
-                return
+            # Validate and update through the controller
+            success, message = InventoryController.update_item(item_id, {
+                'name': name, 'category': category, 'sku': sku,
+                'quantity': quantity, 'price': price,
+                'location': location, 'supplier': supplier
+            }, self.user_id)
             
-            # Update in database
-            if db.execute_query(UPDATE_ITEM, (name, category, sku, 
-                                            int(float(quantity)), 10, 
-                                            float(price), location, supplier, 
-                                            item_id)):
+            if success:
                 messagebox.showinfo("Success", "Item updated successfully!")
                 dialog.destroy()
-                self.load_items()  # Refresh list
+                self.refresh_changes()  # Patch in the changed row
             else:
-                messagebox.showerror("Error", "Failed to update item")
+                messagebox.showerror("Error", message)
         
         tk.Button(button_frame, text="Update", command=update_item, 
                  bg='#3498db', fg='white', width=10).pack(side=tk.RIGHT, padx=5)
@@ -442,13 +508,13 @@ class InventoryWindow:
     
     def delete_item(self):
         """Delete selected item"""
-        selected = self.tree.selection()
+        selected = self.tree.selected_rows()
         if not selected:
             messagebox.showwarning("Warning", "Please select an item to delete")
             return
         
-        item_id = int(self.tree.item(selected[0])['values'][0])
-        item_name = self.tree.item(selected[0])['values'][1]
+        item_id = int(selected[0][0])
+        item_name = selected[0][1]
         
         response = messagebox.askyesno(
             "Confirm Delete",
@@ -457,8 +523,9 @@ class InventoryWindow:
         )
         
         if response:
-            if db.execute_query(DELETE_ITEM, (item_id,)):
+            success, message = InventoryController.delete_item(item_id, self.user_id)
+            if success:
                 messagebox.showinfo("Success", "Item deleted successfully!")
-                self.load_items()  # Refresh list
+                self.refresh_changes()  # Patch in the changed row
             else:
-                messagebox.showerror("Error", "Failed to delete item")
+                messagebox.showerror("Error", message)
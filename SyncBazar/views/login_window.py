@@ -3,13 +3,36 @@ Login window for SyncBazar
 """
 import tkinter as tk
 from tkinter import messagebox
-from database.connection import db
+from config import SCHEMA_SETTINGS, STARTUP_SETTINGS
+from utils.task_runner import TaskRunner
 from utils.validators import validate_password
 
 
+def open_database():
+    """
+    Worker thread: connect, migrate and warm the pool; returns success
+    
+    The database modules (and pyodbc with its ODBC driver) are imported
+    here rather than at the top of the file, so loading them does not
+    delay the login window either.
+    """
+    from database.connection import db
+    if not db.connect():
+        return False
+    if SCHEMA_SETTINGS['auto_migrate']:
+        # Create missing tables and indexes (no-op when up to date)
+        db.migrate()
+    db.warm(STARTUP_SETTINGS['warm_connections'])
+    return True
+
+
 class LoginWindow:
-    def __init__(self, root):
+    def __init__(self, root, timer=None):
         self.root = root
+        self.timer = timer
+        self.runner = TaskRunner(root)
+        self.connected = False
+        self.shown = False
         self.root.title("SyncBazar - Login")
         self.root.geometry("400x500")
         self.root.resizable(False, False)
@@ -20,10 +43,9 @@ class LoginWindow:
         # Setup UI
         self.setup_ui()
         
-        # Connect to database
-        if not db.connect():
-            messagebox.showerror("Database Error", 
-                               "Cannot connect to database. Please check SQL Server.")
+        # Draw the form first; the database connects behind it
+        self.root.after_idle(self.window_shown)
+        self.connect_database()
     
     def center_window(self):
         """Center the window on screen"""
@@ -111,8 +133,8 @@ class LoginWindow:
             font=("Arial", 10)
         ).pack(anchor='w', pady=(5, 20))
         
-        # Login button
-        login_btn = tk.Button(
+        # Login button (enabled once the database is connected)
+        self.login_btn = login_btn = tk.Button(
             form_frame,
             text="Login",
             font=("Arial", 12, "bold"),
@@ -126,6 +148,15 @@ class LoginWindow:
         )
         login_btn.pack(pady=(10, 15))
         
+        self.status_label = tk.Label(
+            form_frame,
+            text="",
+            font=("Arial", 9),
+            bg='#ecf0f1',
+            fg='#7f8c8d'
+        )
+        self.status_label.pack(pady=(0, 10))
+        
         # Bind Enter key to login
         self.root.bind('<Return>', lambda event: self.login())
         
@@ -160,8 +191,53 @@ class LoginWindow:
             fg='white'
         ).pack(side=tk.BOTTOM, pady=10)
     
+    def connect_database(self):
+        """Connect on a worker thread; the login button waits for it"""
+        self.connected = False
+        self.login_btn.config(text="Login", state=tk.DISABLED)
+        self.status_label.config(text="Connecting to database...", fg='#7f8c8d')
+        self.runner.submit(open_database, key='connect',
+                           on_success=self.database_ready,
+                           on_error=lambda error: self.database_ready(False))
+    
+    def database_ready(self, connected):
+        """Enable login, or offer a retry (Tk thread)"""
+        self.connected = connected
+        self.login_btn.config(state=tk.NORMAL)
+        if connected:
+            self.status_label.config(text="")
+            self.mark('connected')
+            self.check_interactive()
+        else:
+            self.login_btn.config(text="Retry Connection")
+            self.status_label.config(text="Database unavailable", fg='#e74c3c')
+            messagebox.showerror("Database Error", 
+                               "Cannot connect to database. Please check SQL Server.")
+    
+    def window_shown(self):
+        """First idle moment after the form was drawn"""
+        self.shown = True
+        self.mark('window')
+        self.check_interactive()
+    
+    def check_interactive(self):
+        """Finish the start-up timing once the form is usable"""
+        if self.shown and self.connected and self.timer is not None:
+            self.mark('interactive')
+            self.timer.finish()
+    
+    def mark(self, name):
+        if self.timer is not None:
+            self.timer.mark(name)
+    
     def login(self):
         """Handle login"""
+        if not self.connected:
+            # Enter before the connection finished, or Retry after it failed
+            if not self.runner.busy:
+                self.connect_database()
+            return
+        
         username = self.username_entry.get().strip()
         password = self.password_entry.get()
         
@@ -170,6 +246,7 @@ class LoginWindow:
             return
         
         # Check credentials in database
+        from database.connection import db
         from database.queries import CHECK_LOGIN
         result = db.fetch_one(CHECK_LOGIN, (username, password))
         
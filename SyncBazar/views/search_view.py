@@ -2,16 +2,23 @@
 Network search window
 """
 import tkinter as tk
-from tkinter import ttk, messagebox
-from database.connection import db
-from database.queries import SEARCH_ITEMS, GET_ALL_SHOPS
+from tkinter import messagebox
+from config import SEARCH_SETTINGS
+from controllers.search_controller import IncrementalSearch
 from utils.helpers import format_currency
+from utils.task_runner import TaskRunner, Debouncer
+from utils.profiling import profiled
+from views.widgets import VirtualTreeview
 
 
 class SearchWindow:
     def __init__(self, parent, user_id):
         self.parent = parent
         self.user_id = user_id
+        self.runner = TaskRunner(parent, on_busy=self.show_busy)
+        self.search_session = IncrementalSearch()
+        self.search_debouncer = Debouncer(parent, SEARCH_SETTINGS['debounce_ms'],
+                                          lambda: self.perform_search(typed=True))
         
         self.setup_ui()
     
@@ -54,7 +61,11 @@ class SearchWindow:
         tk.Label(search_frame, text="Search:", font=("Arial", 12), 
                 bg='#3498db', fg='white').pack(side=tk.LEFT, padx=(0, 10))
         
-        self.search_entry = tk.Entry(search_frame, width=40, font=("Arial", 12))
+        # Search as you type; Enter or the button searches immediately
+        self.search_var = tk.StringVar()
+        self.search_var.trace('w', lambda *args: self.search_debouncer.call())
+        self.search_entry = tk.Entry(search_frame, textvariable=self.search_var,
+                                     width=40, font=("Arial", 12))
         self.search_entry.pack(side=tk.LEFT, padx=(0, 10))
         
         tk.Button(
@@ -63,7 +74,7 @@ class SearchWindow:
             font=("Arial", 12, "bold"),
             bg='#e74c3c',
             fg='white',
-            command=self.perform_search,
+            command=self.search_now,
             cursor='hand2'
         ).pack(side=tk.LEFT, padx=(0, 10))
         
@@ -78,7 +89,7 @@ class SearchWindow:
         ).pack(side=tk.LEFT)
         
         # Bind Enter key
-        self.parent.bind('<Return>', lambda event: self.perform_search())
+        self.parent.bind('<Return>', lambda event: self.search_now())
         
         # Results frame
         results_frame = tk.Frame(self.parent, bg='white')
@@ -94,16 +105,7 @@ class SearchWindow:
         )
         self.results_label.pack(anchor=tk.W, pady=(0, 10))
         
-        # Create treeview
-        columns = ("Item", "Category", "Store", "Quantity", "Price", "Status")
-        self.tree = ttk.Treeview(
-            results_frame,
-            columns=columns,
-            show="headings",
-            height=15
-        )
-        
-        # Define headings
+        # Create treeview; only the rows in view are materialized
         column_configs = [
             ("Item", "Item Name", 200),
             ("Category", "Category", 120),
@@ -113,17 +115,7 @@ class SearchWindow:
             ("Status", "Status", 100),
         ]
         
-        for col_name, heading, width in column_configs:
-            self.tree.heading(col_name, text=heading)
-            self.tree.column(col_name, width=width)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, 
-                                 command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree = VirtualTreeview(results_frame, column_configs, self.result_values, height=15)
         
         # Stats frame
         self.stats_label = tk.Label(
@@ -135,60 +127,92 @@ class SearchWindow:
         )
         self.stats_label.pack(side=tk.BOTTOM, pady=10)
     
-    def perform_search(self):
+    def search_now(self):
+        """Search immediately (button or Enter) without waiting for the debounce"""
+        self.search_debouncer.cancel()
+        self.perform_search()
+    
+    @profiled()
+    def perform_search(self, typed=False):
         """Perform network search"""
         search_term = self.search_entry.get().strip()
         
         if not search_term:
-            messagebox.showwarning("Warning", "Please enter a search term")
+            if typed:
+                self.clear_results()
+            else:
+                messagebox.showwarning("Warning", "Please enter a search term")
             return
         
-        # Clear previous results
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         # Update results label
         self.results_label.config(text=f"Search results for: '{search_term}'")
+        self.stats_label.config(text="Searching...")
         
-        # Search in database
-        results = db.fetch_all(SEARCH_ITEMS, 
-                             (f'%{search_term}%', f'%{search_term}%', 
-                              f'%{search_term}%', f'%{search_term}%'))
+        # Search in the background, narrowing the previous results locally
+        # when the term was extended; a newer search cancels delivery of this one
+        self.runner.submit(self.search_session.search, search_term, key='search',
+                           on_success=lambda results: self.show_results(search_term, results),
+                           on_error=self.show_error)
+    
+    def show_busy(self, busy):
+        """Show a busy cursor while a search is running"""
+        self.parent.config(cursor='watch' if busy else '')
+    
+    def show_error(self, error):
+        """Report a failed search in the stats bar"""
+        self.stats_label.config(text=f"Search failed: {error}")
+    
+    def show_results(self, search_term, results):
+        """Display search results (Tk thread)"""
+        if self.search_entry.get().strip() != search_term:
+            return
         
         # Display results
         if results:
-            for item in results:
-                item_id, name, category, sku, quantity, price, location, supplier = item
-                
-                # Determine status
-                if quantity == 0:
-                    status = "Out of Stock"
-                elif quantity < 10:  # Default reorder level
-                    status = "Low Stock"
-                else:
-                    status = "In Stock"
-                
-                self.tree.insert("", tk.END, values=(
-                    name,
-                    category or "Uncategorized",
-                    location or "Main Store",
-                    quantity,
-                    format_currency(price),
-                    status
-                ))
-            
+            self.tree.set_rows(results, self.result_values)
             self.stats_label.config(text=f"Found {len(results)} results for '{search_term}'")
         else:
-            self.tree.insert("", tk.END, values=("No results found", "", "", "", "", ""))
+            self.tree.set_rows([("No results found",)], self.no_results_values)
             self.stats_label.config(text=f"No results found for '{search_term}'")
     
+    def result_values(self, item):
+        """Return the treeview (values, tags) for a search result row"""
+        item_id, name, category, sku, quantity, price, location, supplier = item
+        
+        # Determine status
+        if quantity == 0:
+            status = "Out of Stock"
+        elif quantity < 10:  # Default reorder level
+            status = "Low Stock"
+        else:
+            status = "In Stock"
+        
+        return (
+            name,
+            category or "Uncategorized",
+            location or "Main Store",
+            quantity,
+            format_currency(price),
+            status
+        ), ()
+    
+    def no_results_values(self, item):
+        """Placeholder row shown when a search finds nothing"""
+        return (item[0], "", "", "", "", ""), ()
+    
     def clear_search(self):
         """Clear search results"""
         self.search_entry.delete(0, tk.END)
+        self.search_debouncer.cancel()
+        self.clear_results()
+    
+    def clear_results(self):
+        """Reset the results area and drop any search still running"""
         self.results_label.config(text="Enter search term to find items across all stores")
+        self.runner.cancel('search')
+        self.search_session.reset()
         
         # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tree.set_rows([])
         
         self.stats_label.config(text="Ready to search")
@@ -3,14 +3,18 @@ Shop network management window
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database.connection import db
-from database.queries import GET_ALL_SHOPS
+from controllers.shop_controller import ShopController
+from utils.task_runner import TaskRunner
+from utils.profiling import profiled
+from views.widgets import TreeReconciler
 
 
 class ShopWindow:
     def __init__(self, parent, user_id):
         self.parent = parent
         self.user_id = user_id
+        self.shops = []
+        self.runner = TaskRunner(parent, on_busy=self.show_busy)
         
         self.setup_ui()
         self.load_shops()
@@ -99,6 +103,9 @@ class ShopWindow:
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # Rows are keyed by shop_id so refreshes only touch what changed
+        self.reconciler = TreeReconciler(self.tree, self.shop_values)
+        
         # Stats frame
         self.stats_label = tk.Label(
             self.parent,
@@ -109,37 +116,49 @@ class ShopWindow:
         )
         self.stats_label.pack(side=tk.BOTTOM, pady=10)
     
+    def show_busy(self, busy):
+        """Show a busy cursor while background loads are running"""
+        self.parent.config(cursor='watch' if busy else '')
+    
+    @profiled()
     def load_shops(self):
-        """Load shops from database"""
-        self.shops = db.fetch_all(GET_ALL_SHOPS)
-        self.display_shops()
+        """Load shops in the background (served from the query cache when fresh)"""
+        self.stats_label.config(text="Loading shop data...")
+        self.runner.submit(ShopController.get_all_shops, key='shops',
+                           on_success=self.show_shops, on_error=self.show_error)
+    
+    def show_shops(self, shops):
+        """Display loaded shops (Tk thread)"""
+        self.shops = shops
+        if self.search_var.get().strip():
+            self.search_shops()
+        else:
+            self.display_shops()
+    
+    def show_error(self, error):
+        """Report a failed background load in the stats bar"""
+        self.stats_label.config(text=f"Failed to load shops: {error}")
+    
+    def shop_values(self, shop):
+        """Treeview values for a shop row (shop rows have no tags)"""
+        shop_id, name, location, manager, phone, email, status = shop
+        values = (
+            shop_id,
+            name,
+            location or "Not specified",
+            manager or "Not assigned",
+            phone or "N/A",
+            email or "N/A",
+            status
+        )
+        return values, ()
     
     def display_shops(self):
         """Display shops in treeview"""
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.reconciler.apply(self.shops)
         
-        total_shops = 0
-        active_shops = 0
-        
-        # Add shops
-        for shop in self.shops:
-            shop_id, name, location, manager, phone, email, status = shop
-            
-            total_shops += 1
-            if status == 'Active':
-                active_shops += 1
-            
-            self.tree.insert("", tk.END, values=(
-                shop_id,
-                name,
-                location or "Not specified",
-                manager or "Not assigned",
-                phone or "N/A",
-                email or "N/A",
-                status
-            ))
+        total_shops = len(self.shops)
+        active_shops = sum(1 for shop in self.shops if shop[6] == 'Active')
         
         # Update stats
         self.stats_label.config(
@@ -147,6 +166,7 @@ class ShopWindow:
                  f"Inactive: {total_shops - active_shops}"
         )
     
+    @profiled()
     def search_shops(self):
         """Search shops by name or location"""
         search_term = self.search_var.get().strip().lower()
@@ -164,23 +184,7 @@ class ShopWindow:
                 search_term in (manager or "").lower()):
                 filtered_shops.append(shop)
         
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Display filtered shops
-        for shop in filtered_shops:
-            shop_id, name, location, manager, phone, email, status = shop
-            
-            self.tree.insert("", tk.END, values=(
-                shop_id,
-                name,
-                location or "Not specified",
-                manager or "Not assigned",
-                phone or "N/A",
-                email or "N/A",
-                status
-            ))
+        self.reconciler.apply(filtered_shops)
         
         self.stats_label.config(
             text=f"Found {len(filtered_shops)} shops for '{search_term}'"
@@ -262,17 +266,17 @@ class ShopWindow:
                 return
             
             # Save to database
-            query = """
-            INSERT INTO shops (shop_name, location, manager_name, phone, email, status)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """
+            success, message = ShopController.add_shop({
+                'name': name, 'location': location, 'manager': manager,
+                'phone': phone, 'email': email, 'status': status
+            })
             
-            if db.execute_query(query, (name, location, manager, phone, email, status)):
+            if success:
                 messagebox.showinfo("Success", "Shop added successfully!")
                 dialog.destroy()
                 self.load_shops()  # Refresh list
             else:
-                messagebox.showerror("Error", "Failed to add shop")
+                messagebox.showerror("Error", message)
         
         tk.Button(button_frame, text="Save", command=save_shop, 
                  bg='#27ae60', fg='white', width=10).pack(side=tk.RIGHT, padx=5)
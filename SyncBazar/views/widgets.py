@@ -0,0 +1,260 @@
+"""
+Reusable Tkinter widgets for SyncBazar
+"""
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualTreeview:
+    """
+    A ttk Treeview that only materializes the rows in view
+    
+    Rows stay in a Python sequence (a list or an ItemList). The Treeview
+    holds a small pool of Tk items (the visible rows plus a buffer) whose
+    values are rewritten as the user scrolls, and the scrollbar is driven
+    from the total row count, so render time and Tk memory depend on the
+    viewport size, not the number of rows. Selection is tracked by row key,
+    so it follows a row while it scrolls out of view and back. A pooled
+    item is only rewritten when its formatted values change, and its tags
+    only when the status changes.
+    """
+    
+    def __init__(self, parent, column_configs, formatter, height=20, buffer=5,
+                 key=None, on_near_end=None):
+        self.formatter = formatter
+        self.key = key or (lambda row: row[0])
+        self.on_near_end = on_near_end
+        self.buffer = buffer
+        self.visible = height
+        self.rows = []
+        self.locate = None
+        self.top = 0
+        self.selected = set()
+        self.cursor = None
+        self._pool = []
+        self._shown = []  # (values, tags) currently in each pooled item
+        
+        columns = [col_name for col_name, _, _ in column_configs]
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings", height=height)
+        for col_name, heading, width in column_configs:
+            self.tree.heading(col_name, text=heading)
+            self.tree.column(col_name, width=width, minwidth=50)
+        
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self.move_cursor(-1))
+        self.tree.bind("<Down>", lambda e: self.move_cursor(1))
+        self.tree.bind("<Prior>", lambda e: self.move_cursor(-self.visible))
+        self.tree.bind("<Next>", lambda e: self.move_cursor(self.visible))
+        self.tree.bind("<Home>", lambda e: self.move_cursor(-len(self.rows)))
+        self.tree.bind("<End>", lambda e: self.move_cursor(len(self.rows)))
+    
+    def set_rows(self, rows, formatter=None, keep_position=False, locate=None):
+        """
+        Show a new sequence of rows (it is not copied)
+        
+        By default the view starts at the top with nothing selected. With
+        keep_position the selection is kept and the cursor row (or the top
+        row) stays at the same place in the viewport if it is in the new list.
+        locate(key) returns a row's index or None (e.g. ItemList.index), so
+        large lists are not scanned to find the cursor or the selection.
+        """
+        anchor = None
+        if keep_position and self.rows:
+            index = self.cursor if self.cursor is not None else self.top
+            if 0 <= index < len(self.rows):
+                anchor = (self.key(self.rows[index]), index - self.top)
+        
+        self.rows = rows
+        self.locate = locate
+        if formatter is not None:
+            self.formatter = formatter
+        self.top = 0
+        self.cursor = None
+        if not keep_position:
+            self.selected = set()
+        if anchor is not None:
+            key, offset = anchor
+            index = self.index_of(key)
+            if index is not None:
+                self.top = index - offset
+                if key in self.selected:
+                    self.cursor = index
+        self.render()
+    
+    def refresh(self):
+        """Redraw after self.rows was changed in place"""
+        self.render()
+    
+    def index_of(self, key):
+        """Return the index of the row with this key, or None"""
+        if self.locate is not None:
+            return self.locate(key)
+        return next((i for i, row in enumerate(self.rows) if self.key(row) == key), None)
+    
+    def selected_rows(self):
+        """Return the selected rows in list order"""
+        if not self.selected:
+            return []
+        if self.locate is None:
+            return [row for row in self.rows if self.key(row) in self.selected]
+        indexes = (self.locate(key) for key in self.selected)
+        return [self.rows[index] for index in sorted(i for i in indexes if i is not None)]
+    
+    def tag_configure(self, tag, **options):
+        """Configure a row tag (e.g. status colors) on the Treeview"""
+        self.tree.tag_configure(tag, **options)
+    
+    def bind(self, sequence, func):
+        """Bind an extra event handler on the Treeview"""
+        self.tree.bind(sequence, func, add='+')
+    
+    def yview(self, *args):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'"""
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.rows))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self.top += int(args[1]) * step
+        self.render()
+    
+    def scroll(self, units):
+        """Scroll by a number of rows (mouse wheel)"""
+        self.top += units
+        self.render()
+        return "break"
+    
+    def move_cursor(self, delta):
+        """Move the selection by delta rows, scrolling to keep it in view"""
+        if not self.rows:
+            return "break"
+        if self.cursor is None:
+            self.cursor = self.top - 1 if delta > 0 else self.top
+        self.cursor = max(0, min(self.cursor + delta, len(self.rows) - 1))
+        self.selected = {self.key(self.rows[self.cursor])}
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + self.visible:
+            self.top = self.cursor - self.visible + 1
+        self.render()
+        return "break"
+    
+    def on_resize(self, event):
+        """Recompute how many rows fit when the widget changes size"""
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        # One row's worth of height goes to the column headings
+        visible = max(1, event.height // row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+    
+    def on_select(self, event):
+        """Map the pooled Tk selection back onto row keys"""
+        shown = {item: self.rows[self.top + slot] for slot, item in enumerate(self._pool)}
+        self.selected -= {self.key(row) for row in shown.values()}
+        for item in self.tree.selection():
+            if item in shown:
+                self.selected.add(self.key(shown[item]))
+        focus = self.tree.focus()
+        if focus in shown:
+            self.cursor = self.top + self._pool.index(focus)
+    
+    def render(self):
+        """Rewrite the pooled Tk items for the rows currently in view"""
+        total = len(self.rows)
+        self.top = max(0, min(self.top, total - self.visible))
+        needed = min(self.visible + self.buffer, total - self.top)
+        
+        while len(self._pool) < needed:
+            self._pool.append(self.tree.insert("", tk.END))
+            self._shown.append(None)
+        while len(self._pool) > needed:
+            self.tree.delete(self._pool.pop())
+            self._shown.pop()
+        
+        selection = []
+        for slot, item in enumerate(self._pool):
+            row = self.rows[self.top + slot]
+            shown = self.formatter(row)
+            previous = self._shown[slot]
+            if shown != previous:
+                values, tags = shown
+                if previous is None or previous[1] != tags:
+                    self.tree.item(item, values=values, tags=tags)
+                else:
+                    self.tree.item(item, values=values)
+                self._shown[slot] = shown
+            if self.key(row) in self.selected:
+                selection.append(item)
+        if tuple(selection) != self.tree.selection():
+            self.tree.selection_set(selection)
+        self.tree.yview_moveto(0)
+        
+        if total:
+            first, last = self.top / total, min(1.0, (self.top + self.visible) / total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+        if last >= 0.9 and self.on_near_end:
+            self.on_near_end()
+
+
+class TreeReconciler:
+    """
+    Applies a new list of rows to a plain ttk Treeview as a diff
+    
+    Tree items are keyed by the row key (e.g. shop_id), so a refresh only
+    inserts new rows, rewrites rows whose values changed (tags only when
+    the status changed) and deletes rows that are gone. Unchanged rows are
+    not touched, so selection and scroll position survive a refresh.
+    """
+    
+    def __init__(self, tree, formatter, key=None):
+        self.tree = tree
+        self.formatter = formatter
+        self.key = key or (lambda row: row[0])
+        self._shown = {}  # iid -> (values, tags)
+    
+    def apply(self, rows):
+        """Make the tree show rows, in order; returns (inserted, updated, removed)"""
+        wanted = [(str(self.key(row)), row) for row in rows]
+        wanted_ids = {iid for iid, _ in wanted}
+        
+        removed = [iid for iid in self.tree.get_children() if iid not in wanted_ids]
+        if removed:
+            self.tree.delete(*removed)
+            for iid in removed:
+                self._shown.pop(iid, None)
+        
+        existing = self.tree.get_children()
+        # New rows can be inserted in place when the surviving rows are
+        # already in the wanted order; otherwise reorder once at the end
+        in_order = list(existing) == [iid for iid, _ in wanted if iid in self._shown]
+        
+        inserted = updated = 0
+        for index, (iid, row) in enumerate(wanted):
+            shown = self.formatter(row)
+            previous = self._shown.get(iid)
+            values, tags = shown
+            if previous is None:
+                self.tree.insert("", index if in_order else tk.END, iid=iid,
+                                 values=values, tags=tags)
+                inserted += 1
+            elif previous != shown:
+                if previous[1] != tags:
+                    self.tree.item(iid, values=values, tags=tags)
+                else:
+                    self.tree.item(iid, values=values)
+                updated += 1
+            self._shown[iid] = shown
+        
+        if not in_order:
+            self.tree.set_children("", *[iid for iid, _ in wanted])
+        return inserted, updated, len(removed)